@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+
+CACHE_ALIAS = 'auth'
+CACHED_USER_FIELDS = ('id', 'username', 'email', 'role', 'is_active', 'is_staff', 'is_superuser')
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def cache_entry(user):
+    # В кэш (в том числе файловый) попадают только поля, нужные аутентификации
+    # и проверкам ролей, без хеша пароля. Остальные поля пользователя
+    # загружаются из БД при первом обращении.
+    entry = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+    if api_settings.CHECK_REVOKE_TOKEN:
+        entry['password_md5'] = get_md5_hash_password(user.password)
+    return entry
+
+
+def user_from_entry(entry):
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in entry]
+    user = User.from_db(DEFAULT_DB_ALIAS, fields, [entry[field] for field in fields])
+    user.password_md5 = entry.get('password_md5')
+    return user
+
+
+def cached_user_queryset():
+    fields = [*CACHED_USER_FIELDS, 'password'] if api_settings.CHECK_REVOKE_TOKEN else CACHED_USER_FIELDS
+    return User.objects.only(*fields)
+
+
+def get_cached_user(user_id):
+    key = user_cache_key(user_id)
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is None:
+        entry = cache_entry(cached_user_queryset().get(**{api_settings.USER_ID_FIELD: user_id}))
+        cache.set(key, entry, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 15))
+    return user_from_entry(entry)
+
+
+async def aget_cached_user(user_id):
+    key = user_cache_key(user_id)
+    cache = get_cache()
+    entry = await cache.aget(key)
+    if entry is None:
+        entry = cache_entry(await cached_user_queryset().aget(**{api_settings.USER_ID_FIELD: user_id}))
+        await cache.aset(key, entry, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 15))
+    return user_from_entry(entry)
+
+
+def invalidate_cached_user(user_id):
+    get_cache().delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    # Пользователь берётся из кэша 'auth' (TTL + сброс по сигналам CustumUser),
+    # поэтому чтение с проверкой роли не ходит в таблицу пользователей.
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+    def check_user(self, validated_token, user):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            password_md5 = user.password_md5 or get_md5_hash_password(user.password)
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_md5:
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+    def get_user(self, validated_token):
+        try:
+            user = get_cached_user(self.get_user_id(validated_token))
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found') from e
+        return self.check_user(validated_token, user)
+
+    async def aauthenticate(self, request):
+        # Для нативных async-вьюх: разбор токена без потоков, пользователь — через async-кэш/ORM.
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return await self.aauthenticate_token(raw_token)
+
+    async def aauthenticate_token(self, raw_token):
+        validated_token = self.get_validated_token(raw_token)
+        try:
+            user = await aget_cached_user(self.get_user_id(validated_token))
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found') from e
+        return self.check_user(validated_token, user), validated_token
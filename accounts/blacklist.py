@@ -0,0 +1,115 @@
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+DEFAULT_BLACKLIST_INDEX = {
+    'MAX_SIZE': 100_000,
+    'SYNC_INTERVAL': 5.0,
+}
+
+
+class BlacklistIndex:
+    # JTI -> exp (unix time) для ещё не истёкших токенов из чёрного списка.
+    # Индекс догружает новые строки BlacklistedToken не чаще раза в
+    # SYNC_INTERVAL секунд; пока он полный, промах по нему — это ответ
+    # "не в чёрном списке" без запроса к БД.
+
+    def __init__(self, max_size, sync_interval):
+        self.max_size = max_size
+        self.sync_interval = sync_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._synced_at = None
+        self._complete = True
+
+    def _evict(self):
+        now = time.time()
+        for jti in [jti for jti, exp in self._entries.items() if exp <= now]:
+            del self._entries[jti]
+        if len(self._entries) > self.max_size:
+            keep = int(self.max_size * 0.9)
+            overflow = sorted(self._entries, key=self._entries.get)[:len(self._entries) - keep]
+            for jti in overflow:
+                del self._entries[jti]
+            self._complete = False
+
+    def _add(self, jti, exp):
+        self._entries[jti] = exp
+        if len(self._entries) > self.max_size:
+            self._evict()
+
+    def add(self, jti, exp):
+        with self._lock:
+            self._add(jti, exp)
+
+    def sync(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._synced_at is not None and now - self._synced_at < self.sync_interval:
+                return
+            self._evict()
+            if not self._complete and len(self._entries) < self.max_size // 2:
+                # Истёкшие записи освободили место — перечитываем индекс целиком.
+                self._entries = {}
+                self._last_id = 0
+                self._complete = True
+            rows = (
+                BlacklistedToken.objects.filter(id__gt=self._last_id, token__expires_at__gt=timezone.now())
+                .order_by('id')
+                .values_list('id', 'token__jti', 'token__expires_at')
+                .iterator(chunk_size=2000)
+            )
+            for row_id, jti, expires_at in rows:
+                self._add(jti, expires_at.timestamp())
+                self._last_id = row_id
+            self._synced_at = now
+
+    def contains(self, jti):
+        # True/False — ответ индекса, None — индекс неполный, нужно спросить БД.
+        self.sync()
+        with self._lock:
+            exp = self._entries.get(jti)
+            if exp is not None and exp > time.time():
+                return True
+            return False if self._complete else None
+
+    def is_blacklisted(self, jti):
+        state = self.contains(jti)
+        if state is None:
+            return BlacklistedToken.objects.filter(token__jti=jti).exists()
+        return state
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _build_index():
+    options = {**DEFAULT_BLACKLIST_INDEX, **getattr(settings, 'TOKEN_BLACKLIST_INDEX', {})}
+    return BlacklistIndex(options['MAX_SIZE'], options['SYNC_INTERVAL'])
+
+
+blacklist_index = _build_index()
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        if blacklist_index.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        blacklist_index.add(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        return blacklisted
+
+
+class CachedBlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedBlacklistRefreshToken
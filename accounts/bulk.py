@@ -0,0 +1,118 @@
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model, password_validation
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Profile
+
+User = get_user_model()
+
+ROLES = {role for role, _ in User.ROLE_CHOISE}
+BATCH_SIZE = 500
+
+
+def _init_worker():
+    # При spawn дочерний процесс стартует без настроенного Django.
+    from django.conf import settings
+    if not settings.configured or not django.apps.apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    # PBKDF2 упирается в CPU, поэтому хэши считаются в пуле процессов.
+    if not passwords:
+        return []
+    chunksize = max(1, len(passwords) // ((workers or 4) * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+def read_users_csv(fileobj):
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig')
+    return list(csv.DictReader(fileobj))
+
+
+def check_user(username, email, role):
+    # Те же валидаторы полей, что и у формы пользователя: bulk_create их не вызывает.
+    try:
+        User(username=username, email=email, role=role).clean_fields(exclude=['password'])
+    except ValidationError as exc:
+        return ' '.join(message for messages in exc.message_dict.values() for message in messages)
+    return None
+
+
+def check_password(password, username, email):
+    try:
+        password_validation.validate_password(password, User(username=username, email=email))
+    except ValidationError as exc:
+        return ' '.join(exc.messages)
+    return None
+
+
+def validate_rows(rows):
+    valid, errors, seen = [], [], set()
+    for line, row in enumerate(rows, start=2):
+        username = (row.get('username') or '').strip()
+        email = (row.get('email') or '').strip()
+        password = row.get('password') or ''
+        role = (row.get('role') or 'student').strip()
+        if not username or not password:
+            errors.append({'line': line, 'detail': '❌ Нужны username и password'})
+        elif role not in ROLES:
+            errors.append({'line': line, 'detail': f'❌ Неверная роль: {role}'})
+        elif username in seen:
+            errors.append({'line': line, 'detail': f'❌ Повтор username в файле: {username}'})
+        elif problem := check_user(username, email, role):
+            errors.append({'line': line, 'detail': f'❌ Неверные данные пользователя: {problem}'})
+        elif problem := check_password(password, username, email):
+            errors.append({'line': line, 'detail': f'❌ Слабый пароль: {problem}'})
+        else:
+            seen.add(username)
+            valid.append({
+                **row, 'line': line, 'username': username, 'email': email, 'password': password, 'role': role,
+            })
+
+    existing = set()
+    usernames = [row['username'] for row in valid]
+    for start in range(0, len(usernames), BATCH_SIZE):
+        existing.update(
+            User.objects.filter(username__in=usernames[start:start + BATCH_SIZE]).values_list('username', flat=True)
+        )
+    if existing:
+        errors.extend(
+            {'line': row['line'], 'detail': f'❌ Пользователь уже существует: {row["username"]}'}
+            for row in valid if row['username'] in existing
+        )
+        valid = [row for row in valid if row['username'] not in existing]
+    return valid, errors
+
+
+def bulk_register(rows, workers=None, batch_size=BATCH_SIZE):
+    valid, errors = validate_rows(rows)
+    hashes = hash_passwords([row['password'] for row in valid], workers)
+
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(
+                username=row['username'],
+                password=password_hash,
+                email=row['email'],
+                role=row['role'],
+            )
+            for row, password_hash in zip(valid, hashes)
+        ], batch_size=batch_size)
+        Profile.objects.bulk_create([
+            Profile(
+                user=user,
+                country=(row.get('country') or '').strip(),
+                phone_number=(row.get('phone_number') or '').strip(),
+            )
+            for user, row in zip(users, valid)
+        ], batch_size=batch_size)
+    return users, errors
@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.blacklist import CachedBlacklistTokenRefreshSerializer, blacklist_index
+from server.benchmarks import format_result, measure, throwaway_database
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает задержку обновления токена: проверка чёрного списка в БД и в индексе в памяти'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=500)
+        parser.add_argument('--blacklisted', type=int, default=5000)
+        parser.add_argument('--calls', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=8)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            user = User(username='bench')
+            user.set_unusable_password()
+            user.save()
+
+            for _ in range(options['blacklisted']):
+                RefreshToken.for_user(user).blacklist()
+            tokens = [str(RefreshToken.for_user(user)) for _ in range(options['tokens'])]
+            blacklist_index.sync(force=True)
+
+            for name, serializer_class in (
+                ('blacklist in SQLite', TokenRefreshSerializer),
+                ('blacklist index in memory', CachedBlacklistTokenRefreshSerializer),
+            ):
+                def refresh(i):
+                    serializer = serializer_class(data={'refresh': tokens[i % len(tokens)]})
+                    serializer.is_valid(raise_exception=True)
+
+                result = measure(refresh, options['calls'], options['threads'])
+                self.stdout.write(format_result(name, result))
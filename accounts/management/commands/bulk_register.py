@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.bulk import BATCH_SIZE, bulk_register, read_users_csv
+
+
+class Command(BaseCommand):
+    help = 'Массовая регистрация пользователей из CSV (username,password[,email,role,country,phone_number])'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--workers', type=int, default=None, help='Процессов для хэширования паролей')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as f:
+                rows = read_users_csv(f)
+        except OSError as exc:
+            raise CommandError(f'Не удалось прочитать файл: {exc}')
+
+        users, errors = bulk_register(rows, workers=options['workers'], batch_size=options['batch_size'])
+        for error in errors:
+            self.stderr.write(f'Строка {error["line"]}: {error["detail"]}')
+        self.stdout.write(self.style.SUCCESS(f'Создано пользователей: {len(users)}, ошибок: {len(errors)}'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = 'Удаляет истёкшие OutstandingToken/BlacklistedToken пачками (запускать по cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by('id')
+        total = 0
+        while True:
+            batch = list(expired.values_list('id', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=batch).delete()
+                deleted, _ = OutstandingToken.objects.filter(id__in=batch).delete()
+            total += deleted
+            self.stdout.write(f'Удалено токенов: {total}')
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: удалено {total} истёкших токенов'))
@@ -13,6 +13,11 @@ class CustumUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    def get_profile(self):
+        # Профиль создаётся лениво при первом обращении, а не на каждую регистрацию.
+        profile, _ = Profile.objects.get_or_create(user=self)
+        return profile
+
 class Profile(models.Model):
     user = models.OneToOneField(CustumUser, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True)
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
+from .models import Profile
+
 User = get_user_model()
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -13,4 +15,13 @@ class RegisterSerializer(serializers.ModelSerializer):
             username=validated_data['username'],
             password=validated_data['password']
         )
-        return user
\ No newline at end of file
+        return user
+
+
+class ProfileSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True)
+    role = serializers.CharField(source='user.role', read_only=True)
+
+    class Meta:
+        model = Profile
+        fields = ('username', 'role', 'bio', 'avatar', 'country', 'phone_number')
@@ -1,3 +1,133 @@
-from django.test import TestCase
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import authentication, blacklist
+from .blacklist import BlacklistIndex
+from .models import Profile
+
+User = get_user_model()
+
+
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        caches['auth'].clear()
+        self.user = User.objects.create_user(username='staff', password='Pass-12345', role='admin')
+
+    def login(self):
+        response = self.client.post('/account/login/', {'username': 'staff', 'password': 'Pass-12345'})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_token_has_no_unused_role_claim(self):
+        access = AccessToken(self.login()['access'])
+        self.assertNotIn('role', access)
+
+    def test_cached_user_does_not_query_users_table(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login()["access"]}')
+        self.client.get('/api/my-courses/')
+        with self.assertNumQueries(1):
+            self.client.get('/api/my-courses/')
+
+    def test_cache_holds_only_authentication_fields(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login()["access"]}')
+        self.client.get('/api/my-courses/')
+        entry = caches['auth'].get(authentication.user_cache_key(self.user.id))
+        self.assertEqual(set(entry), set(authentication.CACHED_USER_FIELDS))
+        self.assertNotIn(self.user.password, repr(entry))
+
+        user = authentication.get_cached_user(self.user.id)
+        self.assertEqual((user.pk, user.role), (self.user.pk, 'admin'))
+        self.assertTrue(user.check_password('Pass-12345'))
+
+    def test_role_change_is_visible_immediately(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login()["access"]}')
+        response = self.client.post('/api/courses/', {'title': 'Course'})
+        self.assertEqual(response.status_code, 201)
+
+        self.user.role = 'mentor'
+        self.user.save()
+        response = self.client.post('/api/courses/', {'title': 'Course 2'})
+        self.assertEqual(response.status_code, 403)
+
+
+class TokenBlacklistTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='Pass-12345')
+        # Свой индекс на каждый тест: id строк после отката транзакции повторяются.
+        self.index = BlacklistIndex(max_size=100, sync_interval=60)
+        patcher = mock.patch.object(blacklist, 'blacklist_index', self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.index.sync(force=True)
+
+    def test_logged_out_refresh_token_is_rejected(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/account/logout/', {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 205)
+        with self.assertNumQueries(0):
+            response = self.client.post('/account/token/refresh/', {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_token_blacklisted_elsewhere_is_seen_after_sync(self):
+        refresh = RefreshToken.for_user(self.user)
+        # Отзыв в другом процессе: строка в БД, локальный индекс о ней не знает.
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh['jti']))
+        self.index.sync(force=True)
+        response = self.client.post('/account/token/refresh/', {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_overflowing_index_falls_back_to_database(self):
+        index = BlacklistIndex(max_size=2, sync_interval=0)
+        tokens = [RefreshToken.for_user(self.user) for _ in range(4)]
+        for token in tokens:
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+        index.sync(force=True)
+        self.assertLessEqual(len(index), 2)
+        self.assertIsNone(index.contains('unknown'))
+        self.assertTrue(all(index.is_blacklisted(token['jti']) for token in tokens))
+        self.assertFalse(index.is_blacklisted('unknown'))
+
+
+class RegistrationTests(APITestCase):
+    def test_profile_is_created_on_first_access(self):
+        response = self.client.post('/account/register/', {'username': 'new', 'password': 'Pass-12345'})
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(Profile.objects.filter(user__username='new').exists())
+
+        self.client.force_authenticate(User.objects.get(username='new'))
+        response = self.client.get('/account/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], 'new')
+        self.assertEqual(Profile.objects.filter(user__username='new').count(), 1)
+
+        response = self.client.patch('/account/profile/', {'country': 'RU'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Profile.objects.get(user__username='new').country, 'RU')
+
+    def test_bulk_register_command_validates_passwords(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8') as f:
+            f.write('username,password,role,country\n')
+            f.write('alice,Strong-pass-1,student,RU\n')
+            f.write('bob,123,student,RU\n')
+            f.write('carol,Strong-pass-2,mentor,KZ\n')
+            f.write('bad name!,Strong-pass-3,student,RU\n')
+            f.flush()
+            errors = StringIO()
+            call_command('bulk_register', f.name, '--workers', '1', stdout=StringIO(), stderr=errors)
+
+        self.assertEqual(
+            sorted(User.objects.values_list('username', 'role')), [('alice', 'student'), ('carol', 'mentor')]
+        )
+        self.assertEqual(Profile.objects.get(user__username='carol').country, 'KZ')
+        self.assertTrue(User.objects.get(username='alice').check_password('Strong-pass-1'))
+        self.assertIn('Строка 3', errors.getvalue())
+        self.assertIn('Строка 5', errors.getvalue())
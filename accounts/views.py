@@ -1,21 +1,29 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from .serializer import RegisterSerializer
+from .blacklist import CachedBlacklistRefreshToken
+from .serializer import ProfileSerializer, RegisterSerializer
 
 class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
 
 
+class ProfileView(generics.RetrieveUpdateAPIView):
+    serializer_class = ProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        return self.request.user.get_profile()
+
+
 class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         try:
             refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
+            token = CachedBlacklistRefreshToken(refresh_token)
             token.blacklist()
             return Response(
                 {"detail": "Logout successful"},
@@ -26,5 +34,3 @@ class LogoutView(APIView):
                 {"detail": "Invalid token"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-
@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'server.settings')
+# Под ASGI ORM работает в потоках sync_to_async, и постоянные соединения в них
+# не закрываются по окончании запроса — поэтому по умолчанию без переиспользования.
+os.environ.setdefault('SQLITE_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
+
+# Импорт после get_*_application(): модели доступны только после настройки Django.
+from stepik.intake import recover_on_startup
+
+recover_on_startup()
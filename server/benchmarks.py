@@ -0,0 +1,78 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+
+@contextmanager
+def throwaway_database(test_name=None):
+    # Бенчмарки пишут тестовые данные, поэтому работают во временной БД;
+    # test_name — файл вместо БД в памяти. Зеркала default (соединение 'read')
+    # переключаются на неё же.
+    old_name = connection.settings_dict['NAME']
+    old_test_name = connection.settings_dict['TEST']['NAME']
+    mirrors = {
+        alias: connections[alias].settings_dict['NAME'] for alias in connections
+        if connections[alias].settings_dict['TEST'].get('MIRROR') == DEFAULT_DB_ALIAS
+    }
+    connection.settings_dict['TEST']['NAME'] = test_name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    for alias in mirrors:
+        connections[alias].close()
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        yield
+    finally:
+        for alias, name in mirrors.items():
+            connections[alias].close()
+            connections[alias].settings_dict['NAME'] = name
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        connection.settings_dict['TEST']['NAME'] = old_test_name
+
+
+def measure(func, calls, threads=1):
+    def timed(i):
+        started = time.perf_counter()
+        func(i)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(timed, range(calls)))
+    return summarize(latencies, time.perf_counter() - started, 'threads', threads)
+
+
+def summarize(latencies, elapsed, concurrency_key, concurrency):
+    latencies = sorted(latencies)
+    return {
+        'calls': len(latencies),
+        concurrency_key: concurrency,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3),
+    }
+
+
+async def ameasure(func, calls, concurrency=1):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await func(i)
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(timed(i) for i in range(calls)))
+    return summarize(latencies, time.perf_counter() - started, 'concurrency', concurrency)
+
+
+def format_result(name, result):
+    return (
+        f'{name:<28} {result["rps"]:>10} req/s  p50 {result["p50_ms"]:>8} ms  '
+        f'p95 {result["p95_ms"]:>8} ms  max {result["max_ms"]:>8} ms'
+    )
@@ -0,0 +1,39 @@
+DEFAULT_SQLITE = {
+    'PRAGMAS': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'memory',
+    },
+    'TIMEOUT': 5,
+    'TRANSACTION_MODE': 'IMMEDIATE',
+    'CONN_MAX_AGE': 600,
+    'READ_ALIAS': 'read',
+}
+
+
+def sqlite_databases(name, options=None):
+    # TIMEOUT — busy_timeout в секундах. IMMEDIATE берёт блокировку записи в
+    # начале транзакции: без этого повышение блокировки с чтения на запись
+    # падает с "database is locked" сразу, не дожидаясь busy_timeout.
+    # READ_ALIAS — отдельное соединение только для чтения к тому же файлу:
+    # в режиме WAL читатели не ждут писателя.
+    options = {**DEFAULT_SQLITE, **(options or {})}
+    default = {
+        'ENGINE': 'server.sqlite',
+        'NAME': name,
+        'CONN_MAX_AGE': options['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'timeout': options['TIMEOUT'], 'transaction_mode': options['TRANSACTION_MODE']},
+        'PRAGMAS': dict(options['PRAGMAS']),
+    }
+    databases = {'default': default}
+    if options['READ_ALIAS']:
+        databases[options['READ_ALIAS']] = {
+            **default,
+            'OPTIONS': {'timeout': options['TIMEOUT']},
+            'PRAGMAS': {**options['PRAGMAS'], 'query_only': 'on'},
+            'TEST': {'MIRROR': 'default'},
+        }
+    return databases
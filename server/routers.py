@@ -0,0 +1,55 @@
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+read_only_request = ContextVar('read_only_request', default=False)
+
+
+def read_alias():
+    alias = getattr(settings, 'DATABASE_READ_ALIAS', None)
+    return alias if alias in settings.DATABASES else None
+
+
+class ReadAliasRouter:
+    # Чтения из GET/HEAD/OPTIONS-запросов идут в READ-соединение, всё остальное —
+    # в default. Внутри открытой транзакции default чтение остаётся на default,
+    # чтобы видеть собственные незакоммиченные записи.
+
+    def db_for_read(self, model, **hints):
+        alias = read_alias()
+        if alias and read_only_request.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+@sync_and_async_middleware
+def read_only_request_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = read_only_request.set(request.method in SAFE_METHODS)
+            try:
+                return await get_response(request)
+            finally:
+                read_only_request.reset(token)
+    else:
+        def middleware(request):
+            token = read_only_request.set(request.method in SAFE_METHODS)
+            try:
+                return get_response(request)
+            finally:
+                read_only_request.reset(token)
+    return middleware
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from server.database import sqlite_databases
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -50,11 +53,57 @@ from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=2),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=2),
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.blacklist.CachedBlacklistTokenRefreshSerializer',
+}
+
+# Индекс чёрного списка токенов в памяти процесса. Токен, отозванный в другом
+# процессе, виден здесь не позже чем через SYNC_INTERVAL секунд.
+TOKEN_BLACKLIST_INDEX = {
+    'MAX_SIZE': 100_000,
+    'SYNC_INTERVAL': 5.0,
+}
+
+GRADER = {
+    'WORKERS': None,
+    'TIME_LIMIT': 2,
+    'MEMORY_LIMIT_MB': 256,
+    'OUTPUT_LIMIT_KB': 64,
+    'POLL_INTERVAL': 1.0,
+    'LEASE_SECONDS': 300,
+    'MAX_ATTEMPTS': 3,
+    'SANDBOX': os.environ.get('GRADER_SANDBOX', 'auto'),
+    'SANDBOX_USER': os.environ.get('GRADER_SANDBOX_USER', 'nobody'),
+}
+
+SUBMISSION_EVENTS = {
+    'KEEPALIVE': 15.0,
+    'POLL_INTERVAL': 0.5,
+    'RETENTION': 600,
+}
+
+# Тела решений хранятся один раз на уникальное содержимое (stepik.CodeBlob).
+SUBMISSION_CODE_DEDUP = True
+
+# Пакетная запись решений в пиковые часы (stepik.intake): ответ 202 с intake_key,
+# INSERT пакетами фоновым потоком, журнал для восстановления после падения.
+SUBMISSION_BATCHING = {
+    'ENABLED': os.environ.get('SUBMISSION_BATCHING') == '1',
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL_MS': 50,
+    'JOURNAL_DIR': BASE_DIR / 'intake_journal',
+    'RETRIES': 5,
+    'RETRY_BACKOFF_MS': 100,
+}
+
+# Тесты от THRESHOLD байт хранятся файлами вне БД (stepik.blobstore).
+TEST_STORAGE = {
+    'ROOT': BASE_DIR / 'test_data',
+    'THRESHOLD': 64 * 1024,
 }
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
 }
 
@@ -66,6 +115,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'server.routers.read_only_request_middleware',
 ]
 
 ROOT_URLCONF = 'server.urls'
@@ -102,11 +152,56 @@ SWAGGER_SETTINGS = {
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# SQLite в режиме WAL с PRAGMA на каждом соединении (server.database.DEFAULT_SQLITE)
+# и отдельным соединением 'read' для чтений из безопасных запросов (server.routers).
+# server/asgi.py выставляет SQLITE_CONN_MAX_AGE=0, если он не задан явно.
+SQLITE = {
+    'TIMEOUT': float(os.environ.get('SQLITE_TIMEOUT', 5)),
+    'CONN_MAX_AGE': int(os.environ.get('SQLITE_CONN_MAX_AGE', 600)),
+}
+
+DATABASES = sqlite_databases(BASE_DIR / 'db.sqlite3', SQLITE)
+DATABASE_READ_ALIAS = 'read'
+DATABASE_ROUTERS = ['server.routers.ReadAliasRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Кэш курсов: LRU в памяти процесса по умолчанию, файловый — для нескольких процессов.
+
+COURSE_CACHE_DIR = os.environ.get('COURSE_CACHE_DIR')
+
+# Кэш пользователей для JWT. Общий файловый кэш видят все воркеры, и сброс по
+# сигналу после смены роли действует сразу. В кэше процесса другие воркеры
+# видят старую роль до AUTH_USER_CACHE_TIMEOUT секунд, поэтому окно короткое.
+AUTH_CACHE_DIR = os.environ.get('AUTH_CACHE_DIR')
+AUTH_USER_CACHE_TIMEOUT = 300 if AUTH_CACHE_DIR else 15
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'courses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': COURSE_CACHE_DIR,
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    } if COURSE_CACHE_DIR else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'courses',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': AUTH_CACHE_DIR,
+        'TIMEOUT': AUTH_USER_CACHE_TIMEOUT,
+    } if AUTH_CACHE_DIR else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth',
+        'TIMEOUT': AUTH_USER_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
 
@@ -0,0 +1,11 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Стандартный бэкенд SQLite + PRAGMA из settings_dict['PRAGMAS'] на каждом новом соединении.
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'server.settings')
 
 application = get_wsgi_application()
+
+# Импорт после get_*_application(): модели доступны только после настройки Django.
+from stepik.intake import recover_on_startup
+
+recover_on_startup()
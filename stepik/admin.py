@@ -7,3 +7,5 @@ admin.site.register(Module)
 admin.site.register(Task)
 admin.site.register(InputOutput)
 admin.site.register(Submission)
+admin.site.register(GradingJob)
+admin.site.register(SubmissionTestResult)
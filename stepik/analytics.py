@@ -0,0 +1,171 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from .models import Submission, Task, TaskDailyStats, TaskProgress, TaskSolveHistogram
+from .utils import iter_chunks
+
+COUNTED_STATUSES = ('accepted', 'wrong')
+
+
+def _shift(field, delta):
+    # Счётчики положительные: уменьшение строки, собранной не из всех решений,
+    # останавливается на нуле вместо IntegrityError внутри сигнала.
+    return Greatest(F(field) + delta, Value(0)) if delta < 0 else F(field) + delta
+
+
+def _bump(model, lookup, defaults, **deltas):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        row, _ = model.objects.get_or_create(**lookup, defaults=defaults)
+        model.objects.filter(pk=row.pk).update(**{field: _shift(field, delta) for field, delta in deltas.items()})
+
+
+def _status_deltas(status, sign):
+    return {status: sign} if status in COUNTED_STATUSES else {}
+
+
+def _day_lookup(submission):
+    return {'task_id': submission.task_id, 'day': timezone.localdate(submission.created_at)}
+
+
+def record_submission(submission):
+    _bump(
+        TaskDailyStats, _day_lookup(submission), {'course_id': submission.course_id},
+        submissions=1, **_status_deltas(submission.status, 1),
+    )
+
+
+def record_status_change(submission, previous_status):
+    deltas = _status_deltas(previous_status, -1)
+    for status, delta in _status_deltas(submission.status, 1).items():
+        deltas[status] = deltas.get(status, 0) + delta
+    _bump(TaskDailyStats, _day_lookup(submission), {'course_id': submission.course_id}, **deltas)
+
+
+def record_deletion(submission):
+    deltas = {'submissions': -1, **_status_deltas(submission.status, -1)}
+    TaskDailyStats.objects.filter(**_day_lookup(submission)).update(
+        **{field: _shift(field, delta) for field, delta in deltas.items()}
+    )
+
+
+def record_solve_change(task_id, course_id, old_attempts, new_attempts):
+    # attempts_to_solve у пары (студент, задача) сменился: студент переезжает
+    # между столбцами гистограммы.
+    if old_attempts == new_attempts:
+        return
+    if old_attempts is not None:
+        TaskSolveHistogram.objects.filter(task_id=task_id, attempts=old_attempts).update(solvers=_shift('solvers', -1))
+    if new_attempts is not None:
+        _bump(
+            TaskSolveHistogram, {'task_id': task_id, 'attempts': new_attempts}, {'course_id': course_id},
+            solvers=1,
+        )
+
+
+def relocate(task_filter, course_id):
+    TaskDailyStats.objects.filter(**task_filter).exclude(course_id=course_id).update(course_id=course_id)
+    TaskSolveHistogram.objects.filter(**task_filter).exclude(course_id=course_id).update(course_id=course_id)
+
+
+def median_from_histogram(histogram):
+    # histogram — [(attempts, solvers)] по возрастанию attempts.
+    total = sum(solvers for _, solvers in histogram)
+    if not total:
+        return None
+    positions = {(total - 1) // 2, total // 2}
+    values = []
+    seen = 0
+    for attempts, solvers in histogram:
+        values += [attempts for position in positions if seen <= position < seen + solvers]
+        seen += solvers
+    return sum(values) / len(values)
+
+
+def course_analytics(course, since=None, until=None):
+    # Все метрики считаются только по TaskDailyStats и TaskSolveHistogram.
+    daily = TaskDailyStats.objects.filter(course=course)
+    if since is not None:
+        daily = daily.filter(day__gte=since)
+    if until is not None:
+        daily = daily.filter(day__lte=until)
+    sums = {'submissions': Sum('submissions'), 'accepted': Sum('accepted'), 'wrong': Sum('wrong')}
+
+    per_task = {row['task_id']: row for row in daily.values('task_id').annotate(**sums).order_by()}
+    histograms = {}
+    for task_id, attempts, solvers in (
+        TaskSolveHistogram.objects.filter(course=course, solvers__gt=0)
+        .order_by('task_id', 'attempts')
+        .values_list('task_id', 'attempts', 'solvers')
+    ):
+        histograms.setdefault(task_id, []).append((attempts, solvers))
+
+    tasks = []
+    for task in Task.objects.filter(module__course=course).order_by('module_id', 'order', 'id').values('id', 'title', 'module_id'):
+        totals = per_task.get(task['id'], {})
+        submissions = totals.get('submissions') or 0
+        accepted = totals.get('accepted') or 0
+        histogram = histograms.get(task['id'], [])
+        tasks.append({
+            'task': task['id'],
+            'title': task['title'],
+            'module': task['module_id'],
+            'submissions': submissions,
+            'accepted': accepted,
+            'wrong': totals.get('wrong') or 0,
+            'acceptance_rate': round(accepted / submissions, 4) if submissions else None,
+            'solvers': sum(solvers for _, solvers in histogram),
+            'median_attempts_to_solve': median_from_histogram(histogram),
+        })
+
+    return {
+        'course': course.id,
+        'since': since,
+        'until': until,
+        'tasks': tasks,
+        'daily': list(daily.values('day').annotate(**sums).order_by('day')),
+    }
+
+
+def rebuild_course(course_id, batch_size=200):
+    # Пересборка дневных срезов из решений (пачками задач) и гистограммы из
+    # TaskProgress — поэтому сначала нужно запустить rebuild_progress.
+    with transaction.atomic():
+        TaskDailyStats.objects.filter(course_id=course_id).delete()
+        TaskSolveHistogram.objects.filter(course_id=course_id).delete()
+
+        task_ids = Task.objects.filter(module__course_id=course_id).order_by('pk').values_list('pk', flat=True)
+        days = 0
+        for chunk in iter_chunks(task_ids, batch_size):
+            rows = (
+                Submission.objects.filter(course_id=course_id, task_id__in=chunk)
+                .annotate(day=TruncDate('created_at'))
+                .values('task_id', 'day')
+                .annotate(
+                    submissions=Count('pk'),
+                    accepted=Count('pk', filter=Q(status='accepted')),
+                    wrong=Count('pk', filter=Q(status='wrong')),
+                )
+                .order_by()
+            )
+            days += len(TaskDailyStats.objects.bulk_create(
+                [TaskDailyStats(course_id=course_id, **row) for row in rows], batch_size=1000,
+            ))
+
+        histogram = (
+            TaskProgress.objects.filter(course_id=course_id, attempts_to_solve__isnull=False)
+            .values('task_id', 'attempts_to_solve')
+            .annotate(solvers=Count('pk'))
+            .order_by()
+        )
+        TaskSolveHistogram.objects.bulk_create([
+            TaskSolveHistogram(
+                course_id=course_id, task_id=row['task_id'], attempts=row['attempts_to_solve'], solvers=row['solvers'],
+            )
+            for row in histogram
+        ], batch_size=1000)
+        return days
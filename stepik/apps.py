@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class StepikConfig(AppConfig):
     name = 'stepik'
+
+    def ready(self):
+        import stepik.signals
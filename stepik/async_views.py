@@ -0,0 +1,88 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import APIException
+
+from accounts.authentication import CachedJWTAuthentication
+
+from .events import stream_status_events
+from .grader import enqueue_submission
+from .intake import batcher, batching_settings, receipt
+from .models import Submission, Task
+
+authenticator = CachedJWTAuthentication()
+
+
+async def authenticate(request, allow_query_token=False):
+    try:
+        result = await authenticator.aauthenticate(request)
+        if result is None and allow_query_token and request.GET.get('token'):
+            # EventSource в браузере не умеет слать заголовки — токен приходит в ?token=.
+            result = await authenticator.aauthenticate_token(request.GET['token'].encode())
+    except APIException as exc:
+        return None, JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+    if result is None:
+        return None, JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    return result[0], None
+
+
+@csrf_exempt
+@require_POST
+async def submission_intake(request):
+    user, error = await authenticate(request)
+    if error is not None:
+        return error
+
+    try:
+        payload = json.loads(request.body)
+        task_id = int(payload['task'])
+        code_student = payload['code_student']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'detail': '❌ Нужны поля task и code_student'}, status=400)
+    if not isinstance(code_student, str) or not code_student.strip():
+        return JsonResponse({'code_student': ['❌ Решение не может быть пустым']}, status=400)
+    if not await Task.objects.filter(pk=task_id).aexists():
+        return JsonResponse({'task': ['❌ Задание не найдено']}, status=400)
+
+    if batching_settings()['ENABLED']:
+        entry = await sync_to_async(batcher.submit)(user.id, task_id, code_student)
+        return JsonResponse(receipt(entry), status=202)
+
+    submission = await Submission.objects.acreate(user=user, task_id=task_id, code_student=code_student)
+    await sync_to_async(enqueue_submission)(submission)
+
+    return JsonResponse(
+        {
+            'id': submission.id,
+            'task': submission.task_id,
+            'status': submission.status,
+            'created_at': submission.created_at.isoformat(),
+        },
+        status=201
+    )
+
+
+@require_GET
+async def submission_events(request):
+    if not isinstance(request, ASGIRequest):
+        # Под WSGI бесконечный async-поток занял бы воркер навсегда.
+        return JsonResponse({'detail': '❌ Поток событий доступен только при запуске под ASGI'}, status=501)
+
+    user, error = await authenticate(request, allow_query_token=True)
+    if error is not None:
+        return error
+
+    try:
+        last_event_id = int(request.headers['Last-Event-ID'])
+    except (KeyError, ValueError):
+        last_event_id = None
+    response = StreamingHttpResponse(
+        stream_status_events(user.id, last_event_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,87 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+CACHE_ALIAS = 'courses'
+CATALOGUE = 'catalogue'
+
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _version_key(scope):
+    return f'version:{scope}'
+
+
+def course_scope(course_id):
+    return f'course:{course_id}'
+
+
+def get_version(scope):
+    # Версия — метка времени, поэтому после вытеснения ключа из LRU
+    # новая версия не совпадёт ни с одной из старых записей.
+    cache = get_cache()
+    version = cache.get(_version_key(scope))
+    if version is None:
+        cache.add(_version_key(scope), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(scope))
+    return version
+
+
+def bump_version(*scopes):
+    cache = get_cache()
+    cache.set_many({_version_key(scope): time.time_ns() for scope in scopes}, timeout=None)
+    _count('invalidations')
+
+
+def invalidate_course(course_id, catalogue=True):
+    scopes = [course_scope(course_id)]
+    if catalogue:
+        scopes.append(CATALOGUE)
+    # Версия поднимается после коммита: иначе параллельный запрос может
+    # закешировать ещё старые данные уже под новой версией.
+    transaction.on_commit(lambda: bump_version(*scopes))
+
+
+def build_key(prefix, scope, request):
+    params = sorted(request.query_params.lists())
+    raw = f'{request.get_host()}|{params}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'{prefix}:{get_version(scope)}:{digest}'
+
+
+def cached_response(key, build):
+    cache = get_cache()
+    data = cache.get(key)
+    if data is not None:
+        _count('hits')
+        return Response(data)
+
+    _count('misses')
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, response.data)
+    return response
+
+
+def get_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    stats['backend'] = settings.CACHES[CACHE_ALIAS]['BACKEND']
+    return stats
@@ -0,0 +1,15 @@
+import hashlib
+
+
+def normalize_code(code):
+    # Переводы строк и хвостовые пробелы не меняют решение — на хеш они не влияют.
+    lines = code.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip('\n')
+
+
+def code_hash(code):
+    return hashlib.sha256(normalize_code(code).encode()).hexdigest()
+
+
+def content_digest(code):
+    return hashlib.sha256(code.encode()).hexdigest()
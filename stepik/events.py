@@ -0,0 +1,221 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import SubmissionEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUBMISSION_EVENTS = {
+    'KEEPALIVE': 15.0,
+    # Как часто опросчик процесса читает новые строки SubmissionEvent.
+    'POLL_INTERVAL': 0.5,
+    # Сколько секунд хранить события для переподключения по Last-Event-ID.
+    'RETENTION': 600,
+    'QUEUE_SIZE': 100,
+    'RETRY_MS': 3000,
+}
+
+
+def events_settings():
+    return {**DEFAULT_SUBMISSION_EVENTS, **getattr(settings, 'SUBMISSION_EVENTS', {})}
+
+
+class Subscription:
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Отставший клиент теряет событие и дочитывает пропущенное из журнала.
+            self.overflowed = True
+
+
+class SubmissionEventBroker:
+    # user_id -> подписки открытых SSE-потоков этого процесса. publish() можно
+    # вызывать из любого потока: события передаются в цикл подписчика через
+    # call_soon_threadsafe.
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id, maxsize):
+        subscription = Subscription(asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                pass
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+
+broker = SubmissionEventBroker()
+
+
+def event_rows(queryset):
+    return queryset.order_by('id').values_list('id', 'user_id', 'submission_id', 'task_id', 'status')
+
+
+def row_event(row):
+    event_id, user_id, submission_id, task_id, status = row
+    return user_id, {'event_id': event_id, 'id': submission_id, 'task': task_id, 'status': status}
+
+
+def latest_event_id():
+    return SubmissionEvent.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+class EventRelay:
+    # Один поток на процесс: пока есть подписчики, читает новые строки журнала
+    # SubmissionEvent и раздаёт их брокеру. Так события грейдера и других
+    # процессов доходят до SSE-потоков, а БД опрашивается одним запросом на
+    # процесс, а не на каждый поток.
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._lock = threading.Lock()
+        self._thread = None
+        self.last_id = None
+
+    def ensure_started(self):
+        # Вызывается после подписки. Без подписчиков журнал не читается, поэтому
+        # чтение начинается с текущего конца журнала, а не с места остановки.
+        with self._lock:
+            if self.last_id is None:
+                self.last_id = latest_event_id()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='submission-events', daemon=True)
+                self._thread.start()
+
+    def poll(self):
+        for row in event_rows(SubmissionEvent.objects.filter(id__gt=self.last_id)):
+            user_id, event = row_event(row)
+            self.broker.publish(user_id, event)
+            self.last_id = event['event_id']
+
+    def _run(self):
+        options = events_settings()
+        while True:
+            try:
+                with self._lock:
+                    if not self.broker.subscriber_count():
+                        self.last_id = None
+                    elif self.last_id is not None:
+                        self.poll()
+            except DatabaseError:
+                logger.exception('Не удалось прочитать журнал событий решений')
+            finally:
+                close_old_connections()
+            time.sleep(options['POLL_INTERVAL'])
+
+
+relay = EventRelay(broker)
+
+_pruned_at = 0.0
+
+
+def prune_events(retention=None):
+    retention = events_settings()['RETENTION'] if retention is None else retention
+    return SubmissionEvent.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=retention)).delete()
+
+
+def prune_expired():
+    # Чистит журнал пишущий процесс (грейдер, веб-воркер), а не SSE-опросчик:
+    # под WSGI или без подписчиков журнал иначе растёт без предела.
+    global _pruned_at
+    if time.monotonic() - _pruned_at < events_settings()['RETENTION'] / 10:
+        return
+    _pruned_at = time.monotonic()
+    try:
+        prune_events()
+    except DatabaseError:
+        logger.exception('Не удалось очистить журнал событий решений')
+
+
+def publish_status(submission):
+    # Вызывается в транзакции смены статуса: строка журнала коммитится вместе
+    # с ней, до подписчиков её доносит EventRelay каждого веб-процесса.
+    SubmissionEvent.objects.create(
+        user_id=submission.user_id, submission_id=submission.id,
+        task_id=submission.task_id, status=submission.status,
+    )
+    transaction.on_commit(prune_expired)
+
+
+def format_sse(event):
+    data = {key: event[key] for key in ('id', 'task', 'status')}
+    return f'id: {event["event_id"]}\nevent: status\ndata: {json.dumps(data)}\n\n'
+
+
+@sync_to_async
+def load_events(user_id, after_id):
+    return [row_event(row)[1] for row in event_rows(SubmissionEvent.objects.filter(user_id=user_id, id__gt=after_id))]
+
+
+async def stream_status_events(user_id, last_event_id=None):
+    options = events_settings()
+    subscription = broker.subscribe(user_id, options['QUEUE_SIZE'])
+    try:
+        await sync_to_async(relay.ensure_started)()
+        yield f'retry: {options["RETRY_MS"]}\n\n'
+        if last_event_id is None:
+            # Новый поток получает только события, записанные после подключения.
+            last_id = await sync_to_async(latest_event_id)()
+        else:
+            last_id = last_event_id
+            for event in await load_events(user_id, last_event_id):
+                yield format_sse(event)
+                last_id = event['event_id']
+
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=options['KEEPALIVE'])
+            except TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+
+            events = [event]
+            if subscription.overflowed:
+                subscription.overflowed = False
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                events = await load_events(user_id, last_id)
+            for event in events:
+                if event['event_id'] > last_id:
+                    yield format_sse(event)
+                    last_id = event['event_id']
+    finally:
+        broker.unsubscribe(user_id, subscription)
@@ -0,0 +1,62 @@
+import csv
+import json
+import zlib
+
+EXPORT_FIELDS = (
+    'id', 'user_id', 'user__username', 'course_id', 'task_id', 'task__title',
+    'status', 'created_at', 'code_student',
+)
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def iter_rows(queryset):
+    # Код решения может лежать в CodeBlob — он приходит тем же запросом через JOIN.
+    rows = (
+        queryset.order_by('created_at', 'id')
+        .values(*EXPORT_FIELDS, 'code_blob__code')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for row in rows:
+        blob_code = row.pop('code_blob__code')
+        row['code_student'] = row['code_student'] or blob_code or ''
+        yield row
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row['created_at'] = row['created_at'].isoformat()
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        row['created_at'] = row['created_at'].isoformat()
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def iter_gzip(chunks, flush_every=64 * 1024):
+    compressor = zlib.compressobj(wbits=31)
+    pending = 0
+    for chunk in chunks:
+        data = chunk.encode()
+        pending += len(data)
+        out = compressor.compress(data)
+        if pending >= flush_every:
+            out += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
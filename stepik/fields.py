@@ -0,0 +1,87 @@
+import lzma
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+DEFAULT_COMPRESSED_TEXT = {
+    'ALGORITHM': 'zlib',
+    'THRESHOLD': 1024,
+    'LEVEL': 6,
+}
+
+# Первый байт значения в БД — способ хранения, поэтому смена настроек не
+# ломает чтение старых строк.
+RAW, ZLIB, LZMA = b'\x00', b'\x01', b'\x02'
+CODECS = {
+    'zlib': (ZLIB, lambda data, level: zlib.compress(data, level)),
+    'lzma': (LZMA, lambda data, level: lzma.compress(data, preset=level)),
+}
+
+
+def compressed_text_settings():
+    return {**DEFAULT_COMPRESSED_TEXT, **getattr(settings, 'COMPRESSED_TEXT', {})}
+
+
+def encode_text(value):
+    if value == '':
+        return b''
+    data = value.encode()
+    options = compressed_text_settings()
+    threshold = options['THRESHOLD']
+    if threshold is not None and len(data) >= threshold:
+        header, compress = CODECS[options['ALGORITHM']]
+        packed = compress(data, options['LEVEL'])
+        if len(packed) < len(data):
+            return header + packed
+    return RAW + data
+
+
+def decode_text(value):
+    value = bytes(value)
+    if not value:
+        return ''
+    header, data = value[:1], value[1:]
+    if header == ZLIB:
+        data = zlib.decompress(data)
+    elif header == LZMA:
+        data = lzma.decompress(data)
+    elif header != RAW:
+        raise ValueError(f'Unknown compressed text header: {header!r}')
+    return data.decode()
+
+
+class CompressedTextField(models.TextField):
+    # Текст в колонке BLOB; значения длиннее COMPRESSED_TEXT['THRESHOLD'] байт
+    # сжимаются. Для Python и DRF это обычный TextField. Поиск по подстроке
+    # (icontains и т. п.) по такой колонке не работает.
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, str):
+            # str — строка, ещё не переписанная миграцией 0011_compress_existing_text.
+            return value
+        return decode_text(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decode_text(value)
+        return super().to_python(value)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return None
+        return encode_text(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return None
+        return connection.Database.Binary(value)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
@@ -0,0 +1,87 @@
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def parse_field_tree(value):
+    # 'id,tasks.id,tasks.title' -> {'id': {}, 'tasks': {'id': {}, 'title': {}}}
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree or None
+
+
+class FieldSelection:
+    # ?fields= ограничивает поля ответа (вложенные — через точку), ?expand=
+    # разворачивает вложенный объект, запрошенный без подполей; иначе он
+    # отдаётся первичным ключом. Без ?fields= ответ остаётся полным.
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand or {}
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method != 'GET':
+            return cls()
+        return cls(
+            parse_field_tree(request.query_params.get('fields')),
+            parse_field_tree(request.query_params.get('expand')),
+        )
+
+    @property
+    def is_full(self):
+        return self.fields is None
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expanded(self, name):
+        return self.fields is None or bool(self.fields.get(name)) or name in self.expand
+
+    def nested(self, name):
+        fields = (self.fields.get(name) or None) if self.fields is not None else None
+        return FieldSelection(fields, self.expand.get(name))
+
+    def apply(self, serializer):
+        if self.fields is None:
+            return
+        for name, field in list(serializer.fields.items()):
+            if not self.includes(name):
+                serializer.fields.pop(name)
+                continue
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, serializers.BaseSerializer):
+                continue
+            if self.expanded(name):
+                self.nested(name).apply(nested)
+            else:
+                source = {'source': field.source} if field.source != name else {}
+                serializer.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=many, **source)
+
+    def defer_unselected(self, queryset, keep=()):
+        # Внешние ключи не откладываются: они нужны prefetch/select_related и PK-полям.
+        # keep — колонки, которые читает сама вьюха (например, курсор пагинации).
+        if self.fields is None:
+            return queryset
+        meta = queryset.model._meta
+        deferred = [
+            field.name for field in meta.concrete_fields
+            if not field.is_relation and field != meta.pk
+            and field.name not in self.fields and field.name not in keep
+        ]
+        return queryset.defer(*deferred) if deferred else queryset
+
+    def prefetch(self, name, queryset, fk, build=None):
+        # Prefetch для вложенного списка name; None, если он не запрошен.
+        if not self.includes(name):
+            return None
+        if not self.expanded(name):
+            return Prefetch(name, queryset=queryset.only(queryset.model._meta.pk.name, fk))
+        nested = self.nested(name)
+        queryset = nested.defer_unselected(queryset)
+        if build is not None:
+            queryset = build(queryset, nested)
+        return Prefetch(name, queryset=queryset)
@@ -0,0 +1,57 @@
+import datetime
+import uuid
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+SUBMISSION_STATUSES = ('pending', 'accepted', 'wrong')
+
+
+def parse_moment(value, end_of_day=False):
+    # parse_* возвращают None для неверного формата и бросают ValueError
+    # для несуществующей даты (2026-02-30): оба случая — ошибка клиента.
+    # Дата без времени проверяется первой: parse_datetime тоже принимает её
+    # (как полночь), и граница until обрезала бы весь день.
+    try:
+        day = parse_date(value)
+        moment = parse_datetime(value) if day is None else None
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        moment = datetime.datetime.combine(day, datetime.time.max if end_of_day else datetime.time.min)
+    elif moment is None:
+        raise ValidationError({'detail': f'❌ Неверная дата: {value}'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_submissions(queryset, params):
+    for field in ('course', 'task'):
+        value = params.get(field)
+        if value:
+            if not value.isdigit():
+                raise ValidationError({'detail': f'❌ Неверный параметр {field}'})
+            queryset = queryset.filter(**{f'{field}_id': value})
+
+    intake_key = params.get('intake_key')
+    if intake_key:
+        try:
+            queryset = queryset.filter(intake_key=uuid.UUID(intake_key))
+        except ValueError:
+            raise ValidationError({'detail': '❌ Неверный параметр intake_key'})
+
+    submission_status = params.get('status')
+    if submission_status:
+        if submission_status not in SUBMISSION_STATUSES:
+            raise ValidationError({'detail': '❌ Неверный статус'})
+        queryset = queryset.filter(status=submission_status)
+
+    since = params.get('since')
+    if since:
+        queryset = queryset.filter(created_at__gte=parse_moment(since))
+    until = params.get('until')
+    if until:
+        queryset = queryset.filter(created_at__lte=parse_moment(until, end_of_day=True))
+    return queryset
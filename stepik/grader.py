@@ -0,0 +1,416 @@
+import os
+import pwd
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import blobstore
+from .events import publish_status
+from .models import GradingJob, InputOutput, SubmissionTestResult, Task
+
+DEFAULT_GRADER = {
+    'WORKERS': None,
+    'TIME_LIMIT': 2,
+    'MEMORY_LIMIT_MB': 256,
+    'OUTPUT_LIMIT_KB': 64,
+    'POLL_INTERVAL': 1.0,
+    'PYTHON': sys.executable,
+    # Задание в состоянии running дольше LEASE_SECONDS считается брошенным
+    # упавшим воркером и возвращается в очередь.
+    'LEASE_SECONDS': 300,
+    # Сбой песочницы или инфраструктуры — не вердикт: задание возвращается
+    # в очередь, после MAX_ATTEMPTS попыток помечается failed.
+    'MAX_ATTEMPTS': 3,
+    # auto — bwrap, если установлен, иначе отдельный пользователь (нужен root);
+    # none — без изоляции, только для локальной разработки.
+    'SANDBOX': 'auto',
+    'SANDBOX_USER': 'nobody',
+    'SANDBOX_BINDS': ['/usr', '/bin', '/lib', '/lib64', '/etc/alternatives'],
+}
+
+SANDBOX_DIR = '/sandbox'
+READ_CHUNK = 64 * 1024
+# Коды выхода, с которыми обёртка сообщает о собственной ошибке (не смогла
+# запустить интерпретатор), а не о завершении решения.
+WRAPPER_FAILURES = {'unshare': (126, 127), 'bwrap': (1,)}
+
+
+class SandboxError(Exception):
+    pass
+
+
+def grader_settings():
+    return {**DEFAULT_GRADER, **getattr(settings, 'GRADER', {})}
+
+
+def find_graded_duplicate(submission):
+    # Проверенное решение той же задачи с тем же нормализованным кодом, если
+    # тесты задачи с тех пор не менялись.
+    if not submission.code_hash:
+        return None
+    jobs = (
+        GradingJob.objects.filter(
+            state='done',
+            submission__task_id=submission.task_id,
+            submission__code_hash=submission.code_hash,
+            submission__status__in=('accepted', 'wrong'),
+        )
+        .exclude(submission_id=submission.pk)
+        .select_related('submission')
+    )
+    tests_changed_at = Task.objects.filter(pk=submission.task_id).values_list('tests_changed_at', flat=True).first()
+    if tests_changed_at is not None:
+        jobs = jobs.filter(finished_at__gte=tests_changed_at)
+    return jobs.order_by('-finished_at').first()
+
+
+def reuse_verdict(submission, previous):
+    with transaction.atomic():
+        job = GradingJob.objects.create(
+            submission=submission, state='done', reused_from=previous, finished_at=timezone.now(),
+        )
+        SubmissionTestResult.objects.bulk_create([
+            SubmissionTestResult(submission=submission, **result)
+            for result in SubmissionTestResult.objects.filter(submission=previous).values(
+                'input_output_id', 'verdict', 'time_ms', 'stdout', 'stderr',
+            )
+        ])
+        if submission.status != previous.status:
+            submission.status = previous.status
+            submission.save(update_fields=['status'])
+            publish_status(submission)
+    return job
+
+
+def enqueue_submission(submission):
+    if not GradingJob.objects.filter(submission=submission).exists():
+        duplicate = find_graded_duplicate(submission)
+        if duplicate is not None:
+            return reuse_verdict(submission, duplicate.submission)
+    job, _ = GradingJob.objects.get_or_create(submission=submission)
+    return job
+
+
+def _normalize_output(text):
+    lines = text.replace('\r\n', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).rstrip('\n')
+
+
+def sandbox_mode(limits):
+    mode = limits['SANDBOX']
+    if mode == 'auto':
+        if shutil.which('bwrap'):
+            return 'bwrap'
+        if os.geteuid() == 0:
+            return 'user'
+        raise ImproperlyConfigured(
+            'Для проверки решений нужен bwrap или запуск от root (SANDBOX=user); '
+            'без изоляции — только явно GRADER["SANDBOX"] = "none"'
+        )
+    if mode not in ('bwrap', 'user', 'none'):
+        raise ImproperlyConfigured(f'Неизвестный режим песочницы: {mode}')
+    return mode
+
+
+def protected_paths():
+    paths = [settings.BASE_DIR, blobstore.test_storage_settings()['ROOT']]
+    for alias in connections:
+        name = str(connections.settings[alias]['NAME'])
+        paths += [name, f'{name}-wal', f'{name}-shm']
+    return paths
+
+
+def _probe_code(paths):
+    return f'import os\nfor path in {paths!r}:\n    if os.access(path, os.R_OK):\n        print(path)\n'
+
+
+def prepare_sandbox(limits):
+    # Режим определяется один раз при старте грейдера. Пробный запуск от имени
+    # песочницы: интерпретатор должен запускаться, а проект, БД и хранилище
+    # тестов — быть недоступны. Права на файлах проекта грейдер не меняет.
+    limits = {**limits, 'SANDBOX': sandbox_mode(limits)}
+    if limits['SANDBOX'] == 'none':
+        return limits
+    paths = [str(path) for path in protected_paths()]
+    try:
+        result = grade_code(_probe_code(paths), [(None, '', '')], limits)[0]
+    except SandboxError as exc:
+        raise ImproperlyConfigured(
+            f'Песочница {limits["SANDBOX"]} не может запустить {limits["PYTHON"]}: {exc}. '
+            'Укажите GRADER["PYTHON"], доступный пользователю песочницы'
+        ) from exc
+    if result['verdict'] == 'wrong':
+        raise ImproperlyConfigured(
+            f'Из песочницы {limits["SANDBOX"]} доступны для чтения: {", ".join(result["stdout"].split())}. '
+            'Снимите права для остальных пользователей или используйте bwrap'
+        )
+    if result['verdict'] != 'ok':
+        raise ImproperlyConfigured(
+            f'Пробный запуск в песочнице {limits["SANDBOX"]} завершился с ошибкой: {result["stderr"].strip()}'
+        )
+    return limits
+
+
+def _sandbox_user(limits):
+    entry = pwd.getpwnam(limits['SANDBOX_USER'])
+    if entry.pw_uid == 0:
+        raise ImproperlyConfigured('SANDBOX_USER не может быть root')
+    return entry.pw_uid, entry.pw_gid
+
+
+def _limit_resources(time_limit, memory_bytes, output_bytes, user=None):
+    def apply():
+        os.setsid()
+        resource.setrlimit(resource.RLIMIT_CPU, (time_limit, time_limit + 1))
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (output_bytes, output_bytes))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        if user is not None:
+            uid, gid = user
+            os.setgroups([])
+            os.setgid(gid)
+            os.setuid(uid)
+    return apply
+
+
+def _sandbox_command(code_path, workdir, limits):
+    python = limits['PYTHON']
+    mode = limits['SANDBOX']
+    if mode == 'bwrap':
+        # Пустой корень: видны только системные каталоги и интерпретатор (read-only)
+        # и рабочий каталог с решением; сеть, pid и ipc — в своих namespace.
+        python_root = os.path.dirname(os.path.dirname(os.path.realpath(python)))
+        binds = []
+        for path in [*limits['SANDBOX_BINDS'], python_root]:
+            if os.path.exists(path):
+                binds += ['--ro-bind', path, path]
+        return [
+            'bwrap', '--unshare-all', '--die-with-parent', '--new-session',
+            *binds, '--proc', '/proc', '--dev', '/dev', '--tmpfs', '/tmp',
+            '--bind', workdir, SANDBOX_DIR, '--chdir', SANDBOX_DIR,
+            '--', python, '-I', '-B', os.path.join(SANDBOX_DIR, os.path.basename(code_path)),
+        ]
+    command = [python, '-I', '-B', code_path]
+    if mode == 'user' and shutil.which('unshare'):
+        # Без сети: своё сетевое пространство имён без интерфейсов.
+        command = ['unshare', '--user', '--net', '--ipc', '--', *command]
+    return command
+
+
+def _kill(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _feed(stream, data):
+    try:
+        view = memoryview(data)
+        for start in range(0, len(view), READ_CHUNK):
+            stream.write(view[start:start + READ_CHUNK])
+    except OSError:
+        pass
+    finally:
+        try:
+            stream.close()
+        except OSError:
+            pass
+
+
+def _read_bounded(proc, stream, limit, sink):
+    # RLIMIT_FSIZE на pipe не действует: читаем порциями и убиваем процесс,
+    # как только вывод превысил лимит.
+    data = bytearray()
+    while chunk := os.read(stream.fileno(), READ_CHUNK):
+        if len(data) + len(chunk) > limit:
+            data += chunk[:limit - len(data)]
+            sink['overflow'] = True
+            _kill(proc)
+            break
+        data += chunk
+    stream.close()
+    sink['data'] = bytes(data)
+
+
+def _communicate(proc, input_data, output_limit, timeout):
+    stdout, stderr = {'data': b''}, {'data': b''}
+    threads = [
+        threading.Thread(target=_feed, args=(proc.stdin, input_data)),
+        threading.Thread(target=_read_bounded, args=(proc, proc.stdout, output_limit, stdout)),
+        threading.Thread(target=_read_bounded, args=(proc, proc.stderr, output_limit, stderr)),
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    timed_out = False
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        _kill(proc)
+        proc.wait()
+    for thread in threads:
+        thread.join()
+    return stdout, stderr, timed_out
+
+
+def run_test(code_path, workdir, input_data, expected, limits):
+    # input_data — байты или mmap файла теста: вход отдаётся в pipe без копии в памяти.
+    time_limit = int(limits['TIME_LIMIT'])
+    output_limit = int(limits['OUTPUT_LIMIT_KB']) * 1024
+    user = _sandbox_user(limits) if limits['SANDBOX'] == 'user' else None
+    command = _sandbox_command(code_path, workdir, limits)
+    started = time.monotonic()
+    try:
+        proc = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=workdir,
+            env={'PATH': os.defpath, 'PYTHONIOENCODING': 'utf-8'},
+            preexec_fn=_limit_resources(
+                time_limit, int(limits['MEMORY_LIMIT_MB']) * 1024 * 1024, output_limit, user
+            ),
+        )
+    except (OSError, subprocess.SubprocessError) as exc:
+        raise SandboxError(exc) from exc
+    stdout, stderr, timed_out = _communicate(proc, input_data, output_limit, time_limit * 2 + 1)
+    elapsed = int((time.monotonic() - started) * 1000)
+    output = stdout['data'].decode(errors='replace')
+    errors = stderr['data'].decode(errors='replace')
+
+    wrapper = command[0]
+    if proc.returncode in WRAPPER_FAILURES.get(wrapper, ()) and errors.startswith(f'{wrapper}: '):
+        raise SandboxError(errors.strip())
+
+    if stdout.get('overflow') or stderr.get('overflow'):
+        verdict = 'runtime_error'
+    elif timed_out or proc.returncode in (-9, -24):
+        verdict = 'timeout'
+    elif proc.returncode != 0:
+        verdict = 'runtime_error'
+    elif _normalize_output(output) == _normalize_output(expected):
+        verdict = 'ok'
+    else:
+        verdict = 'wrong'
+    return {'verdict': verdict, 'time_ms': elapsed, 'stdout': output, 'stderr': errors}
+
+
+def grade_code(code, tests, limits):
+    # Выполняется в процессе пула: без обращений к БД, только чистые данные.
+    results = []
+    limits = {**limits, 'SANDBOX': sandbox_mode(limits)}
+    with tempfile.TemporaryDirectory(prefix='stepik-grade-') as workdir:
+        code_path = os.path.join(workdir, 'solution.py')
+        with open(code_path, 'w', encoding='utf-8') as f:
+            f.write(code)
+        if limits['SANDBOX'] == 'user':
+            uid, gid = _sandbox_user(limits)
+            os.chown(workdir, uid, gid)
+            os.chown(code_path, uid, gid)
+        for test_id, input_source, output_source in tests:
+            with blobstore.open_source(input_source) as input_data, blobstore.open_source(output_source) as expected:
+                result = run_test(code_path, workdir, input_data, str(expected, 'utf-8'), limits)
+            result['input_output_id'] = test_id
+            results.append(result)
+    return results
+
+
+def claim_jobs(limit):
+    claimed = []
+    candidates = (
+        GradingJob.objects.filter(state='queued')
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:limit]
+    )
+    for pk in list(candidates):
+        now = timezone.now()
+        updated = GradingJob.objects.filter(pk=pk, state='queued').update(
+            state='running', started_at=now, heartbeat_at=now
+        )
+        if updated:
+            claimed.append(pk)
+    return claimed
+
+
+def renew_leases(job_ids):
+    return GradingJob.objects.filter(pk__in=job_ids, state='running').update(heartbeat_at=timezone.now())
+
+
+def requeue_stale_jobs(lease_seconds):
+    # Только задания, чья аренда истекла: живой грейдер продлевает аренду своих
+    # заданий, поэтому их не трогаем.
+    deadline = timezone.now() - timedelta(seconds=lease_seconds)
+    return GradingJob.objects.filter(state='running', heartbeat_at__lt=deadline).update(state='queued')
+
+
+def load_payload(job_id):
+    job = GradingJob.objects.select_related('submission', 'submission__code_blob').get(pk=job_id)
+    tests = [
+        (test.id, test.source('input'), test.source('output'))
+        for test in InputOutput.objects.filter(task_id=job.submission.task_id).order_by('id')
+    ]
+    return job, job.submission.code, tests
+
+
+def store_results(job, results):
+    submission = job.submission
+    with transaction.atomic():
+        SubmissionTestResult.objects.filter(submission=submission).delete()
+        SubmissionTestResult.objects.bulk_create([
+            SubmissionTestResult(submission=submission, **result) for result in results
+        ])
+        if results:
+            all_ok = all(result['verdict'] == 'ok' for result in results)
+            new_status = 'accepted' if all_ok else 'wrong'
+            if submission.status != new_status:
+                submission.status = new_status
+                submission.save(update_fields=['status'])
+                publish_status(submission)
+        job.state = 'done'
+        job.attempts += 1
+        job.error = ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=['state', 'attempts', 'error', 'finished_at'])
+
+
+def fail_job(job, error):
+    job.state = 'failed'
+    job.attempts += 1
+    job.error = str(error)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['state', 'attempts', 'error', 'finished_at'])
+
+
+def retry_job(job, error, max_attempts):
+    # Вердикт не записывается: решение остаётся в прежнем статусе, задание
+    # ждёт следующей попытки или помечается failed.
+    if job.attempts + 1 >= max_attempts:
+        fail_job(job, error)
+        return False
+    job.state = 'queued'
+    job.attempts += 1
+    job.error = str(error)
+    job.save(update_fields=['state', 'attempts', 'error'])
+    return True
+
+
+def fail_job_id(job_id, error):
+    # Для заданий, которые не удалось даже загрузить (например, решение удалено).
+    return GradingJob.objects.filter(pk=job_id).update(
+        state='failed', attempts=F('attempts') + 1, error=str(error), finished_at=timezone.now(),
+    )
@@ -0,0 +1,133 @@
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.db import transaction
+from rest_framework import serializers
+
+from . import cache, search
+from .models import InputOutput, Task
+from .utils import iter_chunks
+
+DEFAULT_CHUNK_SIZE = 200
+MAX_REPORTED_ERRORS = 100
+
+
+class TestCaseImportSerializer(serializers.Serializer):
+    input = serializers.CharField(allow_blank=True, trim_whitespace=False)
+    output = serializers.CharField(allow_blank=True, trim_whitespace=False)
+
+
+class TaskImportSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    order = serializers.IntegerField(min_value=0)
+    task_text = serializers.CharField(trim_whitespace=False)
+    tests = TestCaseImportSerializer(many=True, required=False, default=list)
+
+
+def iter_ndjson(stream, source='body'):
+    for line_no, raw in enumerate(stream, start=1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            yield f'{source}:{line_no}', json.loads(raw), None
+        except (ValueError, UnicodeDecodeError) as exc:
+            yield f'{source}:{line_no}', None, {'non_field_errors': [f'Некорректный JSON: {exc}']}
+
+
+def iter_zip(stream):
+    # zipfile требует seek: тело копируется во временный файл, а не в память.
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        shutil.copyfileobj(stream, spool)
+        spool.seek(0)
+        try:
+            archive = zipfile.ZipFile(spool)
+        except zipfile.BadZipFile:
+            yield 'archive', None, {'non_field_errors': ['Некорректный ZIP-архив']}
+            return
+        with archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    if info.filename.endswith(('.ndjson', '.jsonl')):
+                        yield from iter_ndjson(member, source=info.filename)
+                    elif info.filename.endswith('.json'):
+                        try:
+                            yield info.filename, json.load(member), None
+                        except (ValueError, UnicodeDecodeError) as exc:
+                            yield info.filename, None, {'non_field_errors': [f'Некорректный JSON: {exc}']}
+
+
+def spool_valid_rows(records, chunk_size, spool):
+    # Первый проход без транзакции: тело запроса читается и проверяется с
+    # темпом клиента, проверенные строки складываются во временный файл.
+    rows = failed_rows = 0
+    for chunk in iter_chunks(records, chunk_size):
+        for location, record, error in chunk:
+            rows += 1
+            if error is None:
+                serializer = TaskImportSerializer(data=record)
+                if serializer.is_valid():
+                    if not failed_rows:
+                        spool.write(json.dumps(serializer.validated_data, ensure_ascii=False) + '\n')
+                    continue
+                error = serializer.errors
+            failed_rows += 1
+            if failed_rows <= MAX_REPORTED_ERRORS:
+                yield {'event': 'error', 'row': location, 'errors': error}
+        yield {'event': 'progress', 'rows': rows, 'errors': failed_rows}
+    return rows, failed_rows
+
+
+def write_tasks(module, spool, chunk_size):
+    # Второй проход — короткая транзакция только с записью в БД: блокировка
+    # записи SQLite не держится, пока клиент досылает тело.
+    tasks_created = tests_created = 0
+    with transaction.atomic():
+        for lines in iter_chunks(spool, chunk_size):
+            valid = [json.loads(line) for line in lines]
+            tasks = Task.objects.bulk_create([
+                Task(module=module, title=data['title'], order=data['order'], task_text=data['task_text'])
+                for data in valid
+            ])
+            tests = [
+                InputOutput(task=task, input=test['input'], output=test['output'])
+                for task, data in zip(tasks, valid)
+                for test in data['tests']
+            ]
+            # bulk_create не вызывает save(): хеши и вынос больших тестов в файлы — здесь.
+            # Файлы от откатившегося импорта удаляет externalize_tests --prune.
+            for test in tests:
+                test.store_data()
+            tests = InputOutput.objects.bulk_create(tests, batch_size=chunk_size)
+            search.index_tasks(tasks, module.course_id)
+            tasks_created += len(tasks)
+            tests_created += len(tests)
+    return tasks_created, tests_created
+
+
+def import_tasks(module, records, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Генератор событий прогресса. Ничего не пишется, если хотя бы одна
+    # строка не прошла валидацию.
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as spool:
+        rows, failed_rows = yield from spool_valid_rows(records, chunk_size, spool)
+        if failed_rows:
+            yield {'event': 'failed', 'rows': rows, 'errors': failed_rows}
+            return
+
+        spool.seek(0)
+        tasks_created, tests_created = write_tasks(module, spool, chunk_size)
+
+    cache.invalidate_course(module.course_id, catalogue=False)
+    yield {'event': 'done', 'rows': rows, 'tasks': tasks_created, 'tests': tests_created}
+
+
+def iter_records(stream, content_type):
+    if stream is None:
+        return iter(())
+    if content_type in ('application/zip', 'application/x-zip-compressed'):
+        return iter_zip(stream)
+    return iter_ndjson(stream)
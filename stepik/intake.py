@@ -0,0 +1,311 @@
+import atexit
+import fcntl
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .grader import enqueue_submission
+from .models import Submission, Task
+from .utils import iter_chunks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUBMISSION_BATCHING = {
+    'ENABLED': False,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL_MS': 50,
+    'JOURNAL_DIR': None,
+    'FSYNC': True,
+    # Повторы пакета с удвоением паузы; после них решения пишутся по одному,
+    # а те, что не записались и так, уходят в rejected-<pid>.jsonl.
+    'RETRIES': 5,
+    'RETRY_BACKOFF_MS': 100,
+}
+
+
+def batching_settings():
+    options = {**DEFAULT_SUBMISSION_BATCHING, **getattr(settings, 'SUBMISSION_BATCHING', {})}
+    if options['JOURNAL_DIR'] is None:
+        options['JOURNAL_DIR'] = Path(settings.BASE_DIR) / 'intake_journal'
+    return options
+
+
+def receipt(entry):
+    # Ответ при пакетном приёме: решение уже в журнале, но id в БД появится
+    # после записи пакета — до тех пор его ищут по ?intake_key=.
+    return {
+        'intake_key': entry['key'],
+        'task': entry['task'],
+        'status': 'queued',
+        'created_at': entry['created_at'],
+        'message': '✅ Решение принято',
+    }
+
+
+def write_batch(entries):
+    # Одна транзакция на пакет. intake_key уникален, поэтому повтор записей из
+    # журнала после падения не создаёт дублей.
+    keys = [uuid.UUID(entry['key']) for entry in entries]
+    with transaction.atomic():
+        existing = set(Submission.objects.filter(intake_key__in=keys).values_list('intake_key', flat=True))
+        locations = {
+            pk: (module_id, course_id)
+            for pk, module_id, course_id in Task.objects.filter(pk__in={entry['task'] for entry in entries})
+            .values_list('pk', 'module_id', 'module__course_id')
+        }
+        users = set(get_user_model().objects.filter(
+            pk__in={entry['user'] for entry in entries},
+        ).values_list('pk', flat=True))
+
+        submissions = []
+        for key, entry in zip(keys, entries):
+            # Задачу или пользователя могли удалить, пока решение ждало записи.
+            if key in existing or entry['task'] not in locations or entry['user'] not in users:
+                continue
+            submission = Submission(
+                user_id=entry['user'], task_id=entry['task'], code_student=entry['code'],
+                intake_key=key, created_at=parse_datetime(entry['created_at']),
+            )
+            submission.module_id, submission.course_id = locations[entry['task']]
+            if submission.code_student:
+                submission.store_code()
+            submissions.append(submission)
+
+        Submission.objects.bulk_create(submissions)
+        for submission in submissions:
+            # bulk_create не вызывает save() и сигналы: прогресс и аналитика
+            # обновляются теми же обработчиками post_save, затем решение встаёт в очередь.
+            submission.loaded_status = submission.status
+            post_save.send(
+                sender=Submission, instance=submission, created=True,
+                update_fields=None, raw=False, using=connection.alias,
+            )
+            enqueue_submission(submission)
+    return submissions
+
+
+def iter_journal(path):
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                # Строка, недописанная при падении: ответ клиенту по ней не отправлялся.
+                break
+            yield json.loads(line)
+
+
+def recover_journals(directory=None, batch_size=None, rejected=False):
+    # Журналы процессов, которые уже не держат на них flock, дописываются в БД и
+    # удаляются. rejected=True — повторить и отклонённые решения.
+    options = batching_settings()
+    directory = Path(directory or options['JOURNAL_DIR'])
+    patterns = ['intake-*.jsonl', 'rejected-*.jsonl'] if rejected else ['intake-*.jsonl']
+    recovered = 0
+    for path in sorted(path for pattern in patterns for path in directory.glob(pattern)):
+        with open(path, 'rb') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            for chunk in iter_chunks(iter_journal(path), batch_size or options['BATCH_SIZE']):
+                recovered += len(write_batch(chunk))
+            path.unlink()
+    return recovered
+
+
+def recover_on_startup():
+    # Вызывается из server/asgi.py и server/wsgi.py: решения, принятые упавшим
+    # процессом, попадают в БД при старте, а не при первом пакетном запросе.
+    options = batching_settings()
+    if not options['ENABLED'] or not Path(options['JOURNAL_DIR']).is_dir():
+        return 0
+    try:
+        recovered = recover_journals(options['JOURNAL_DIR'])
+    except Exception:
+        logger.exception('Не удалось восстановить журналы пакетного приёма')
+        return 0
+    finally:
+        close_old_connections()
+    if recovered:
+        logger.warning('Восстановлено решений из журналов пакетного приёма: %d', recovered)
+    return recovered
+
+
+class IntakeJournal:
+    # Журнал процесса, только дозапись. Решение попадает в него (с fsync) до
+    # ответа клиенту; файл обнуляется, когда все принятые решения записаны в БД.
+
+    def __init__(self, directory, fsync=True):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f'intake-{os.getpid()}.jsonl'
+        self.rejected_path = directory / f'rejected-{os.getpid()}.jsonl'
+        self.fsync = fsync
+        self._file = open(self.path, 'ab')
+        fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def append(self, entry):
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode()
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._pending += 1
+
+    def reject(self, entry, error):
+        # Решение, которое не удалось записать: сохраняется для разбора и
+        # recover_intake_journal --rejected, а журнал может обнулиться.
+        line = (json.dumps({**entry, 'error': str(error)}, ensure_ascii=False) + '\n').encode()
+        with open(self.rejected_path, 'ab') as f:
+            f.write(line)
+            if self.fsync:
+                os.fsync(f.fileno())
+        self.committed(1)
+
+    def committed(self, count):
+        with self._lock:
+            self._pending -= count
+            if self._pending == 0:
+                self._file.truncate(0)
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+
+    @property
+    def pending(self):
+        with self._lock:
+            return self._pending
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            if self._pending == 0:
+                self.path.unlink(missing_ok=True)
+
+
+class SubmissionBatcher:
+    # Фоновый поток пишет решения пакетами: BATCH_SIZE строк или FLUSH_INTERVAL_MS
+    # с первого решения в пакете — что наступит раньше.
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.journal = None
+        self.stats = {'batches': 0, 'rows': 0, 'failed_batches': 0, 'rejected': 0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            options = batching_settings()
+            self.stats = {'batches': 0, 'rows': 0, 'failed_batches': 0, 'rejected': 0}
+            recover_journals(options['JOURNAL_DIR'])
+            self.journal = IntakeJournal(options['JOURNAL_DIR'], options['FSYNC'])
+            self._thread = threading.Thread(target=self._run, name='submission-intake-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def submit(self, user_id, task_id, code):
+        self.start()
+        entry = {
+            'key': str(uuid.uuid4()),
+            'user': user_id,
+            'task': task_id,
+            'code': code,
+            'created_at': timezone.now().isoformat(),
+        }
+        self.journal.append(entry)
+        self._queue.put(entry)
+        return entry
+
+    def _next_batch(self):
+        entry = self._queue.get()
+        if entry is None:
+            return None
+        options = batching_settings()
+        batch = [entry]
+        deadline = time.monotonic() + options['FLUSH_INTERVAL_MS'] / 1000
+        while len(batch) < options['BATCH_SIZE']:
+            try:
+                entry = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if entry is None:
+                # Остановка: текущий пакет дописывается, затем поток завершается.
+                self._queue.task_done()
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        try:
+            while (batch := self._next_batch()) is not None:
+                self._flush(batch)
+                for _ in batch:
+                    self._queue.task_done()
+            self._queue.task_done()
+        finally:
+            connection.close()
+
+    def _write(self, batch):
+        close_old_connections()
+        write_batch(batch)
+        self.stats['batches'] += 1
+        self.stats['rows'] += len(batch)
+        self.journal.committed(len(batch))
+
+    def _flush(self, batch):
+        # write_batch идемпотентен по intake_key, поэтому пакет можно повторять.
+        options = batching_settings()
+        delay = options['RETRY_BACKOFF_MS'] / 1000
+        for attempt in range(options['RETRIES'] + 1):
+            try:
+                self._write(batch)
+                return
+            except Exception:
+                self.stats['failed_batches'] += 1
+                logger.exception('Не удалось записать пакет из %d решений (попытка %d)', len(batch), attempt + 1)
+            if attempt < options['RETRIES']:
+                time.sleep(delay)
+                delay *= 2
+
+        # Пакет так и не записался: по одному, чтобы одна плохая запись не
+        # держала остальные; неудачные отклоняются явно.
+        for entry in batch:
+            try:
+                self._write([entry])
+            except Exception as exc:
+                self.stats['rejected'] += 1
+                logger.exception('Решение %s отклонено', entry['key'])
+                self.journal.reject(entry, exc)
+
+    def drain(self):
+        self._queue.join()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(None)
+            thread.join()
+            self.journal.close()
+            atexit.unregister(self.stop)
+
+
+batcher = SubmissionBatcher()
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from stepik.models import Submission, Task
+
+
+class Command(BaseCommand):
+    help = 'Заполняет Submission.module и Submission.course пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true', help='Пересчитать все строки, а не только пустые')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Submission.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(course__isnull=True)
+
+        task = Task.objects.filter(pk=OuterRef('task_id'))
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                total += Submission.objects.filter(pk__in=batch).update(
+                    module_id=Subquery(task.values('module_id')),
+                    course_id=Subquery(task.values('module__course_id')),
+                )
+            last_pk = batch[-1]
+            self.stdout.write(f'Обновлено {total} решений (до #{last_pk})')
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: {total} решений'))
@@ -0,0 +1,129 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from server.benchmarks import format_result, measure, throwaway_database
+from stepik.models import CodeBlob, Course, InputOutput, Module, Submission, Task
+from stepik.utils import iter_chunks
+
+User = get_user_model()
+
+COMPRESSED_FIELDS = (
+    (Task, ('task_text',)),
+    (InputOutput, ('input', 'output')),
+    (Submission, ('code_student',)),
+    (CodeBlob, ('code',)),
+)
+IDENTIFIERS = ['value', 'total', 'items', 'result', 'count', 'line', 'row', 'index', 'data', 'answer']
+
+
+def solution(rng):
+    lines = ['n = int(input())']
+    for _ in range(rng.randint(30, 150)):
+        name, other = rng.sample(IDENTIFIERS, 2)
+        lines.append(f'{name} = [{other} * {rng.randint(1, 99)} for {other} in range(n)]  # {rng.random():.6f}')
+    lines.append('print(sum(value))')
+    return '\n'.join(lines)
+
+
+def test_case(rng, size_kb):
+    numbers, length = [], 0
+    while length < size_kb * 1024:
+        number = str(rng.randint(0, 10 ** rng.randint(1, 6)))
+        numbers.append(number)
+        length += len(number) + 1
+    return '\n'.join(numbers)
+
+
+def database_size():
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        return pages * cursor.fetchone()[0]
+
+
+def rewrite_rows(batch_size=200):
+    # Перезапись текущими настройками COMPRESSED_TEXT — как в миграции 0011.
+    for model, fields in COMPRESSED_FIELDS:
+        pks = model.objects.order_by('pk').values_list('pk', flat=True)
+        for chunk in iter_chunks(pks.iterator(chunk_size=2000), batch_size):
+            with transaction.atomic():
+                model.objects.bulk_update(model.objects.filter(pk__in=chunk).only('pk', *fields), fields)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает размер БД и задержку списков без сжатия текстовых полей и со сжатием'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=20)
+        parser.add_argument('--tests', type=int, default=4, help='Тестов на задание')
+        parser.add_argument('--test-kb', type=int, default=256, help='Размер входа и выхода теста, КБ')
+        parser.add_argument('--submissions', type=int, default=2000)
+        parser.add_argument('--calls', type=int, default=30)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with throwaway_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+            user = User(username='bench', role='admin')
+            user.set_unusable_password()
+            user.save()
+            client = APIClient()
+            client.force_authenticate(user)
+
+            with override_settings(COMPRESSED_TEXT={'THRESHOLD': None}):
+                course = Course.objects.create(title='Bench', author=user)
+                module = Module.objects.create(course=course, title='Bench')
+                tasks = Task.objects.bulk_create([
+                    Task(module=module, title=f'Bench {i}', order=i, task_text=test_case(rng, 4))
+                    for i in range(options['tasks'])
+                ])
+                for task in tasks:
+                    InputOutput.objects.bulk_create([
+                        InputOutput(
+                            task=task, input=test_case(rng, options['test_kb']),
+                            output=test_case(rng, options['test_kb']),
+                        )
+                        for _ in range(options['tests'])
+                    ])
+                for chunk in iter_chunks(range(options['submissions']), 500):
+                    with transaction.atomic():
+                        for _ in chunk:
+                            Submission.objects.create(user=user, task=rng.choice(tasks), code_student=solution(rng))
+
+            def list_tasks(i):
+                response = client.get('/api/tasks/', {'module': module.id})
+                assert response.status_code == 200, response.content
+
+            def list_task_titles(i):
+                response = client.get('/api/tasks/', {'module': module.id, 'fields': 'id,title,order'})
+                assert response.status_code == 200, response.content
+
+            def list_submissions(i):
+                response = client.get('/api/submissions/', {'page': i % 10 + 1, 'page_size': 100})
+                assert response.status_code == 200, response.content
+
+            def export_submissions(i):
+                response = client.get('/api/submissions/export/', {'output': 'ndjson'})
+                b''.join(response.streaming_content)
+
+            benchmarks = [
+                ('tasks list (+tests)', list_tasks, options['calls']),
+                ('tasks list ?fields=', list_task_titles, options['calls']),
+                ('submissions list', list_submissions, options['calls']),
+                ('submissions export', export_submissions, max(options['calls'] // 10, 1)),
+            ]
+            for label, overrides in (('plain', {'THRESHOLD': None}), ('compressed', {})):
+                with override_settings(COMPRESSED_TEXT=overrides):
+                    rewrite_rows()
+                    self.stdout.write(f'{label}: размер БД {database_size() / 1024 / 1024:.1f} МБ')
+                    for name, func, calls in benchmarks:
+                        func(0)
+                        self.stdout.write(format_result(f'{label}: {name}', measure(func, calls)))
@@ -0,0 +1,62 @@
+import asyncio
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from server.benchmarks import ameasure, format_result, throwaway_database
+from stepik import intake
+from stepik.models import Course, Module, Submission, Task
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает приём решений через sync-вьюсет и async-вьюху под server.asgi'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with throwaway_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+            user = User(username='bench', role='mentor')
+            user.set_unusable_password()
+            user.save()
+            course = Course.objects.create(title='Bench', author=user)
+            module = Module.objects.create(course=course, title='Bench')
+            task = Task.objects.create(module=module, title='Bench', order=1, task_text='Bench')
+            token = str(AccessToken.for_user(user))
+
+            client = AsyncClient()
+            headers = {'Authorization': f'Bearer {token}'}
+            payload = {'task': task.id, 'code_student': 'print(input())'}
+
+            for name, url, batching in (
+                ('sync SubmissionViewSet', '/api/submissions/', False),
+                ('async submission_intake', '/api/submissions/intake/', False),
+                ('sync, batched', '/api/submissions/', True),
+                ('async, batched', '/api/submissions/intake/', True),
+            ):
+                async def submit(i):
+                    response = await client.post(url, payload, content_type='application/json', headers=headers)
+                    assert response.status_code == (202 if batching else 201), response.content
+
+                with tempfile.TemporaryDirectory(prefix='stepik-intake-') as journal_dir, override_settings(
+                    SUBMISSION_BATCHING={'ENABLED': batching, 'JOURNAL_DIR': journal_dir},
+                ):
+                    result = asyncio.run(ameasure(submit, options['calls'], options['concurrency']))
+                    self.stdout.write(format_result(name, result))
+                    if batching:
+                        started = time.perf_counter()
+                        intake.batcher.drain()
+                        self.stdout.write(
+                            f'  дозапись после ответов: {(time.perf_counter() - started) * 1000:.0f} ms, '
+                            f'пакетов: {intake.batcher.stats["batches"]}, строк: {intake.batcher.stats["rows"]}'
+                        )
+                        intake.batcher.stop()
+
+            self.stdout.write(f'Создано решений: {Submission.objects.count()}')
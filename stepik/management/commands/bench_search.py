@@ -0,0 +1,86 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.test import override_settings
+
+from server.benchmarks import format_result, measure, throwaway_database
+from stepik import search
+from stepik.models import Course, Module, Task
+
+User = get_user_model()
+
+LETTERS = 'абвгдежзиклмнопрстуфхцчшэюя'
+
+
+def words(rng, count):
+    return [''.join(rng.choices(LETTERS, k=rng.randint(5, 9))) for _ in range(count)]
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает поиск title__icontains с FTS5 и индексом в памяти'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Число заданий (курсов — в 10 раз меньше)')
+        parser.add_argument('--calls', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = words(rng, 20000)
+        rows = options['rows']
+
+        with throwaway_database():
+            author = User(username='bench', role='mentor')
+            author.set_unusable_password()
+            author.save()
+
+            courses = Course.objects.bulk_create([
+                Course(title=' '.join(rng.sample(vocabulary, 4)), author=author) for _ in range(max(rows // 10, 1))
+            ], batch_size=2000)
+            modules = Module.objects.bulk_create([
+                Module(course=course, title=' '.join(rng.sample(vocabulary, 3))) for course in courses
+            ], batch_size=2000)
+            Task.objects.bulk_create([
+                Task(
+                    module=modules[i % len(modules)],
+                    title=' '.join(rng.sample(vocabulary, 4)),
+                    order=i,
+                    task_text=' '.join(rng.choices(vocabulary, k=40)),
+                )
+                for i in range(rows)
+            ], batch_size=2000)
+            self.stdout.write(f'Индексировано документов: {search.rebuild()}')
+
+            queries = rng.sample(vocabulary, 50)
+            catalogue = Course.objects.filter(is_active=True).order_by('-created_at', '-id')
+
+            def icontains_courses(i):
+                queryset = catalogue.filter(title__icontains=queries[i % len(queries)])
+                queryset.count()
+                list(queryset[:10])
+
+            def fts_courses(i):
+                queryset = search.filter_courses(catalogue, queries[i % len(queries)])
+                queryset.count()
+                list(queryset[:10])
+
+            def icontains_tasks(i):
+                query = queries[i % len(queries)]
+                list(Task.objects.filter(Q(title__icontains=query) | Q(task_text__icontains=query))[:20])
+
+            def search_all(i):
+                search.search(queries[i % len(queries)], limit=20)
+
+            benchmarks = [
+                ('courses: icontains', icontains_courses, {}),
+                ('courses: fts5', fts_courses, {}),
+                ('tasks: icontains', icontains_tasks, {}),
+                ('all: fts5 ranked', search_all, {}),
+                ('all: python ranked', search_all, {'BACKEND': 'python'}),
+            ]
+            for name, func, overrides in benchmarks:
+                with override_settings(SEARCH=overrides):
+                    func(0)
+                    self.stdout.write(format_result(name, measure(func, options['calls'])))
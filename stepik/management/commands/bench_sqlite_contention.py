@@ -0,0 +1,144 @@
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from server.benchmarks import throwaway_database
+from server.database import sqlite_databases
+from stepik.models import Course, Module, Task
+
+User = get_user_model()
+
+# Исходная конфигурация: журнал отката, отложенные транзакции, соединение на запрос.
+BASELINE = {
+    'PRAGMAS': {'journal_mode': 'delete', 'synchronous': 'full'},
+    'TRANSACTION_MODE': None,
+    'CONN_MAX_AGE': 0,
+    'READ_ALIAS': None,
+}
+
+
+def configure(databases):
+    for alias, options in databases.items():
+        settings_dict = connections[alias].settings_dict
+        connections[alias].close()
+        for key in ('OPTIONS', 'PRAGMAS', 'CONN_MAX_AGE'):
+            settings_dict[key] = options[key]
+
+
+def percentile(latencies, share):
+    return round(latencies[max(int(len(latencies) * share) - 1, 0)] * 1000, 1)
+
+
+class Command(BaseCommand):
+    help = 'Нагружает SQLite параллельными записями и чтениями через API до и после настройки WAL/PRAGMA'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--calls', type=int, default=100, help='Запросов на поток')
+
+    def handle(self, *args, **options):
+        profiles = [
+            ('baseline', sqlite_databases(None, BASELINE), None),
+            ('tuned', sqlite_databases(None, settings.SQLITE), settings.DATABASE_READ_ALIAS),
+        ]
+        originals = {alias: {key: connections[alias].settings_dict.get(key) for key in ('OPTIONS', 'PRAGMAS', 'CONN_MAX_AGE')}
+                     for alias in connections}
+        # Ошибки блокировки в baseline ожидаемы — их трассировки не печатаются.
+        request_logger = logging.getLogger('django.request')
+        request_logger.disabled = True
+        try:
+            for name, databases, read_alias in profiles:
+                configure({DEFAULT_DB_ALIAS: databases['default'], **{
+                    alias: databases.get(alias, databases['default']) for alias in connections if alias != DEFAULT_DB_ALIAS
+                }})
+                with tempfile.TemporaryDirectory(prefix='stepik-bench-') as directory, \
+                        throwaway_database(os.path.join(directory, 'bench.sqlite3')), \
+                        override_settings(ALLOWED_HOSTS=['testserver'], DATABASE_READ_ALIAS=read_alias):
+                    self.report(name, self.run_profile(options))
+        finally:
+            request_logger.disabled = False
+            configure(originals)
+
+    def run_profile(self, options):
+        mentor = User.objects.create_user(username='bench-mentor', password=None, role='mentor')
+        course = Course.objects.create(title='Bench', author=mentor)
+        module = Module.objects.create(course=course, title='Bench')
+        tasks = Task.objects.bulk_create([
+            Task(module=module, title=f'Bench {i}', order=i, task_text='Bench') for i in range(20)
+        ])
+        students = [
+            User.objects.create_user(username=f'bench-{i}', password=None)
+            for i in range(max(options['writers'], options['readers']))
+        ]
+        connections.close_all()
+
+        results = {'write': [], 'read': [], 'locked': 0, 'failed': 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(options['writers'] + options['readers'])
+
+        def worker(kind, index):
+            client = APIClient()
+            client.force_authenticate(students[index] if kind == 'write' else mentor)
+            latencies, locked, failed = [], 0, 0
+            barrier.wait()
+            for i in range(options['calls']):
+                started = time.perf_counter()
+                try:
+                    if kind == 'write':
+                        response = client.post('/api/submissions/', {
+                            'task': tasks[(index + i) % len(tasks)].id, 'code_student': f'print({index}, {i})',
+                        }, format='json')
+                    elif i % 2:
+                        response = client.get(f'/api/courses/{course.id}/leaderboard/')
+                    else:
+                        response = client.get('/api/submissions/', {'course': course.id, 'page_size': 20})
+                    if response.status_code >= 400:
+                        failed += 1
+                        continue
+                except OperationalError:
+                    locked += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+            connections.close_all()
+            with lock:
+                results[kind] += latencies
+                results['locked'] += locked
+                results['failed'] += failed
+
+        threads = [
+            threading.Thread(target=worker, args=('write', i)) for i in range(options['writers'])
+        ] + [
+            threading.Thread(target=worker, args=('read', i)) for i in range(options['readers'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results['elapsed'] = time.perf_counter() - started
+        return results
+
+    def report(self, name, results):
+        self.stdout.write(f'{name}: {results["elapsed"]:.1f} с, ошибок "database is locked": {results["locked"]}, '
+                          f'прочих ошибок: {results["failed"]}')
+        for kind in ('write', 'read'):
+            latencies = sorted(results[kind])
+            if not latencies:
+                self.stdout.write(f'  {kind}: нет успешных запросов')
+                continue
+            self.stdout.write(
+                f'  {kind:<5} {len(latencies) / results["elapsed"]:>8.1f} req/s  '
+                f'p50 {round(statistics.median(latencies) * 1000, 1):>8} ms  '
+                f'p95 {percentile(latencies, 0.95):>8} ms  max {round(latencies[-1] * 1000, 1):>8} ms'
+            )
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from stepik.codehash import code_hash, content_digest
+from stepik.models import CodeBlob, Submission
+
+
+class Command(BaseCommand):
+    help = 'Заполняет Submission.code_hash и переносит код решений в CodeBlob пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--prune', action='store_true', help='Удалить CodeBlob без решений')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        move_code = getattr(settings, 'SUBMISSION_CODE_DEDUP', True)
+        queryset = Submission.objects.exclude(code_student='') if move_code else Submission.objects.filter(code_hash='')
+
+        last_pk = 0
+        total = 0
+        stored_bytes = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk).order_by('pk').only('pk', 'code_student')[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                blobs = {}
+                for submission in batch:
+                    code = submission.code_student
+                    submission.code_hash = code_hash(code)
+                    if move_code:
+                        submission.code_blob_id = content_digest(code)
+                        blobs.setdefault(submission.code_blob_id, code)
+                        submission.code_student = ''
+                        stored_bytes += len(code.encode())
+                new_digests = set(blobs) - set(
+                    CodeBlob.objects.filter(digest__in=blobs).values_list('digest', flat=True)
+                )
+                CodeBlob.objects.bulk_create(
+                    [CodeBlob(digest=digest, code=blobs[digest]) for digest in new_digests], batch_size=500,
+                )
+                Submission.objects.bulk_update(batch, ['code_hash', 'code_blob', 'code_student'], batch_size=500)
+            total += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Обработано {total} решений (до #{last_pk})')
+
+        if options['prune']:
+            pruned, _ = CodeBlob.objects.filter(submissions__isnull=True).delete()
+            self.stdout.write(f'Удалено {pruned} неиспользуемых блобов')
+
+        blobs = CodeBlob.objects.count()
+        with_blob = Submission.objects.filter(code_blob__isnull=False).count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {total} решений, перенесено {stored_bytes} байт кода; '
+            f'{with_blob} решений ссылаются на {blobs} уникальных тел'
+        ))
@@ -0,0 +1,88 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from stepik import progress
+from stepik.models import Enrollment, InputOutput, Module, Task
+from stepik.views import (
+    CourseViewSet, EnrollmentListView, ModuleViewSet, SubmissionViewSet,
+    TaskViewSet, UserCourseListView,
+)
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING (COVERING )?INDEX)')
+
+factory = APIRequestFactory()
+
+
+def view_queryset(view_class, user, action='list', params=None):
+    request = Request(factory.get('/', params or {}))
+    request.user = user
+    view = view_class(request=request, action=action, kwargs={}, format_kwarg=None)
+    return view.get_queryset()
+
+
+def keyset_page(queryset, page_size=10):
+    return queryset.order_by('-created_at', '-id')[:page_size + 1]
+
+
+class Command(BaseCommand):
+    help = 'Выполняет EXPLAIN QUERY PLAN для запросов вьюсетов и падает, если горячий путь делает полный скан'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Печатать план каждого запроса')
+
+    def hot_paths(self):
+        anonymous = AnonymousUser()
+        student = User(pk=1, username='student', role='student')
+        mentor = User(pk=2, username='mentor', role='mentor')
+        admin = User(pk=3, username='admin', role='admin')
+        ids = [1, 2, 3]
+
+        return [
+            ('courses: list', view_queryset(CourseViewSet, anonymous)[:10]),
+            ('courses: list by author', view_queryset(CourseViewSet, anonymous, params={'author': 2})[:10]),
+            ('courses: keyset page', keyset_page(view_queryset(CourseViewSet, anonymous))),
+            ('courses: retrieve', view_queryset(CourseViewSet, anonymous, action='retrieve').filter(pk=1)),
+            ('courses: retrieve modules', Module.objects.filter(course_id__in=ids)),
+            ('courses: retrieve tasks', Task.objects.with_submission_count().filter(module_id__in=ids)),
+            ('courses: retrieve tests', InputOutput.objects.filter(task_id__in=ids)),
+            ('courses: retrieve enrollments', Enrollment.objects.select_related('user').filter(course_id__in=ids)),
+            ('courses: leaderboard', progress.leaderboard(1)[:10]),
+            ('modules: list by course', view_queryset(ModuleViewSet, anonymous, params={'course': 1})),
+            ('tasks: list by module', view_queryset(TaskViewSet, anonymous, params={'module': 1})),
+            ('submissions: student keyset page', keyset_page(view_queryset(SubmissionViewSet, student))),
+            ('submissions: mentor keyset page', keyset_page(view_queryset(SubmissionViewSet, mentor))),
+            ('submissions: admin keyset page', keyset_page(view_queryset(SubmissionViewSet, admin))),
+            ('submissions: by task and status', view_queryset(SubmissionViewSet, admin).filter(task_id=1, status='pending')),
+            ('enrollments: mine', view_queryset(EnrollmentListView, student)),
+            ('my-courses', view_queryset(UserCourseListView, student)),
+        ]
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда рассчитана на SQLite (EXPLAIN QUERY PLAN)')
+
+        offenders = []
+        for name, queryset in self.hot_paths():
+            plan = queryset.explain()
+            scans = [
+                match.group(1) for line in plan.splitlines()
+                for match in [FULL_SCAN.search(line)] if match
+            ]
+            if scans:
+                offenders.append(name)
+                self.stdout.write(self.style.ERROR(f'✗ {name}: полный скан {", ".join(scans)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}'))
+            if scans or options['verbose_plans']:
+                self.stdout.write(plan)
+
+        if offenders:
+            raise CommandError(f'Полный скан таблицы на горячих путях: {", ".join(offenders)}')
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from stepik import blobstore
+from stepik.models import InputOutput
+
+
+class Command(BaseCommand):
+    help = 'Переносит большие тесты из БД в файловое хранилище TEST_STORAGE пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--threshold', type=int, default=None, help='Порог в байтах (по умолчанию из настроек)')
+        parser.add_argument('--prune', action='store_true', help='Удалить файлы, на которые не ссылается ни один тест')
+
+    def handle(self, *args, **options):
+        threshold = options['threshold']
+        if threshold is None:
+            threshold = blobstore.test_storage_settings()['THRESHOLD']
+        fields = [
+            'input', 'output', 'input_hash', 'input_size', 'input_external',
+            'output_hash', 'output_size', 'output_external',
+        ]
+
+        last_pk = 0
+        moved = moved_bytes = 0
+        while True:
+            batch = list(InputOutput.objects.filter(pk__gt=last_pk).order_by('pk')[:options['batch_size']])
+            if not batch:
+                break
+            changed = []
+            for test in batch:
+                inline = [part for part in InputOutput.PARTS if not test.is_external(part)]
+                test.store_data(threshold)
+                externalized = [part for part in inline if test.is_external(part)]
+                if externalized:
+                    moved += len(externalized)
+                    moved_bytes += sum(getattr(test, f'{part}_size') for part in externalized)
+                changed.append(test)
+            with transaction.atomic():
+                InputOutput.objects.bulk_update(changed, fields)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Обработано тестов до #{last_pk}: вынесено {moved} тел')
+
+        if options['prune']:
+            referenced = set()
+            for input_hash, output_hash in InputOutput.objects.values_list('input_hash', 'output_hash').iterator():
+                referenced.update((input_hash, output_hash))
+            self.stdout.write(f'Удалено неиспользуемых файлов: {blobstore.prune(referenced)}')
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: вынесено {moved} тел, {moved_bytes} байт'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from stepik import analytics
+from stepik.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает дневные срезы и гистограмму попыток (после rebuild_progress)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', help='Только указанные курсы')
+        parser.add_argument('--batch-size', type=int, default=200, help='Задач в одном агрегирующем запросе')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.order_by('pk').values_list('pk', flat=True)
+        if options['course']:
+            courses = courses.filter(pk__in=options['course'])
+
+        total = 0
+        for course_id in courses:
+            rows = analytics.rebuild_course(course_id, batch_size=options['batch_size'])
+            total += rows
+            self.stdout.write(f'Курс #{course_id}: {rows} дневных срезов')
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: {total} дневных срезов'))
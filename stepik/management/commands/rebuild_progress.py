@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from stepik import progress
+from stepik.models import Course, Submission
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает TaskProgress/CourseProgress из решений (по курсу за транзакцию)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', help='Только указанные курсы')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.order_by('pk').values_list('pk', flat=True)
+        if options['course']:
+            courses = courses.filter(pk__in=options['course'])
+
+        missing = Submission.objects.filter(course__isnull=True).count()
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f'{missing} решений без course — сначала запустите backfill_submission_course'
+            ))
+
+        total = 0
+        for course_id in courses:
+            rows = progress.rebuild_course(course_id)
+            total += rows
+            self.stdout.write(f'Курс #{course_id}: {rows} студентов')
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: {total} записей прогресса'))
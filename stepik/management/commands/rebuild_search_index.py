@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from stepik import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс курсов, модулей и заданий'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = search.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Готово: {total} документов ({search.get_backend().name})'))
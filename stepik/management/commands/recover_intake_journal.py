@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from stepik import intake
+
+
+class Command(BaseCommand):
+    help = 'Дописывает в БД решения из журналов пакетного приёма завершившихся процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journal-dir', default=None, help='Каталог журналов (по умолчанию из настроек)')
+        parser.add_argument('--rejected', action='store_true', help='Повторить и отклонённые решения (rejected-*.jsonl)')
+
+    def handle(self, *args, **options):
+        recovered = intake.recover_journals(options['journal_dir'], rejected=options['rejected'])
+        self.stdout.write(self.style.SUCCESS(f'Готово: восстановлено {recovered} решений'))
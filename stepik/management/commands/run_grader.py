@@ -0,0 +1,65 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from stepik import grader
+
+
+class Command(BaseCommand):
+    help = 'Запускает проверку решений из очереди GradingJob в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--once', action='store_true', help='Проверить текущую очередь и завершиться')
+
+    def handle(self, *args, **options):
+        limits = grader.prepare_sandbox(grader.grader_settings())
+        self.stdout.write(f'Песочница: {limits["SANDBOX"]}')
+        workers = options['workers'] or limits['WORKERS'] or os.cpu_count()
+        # Аренда продлевается и брошенные задания возвращаются в очередь
+        # несколько раз за LEASE_SECONDS, пока грейдер работает.
+        lease_interval = limits['LEASE_SECONDS'] / 3
+        next_lease_check = 0
+
+        in_flight = {}
+        capacity = workers * 2
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                close_old_connections()
+                if time.monotonic() >= next_lease_check:
+                    next_lease_check = time.monotonic() + lease_interval
+                    grader.renew_leases([job.pk for job in in_flight.values()])
+                    requeued = grader.requeue_stale_jobs(limits['LEASE_SECONDS'])
+                    if requeued:
+                        self.stdout.write(f'Возвращено в очередь зависших заданий: {requeued}')
+                free = capacity - len(in_flight)
+                if free > 0:
+                    for job_id in grader.claim_jobs(free):
+                        try:
+                            job, code, tests = grader.load_payload(job_id)
+                        except Exception as exc:
+                            grader.fail_job_id(job_id, exc)
+                            self.stderr.write(f'Задание #{job_id}: не удалось загрузить ({exc})')
+                            continue
+                        future = executor.submit(grader.grade_code, code, tests, limits)
+                        in_flight[future] = job
+
+                if not in_flight:
+                    if options['once']:
+                        break
+                    time.sleep(limits['POLL_INTERVAL'])
+                    continue
+
+                done, _ = wait(in_flight, timeout=limits['POLL_INTERVAL'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    try:
+                        grader.store_results(job, future.result())
+                        self.stdout.write(f'Решение #{job.submission_id}: {job.submission.status}')
+                    except Exception as exc:
+                        retried = grader.retry_job(job, exc, limits['MAX_ATTEMPTS'])
+                        outcome = 'задание возвращено в очередь' if retried else 'попытки исчерпаны'
+                        self.stderr.write(f'Решение #{job.submission_id}: ошибка проверки ({exc}), {outcome}')
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionTestResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verdict', models.CharField(choices=[('ok', 'OK'), ('wrong', 'Wrong Answer'), ('timeout', 'Time Limit Exceeded'), ('runtime_error', 'Runtime Error')], max_length=20)),
+                ('time_ms', models.PositiveIntegerField(default=0)),
+                ('stdout', models.TextField(blank=True)),
+                ('stderr', models.TextField(blank=True)),
+                ('input_output', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='stepik.inputoutput')),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_results', to='stepik.submission')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GradingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='grading_job', to='stepik.submission')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'created_at'], name='stepik_grad_state_dad570_idx')],
+            },
+        ),
+    ]
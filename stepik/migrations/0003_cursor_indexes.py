@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0002_grading'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='stepik_cour_is_acti_e33806_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['created_at', 'id'], name='stepik_subm_created_06455f_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0003_cursor_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='course',
+            name='stepik_cour_is_acti_e33806_idx',
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='stepik_course_active_created'),
+        ),
+        migrations.AddIndex(
+            model_name='module',
+            index=models.Index(fields=['course', 'is_active'], name='stepik_modu_course__2a1e8b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='stepik_subm_user_id_64e007_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['task', 'status'], name='stepik_subm_task_id_c241ce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['module', 'order'], name='stepik_task_module__6230ff_idx'),
+        ),
+    ]
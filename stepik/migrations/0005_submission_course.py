@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0004_access_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='course',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='stepik.course'),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='module',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='stepik.module'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['course', 'created_at', 'id'], name='stepik_subm_course__b9659e_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0005_submission_course'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('solved_tasks', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_solved_at', models.DateTimeField(blank=True, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='stepik.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', '-solved_tasks', 'last_solved_at'], name='stepik_courseprogress_rank')],
+                'constraints': [models.UniqueConstraint(fields=('course', 'user'), name='stepik_courseprogress_course_user')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('first_accepted_at', models.DateTimeField(blank=True, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_progress', to='stepik.course')),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_progress', to='stepik.module')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='stepik.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'user'], name='stepik_task_course__aecf30_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'task'), name='stepik_taskprogress_user_task')],
+            },
+        ),
+    ]
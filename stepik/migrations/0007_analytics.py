@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0006_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskprogress',
+            name='attempts_to_solve',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='TaskDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('submissions', models.PositiveIntegerField(default=0)),
+                ('accepted', models.PositiveIntegerField(default=0)),
+                ('wrong', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='stepik.course')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='stepik.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'day'], name='stepik_task_course__df2e6a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('task', 'day'), name='stepik_taskdailystats_task_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskSolveHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField()),
+                ('solvers', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solve_histogram', to='stepik.course')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solve_histogram', to='stepik.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'task'], name='stepik_task_course__8ed5da_idx')],
+                'constraints': [models.UniqueConstraint(fields=('task', 'attempts'), name='stepik_tasksolvehistogram_task_attempts')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'stepik_search'
+
+
+def create_search_index(apps, schema_editor):
+    # Без FTS5 (или не на SQLite) таблица не создаётся — stepik.search
+    # переключается на индекс в памяти.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "title, body, kind UNINDEXED, object_id UNINDEXED, course_id UNINDEXED, module_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+    except OperationalError:
+        return
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, body, kind, object_id, course_id, module_id) "
+        "SELECT id * 4 + 1, title, '', 1, id, id, NULL FROM stepik_course"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, body, kind, object_id, course_id, module_id) "
+        "SELECT id * 4 + 2, title, '', 2, id, course_id, id FROM stepik_module"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, body, kind, object_id, course_id, module_id) "
+        "SELECT t.id * 4 + 3, t.title, t.task_text, 3, t.id, m.course_id, t.module_id "
+        "FROM stepik_task t JOIN stepik_module m ON m.id = t.module_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0007_analytics'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
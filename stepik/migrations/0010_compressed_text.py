@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:45
+
+import stepik.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0009_code_dedup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='codeblob',
+            name='code',
+            field=stepik.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='inputoutput',
+            name='input',
+            field=stepik.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='inputoutput',
+            name='output',
+            field=stepik.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='code_student',
+            field=stepik.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='task_text',
+            field=stepik.fields.CompressedTextField(),
+        ),
+    ]
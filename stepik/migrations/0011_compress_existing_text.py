@@ -0,0 +1,54 @@
+from django.db import migrations, models, transaction
+from django.db.models import Value
+
+COMPRESSED_FIELDS = (
+    ('Task', ('task_text',)),
+    ('InputOutput', ('input', 'output')),
+    ('Submission', ('code_student',)),
+    ('CodeBlob', ('code',)),
+)
+BATCH_SIZE = 500
+
+
+def iter_batches(model, fields):
+    last_pk = None
+    queryset = model.objects.order_by('pk').only('pk', *fields)
+    while True:
+        batch = list((queryset if last_pk is None else queryset.filter(pk__gt=last_pk))[:BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def compress_rows(apps, schema_editor):
+    # После AlterField строки остаются TEXT; bulk_update перезаписывает их
+    # через CompressedTextField. Каждая пачка — своя транзакция.
+    for model_name, fields in COMPRESSED_FIELDS:
+        model = apps.get_model('stepik', model_name)
+        for batch in iter_batches(model, fields):
+            with transaction.atomic():
+                model.objects.bulk_update(batch, fields)
+
+
+def decompress_rows(apps, schema_editor):
+    for model_name, fields in COMPRESSED_FIELDS:
+        model = apps.get_model('stepik', model_name)
+        for batch in iter_batches(model, fields):
+            with transaction.atomic():
+                for row in batch:
+                    model.objects.filter(pk=row.pk).update(**{
+                        field: Value(getattr(row, field), output_field=models.TextField()) for field in fields
+                    })
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('stepik', '0010_compressed_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(compress_rows, decompress_rows),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:51
+
+import hashlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def fill_hashes(apps, schema_editor):
+    # Тела остаются в БД; вынос больших тестов в файлы — команда externalize_tests.
+    InputOutput = apps.get_model('stepik', 'InputOutput')
+    last_pk = 0
+    while True:
+        batch = list(InputOutput.objects.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            return
+        for test in batch:
+            for part in ('input', 'output'):
+                data = getattr(test, part).encode()
+                setattr(test, f'{part}_hash', hashlib.sha256(data).hexdigest())
+                setattr(test, f'{part}_size', len(data))
+        InputOutput.objects.bulk_update(batch, ['input_hash', 'input_size', 'output_hash', 'output_size'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0011_compress_existing_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inputoutput',
+            name='input_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='inputoutput',
+            name='input_size',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='inputoutput',
+            name='output_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='inputoutput',
+            name='output_size',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_hashes, migrations.RunPython.noop),
+    ]
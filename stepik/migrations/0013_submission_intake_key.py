@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0012_test_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='intake_key',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
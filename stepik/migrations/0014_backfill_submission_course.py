@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:10
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 1000
+
+
+def backfill_course(apps, schema_editor):
+    # Выборка решений наставника идёт по Submission.course: старые строки без
+    # курса иначе пропали бы из его списка.
+    Submission = apps.get_model('stepik', 'Submission')
+    Task = apps.get_model('stepik', 'Task')
+    task = Task.objects.filter(pk=OuterRef('task_id'))
+    last_pk = 0
+    while True:
+        batch = list(
+            Submission.objects.filter(course__isnull=True, pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        Submission.objects.filter(pk__in=batch).update(
+            module_id=Subquery(task.values('module_id')),
+            course_id=Subquery(task.values('module__course_id')),
+        )
+        last_pk = batch[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0013_submission_intake_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_course, migrations.RunPython.noop),
+    ]
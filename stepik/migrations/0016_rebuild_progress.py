@@ -0,0 +1,69 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:31
+
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import migrations
+from django.db.models import Count, Max, Q, Sum
+
+
+def rebuild_progress(apps, schema_editor):
+    # Счётчики прогресса ведутся инкрементально, поэтому для решений, созданных
+    # до появления таблиц, они собираются здесь один раз (как rebuild_progress).
+    Submission = apps.get_model('stepik', 'Submission')
+    TaskProgress = apps.get_model('stepik', 'TaskProgress')
+    CourseProgress = apps.get_model('stepik', 'CourseProgress')
+
+    TaskProgress.objects.all().delete()
+    CourseProgress.objects.all().delete()
+    submissions = (
+        Submission.objects.filter(course__isnull=False)
+        .order_by('user_id', 'task_id', 'created_at', 'id')
+        .values_list('user_id', 'task_id', 'module_id', 'course_id', 'status', 'created_at')
+        .iterator(chunk_size=2000)
+    )
+    rows = []
+    for (user_id, task_id), attempts in groupby(submissions, key=itemgetter(0, 1)):
+        row = TaskProgress(user_id=user_id, task_id=task_id, attempts=0)
+        for _, _, module_id, course_id, status, created_at in attempts:
+            row.module_id, row.course_id = module_id, course_id
+            row.attempts += 1
+            if status == 'accepted' and row.first_accepted_at is None:
+                row.first_accepted_at = created_at
+                row.attempts_to_solve = row.attempts
+        rows.append(row)
+        if len(rows) >= 1000:
+            TaskProgress.objects.bulk_create(rows)
+            rows = []
+    TaskProgress.objects.bulk_create(rows)
+
+    totals = (
+        TaskProgress.objects.values('user_id', 'course_id')
+        .annotate(
+            solved_tasks=Count('pk', filter=Q(first_accepted_at__isnull=False)),
+            attempts_total=Sum('attempts'),
+            last_solved_at=Max('first_accepted_at'),
+        )
+        .order_by()
+    )
+    CourseProgress.objects.bulk_create([
+        CourseProgress(
+            user_id=row['user_id'],
+            course_id=row['course_id'],
+            solved_tasks=row['solved_tasks'],
+            attempts=row['attempts_total'],
+            last_solved_at=row['last_solved_at'],
+        )
+        for row in totals.iterator(chunk_size=2000)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0015_submission_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_progress, migrations.RunPython.noop),
+    ]
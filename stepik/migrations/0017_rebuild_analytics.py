@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:38
+
+from django.db import migrations
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def rebuild_analytics(apps, schema_editor):
+    # Дневные срезы — из решений, гистограмма — из TaskProgress, собранного
+    # предыдущей миграцией (как команда rebuild_analytics).
+    Submission = apps.get_model('stepik', 'Submission')
+    TaskProgress = apps.get_model('stepik', 'TaskProgress')
+    TaskDailyStats = apps.get_model('stepik', 'TaskDailyStats')
+    TaskSolveHistogram = apps.get_model('stepik', 'TaskSolveHistogram')
+
+    TaskDailyStats.objects.all().delete()
+    TaskSolveHistogram.objects.all().delete()
+    daily = (
+        Submission.objects.filter(course__isnull=False)
+        .annotate(day=TruncDate('created_at'))
+        .values('task_id', 'course_id', 'day')
+        .annotate(
+            submissions=Count('pk'),
+            accepted=Count('pk', filter=Q(status='accepted')),
+            wrong=Count('pk', filter=Q(status='wrong')),
+        )
+        .order_by()
+    )
+    TaskDailyStats.objects.bulk_create(
+        [TaskDailyStats(**row) for row in daily.iterator(chunk_size=2000)], batch_size=1000,
+    )
+    histogram = (
+        TaskProgress.objects.filter(attempts_to_solve__isnull=False)
+        .values('task_id', 'course_id', 'attempts_to_solve')
+        .annotate(solvers=Count('pk'))
+        .order_by()
+    )
+    TaskSolveHistogram.objects.bulk_create([
+        TaskSolveHistogram(
+            task_id=row['task_id'], course_id=row['course_id'],
+            attempts=row['attempts_to_solve'], solvers=row['solvers'],
+        )
+        for row in histogram.iterator(chunk_size=2000)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0016_rebuild_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_analytics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:44
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def mark_external(apps, schema_editor):
+    # До флагов вынесенная часть определялась как «размер > 0 и пустое тело».
+    InputOutput = apps.get_model('stepik', 'InputOutput')
+    last_pk = 0
+    while True:
+        batch = list(InputOutput.objects.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            return
+        for test in batch:
+            for part in ('input', 'output'):
+                setattr(test, f'{part}_external', getattr(test, f'{part}_size') > 0 and getattr(test, part) == '')
+        InputOutput.objects.bulk_update(batch, ['input_external', 'output_external'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0017_rebuild_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inputoutput',
+            name='input_external',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='inputoutput',
+            name='output_external',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_external, migrations.RunPython.noop),
+    ]
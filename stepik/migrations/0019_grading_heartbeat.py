@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_leases(apps, schema_editor):
+    # Аренда уже запущенных заданий отсчитывается от их старта.
+    GradingJob = apps.get_model('stepik', 'GradingJob')
+    GradingJob.objects.filter(state='running').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0018_test_storage_flags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gradingjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_leases, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:40
+
+from django.conf import settings
+from django.db import migrations
+
+from stepik.codehash import code_hash, content_digest
+
+BATCH_SIZE = 500
+
+
+def backfill_code_hash(apps, schema_editor):
+    # Без хеша старые решения не участвуют в повторном использовании вердиктов
+    # и в поиске одинаковых решений; тела переносятся в CodeBlob, как при save().
+    Submission = apps.get_model('stepik', 'Submission')
+    CodeBlob = apps.get_model('stepik', 'CodeBlob')
+    move_code = getattr(settings, 'SUBMISSION_CODE_DEDUP', True)
+    last_pk = 0
+    while True:
+        batch = list(
+            Submission.objects.filter(pk__gt=last_pk, code_hash='')
+            .exclude(code_student='')
+            .order_by('pk')
+            .only('pk', 'code_student')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        blobs = {}
+        for submission in batch:
+            code = submission.code_student
+            submission.code_hash = code_hash(code)
+            if move_code:
+                submission.code_blob_id = content_digest(code)
+                blobs.setdefault(submission.code_blob_id, code)
+                submission.code_student = ''
+        existing = set(CodeBlob.objects.filter(digest__in=blobs).values_list('digest', flat=True))
+        CodeBlob.objects.bulk_create([
+            CodeBlob(digest=digest, code=code) for digest, code in blobs.items() if digest not in existing
+        ])
+        Submission.objects.bulk_update(batch, ['code_hash', 'code_blob', 'code_student'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stepik', '0019_grading_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_code_hash, migrations.RunPython.noop),
+    ]
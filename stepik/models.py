@@ -1,14 +1,90 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import blobstore
+from .codehash import code_hash, content_digest
+from .fields import CompressedTextField
+from .fieldsets import FieldSelection
 
 User = get_user_model()
 
+
+def _count_subquery(model, field):
+    counts = (
+        model.objects.filter(**{field: models.OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=models.Count('pk'))
+        .values('count')
+    )
+    return Coalesce(models.Subquery(counts, output_field=models.IntegerField()), 0)
+
+
+class CourseQuerySet(models.QuerySet):
+    def with_counts(self, selection=None):
+        selection = selection or FieldSelection()
+        counts = {
+            'modules_count': _count_subquery(Module, 'course'),
+            'enrollment_count': _count_subquery(Enrollment, 'course'),
+        }
+        return self.annotate(**{name: count for name, count in counts.items() if selection.includes(name)})
+
+    def with_detail_tree(self, selection=None):
+        selection = selection or FieldSelection()
+        lookups = [
+            selection.prefetch(
+                'modules', Module.objects.all(), 'course',
+                lambda modules, nested: modules.with_tasks(nested),
+            ),
+            selection.prefetch(
+                'enrollments', Enrollment.objects.all(), 'course',
+                lambda enrollments, nested: enrollments.select_related('user') if nested.expanded('user') else enrollments,
+            ),
+        ]
+        return self.prefetch_related(*[lookup for lookup in lookups if lookup is not None])
+
+
+class ModuleQuerySet(models.QuerySet):
+    def with_tasks(self, selection=None):
+        selection = selection or FieldSelection()
+        tasks = selection.prefetch(
+            'tasks', Task.objects.all(), 'module',
+            lambda tasks, nested: tasks.for_selection(nested),
+        )
+        return self.prefetch_related(tasks) if tasks is not None else self
+
+
+class TaskQuerySet(models.QuerySet):
+    def with_submission_count(self):
+        return self.annotate(submission_count=_count_subquery(Submission, 'task'))
+
+    def for_selection(self, selection=None):
+        selection = selection or FieldSelection()
+        queryset = self.with_submission_count() if selection.includes('submission_count') else self
+        tests = selection.prefetch('input_outputs', InputOutput.objects.defer(*InputOutput.PARTS), 'task')
+        return queryset.prefetch_related(tests) if tests is not None else queryset
+
+
 class Course(models.Model):
     title = models.CharField(max_length=255)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='authored_courses')
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
 
+    objects = CourseQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(is_active=True),
+                name='stepik_course_active_created',
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -29,6 +105,13 @@ class Module(models.Model):
     title = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
 
+    objects = ModuleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', 'is_active']),
+        ]
+
     def __str__(self):
         return self.title
     
@@ -36,19 +119,113 @@ class Task(models.Model):
     module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name='tasks')
     title = models.CharField(max_length=255)
     order = models.PositiveIntegerField()
-    task_text = models.TextField()
+    task_text = CompressedTextField()
+    tests_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Поля, от которых зависят перенос решений и поисковый индекс.
+    TRACKED_FIELDS = ('module_id', 'title', 'task_text')
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['module', 'order']),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_tracked()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.remember_tracked()
+
+    def remember_tracked(self):
+        self.loaded_values = {name: self.__dict__[name] for name in self.TRACKED_FIELDS if name in self.__dict__}
+
+    def changed_fields(self):
+        # Отложенные и не тронутые поля не считаются изменёнными; объект, не
+        # загруженный из БД, считается изменённым целиком.
+        loaded = getattr(self, 'loaded_values', {})
+        return {
+            name for name in self.TRACKED_FIELDS
+            if name in self.__dict__ and (name not in loaded or loaded[name] != self.__dict__[name])
+        }
+
 class InputOutput(models.Model):
+    PARTS = ('input', 'output')
+
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='input_outputs')
-    input = models.TextField()
-    output = models.TextField()
+    input = CompressedTextField()
+    output = CompressedTextField()
+    # Хеш и размер в байтах UTF-8. *_external — тело лежит в blobstore под
+    # этим хешем, а в БД пустая строка.
+    input_hash = models.CharField(max_length=64, blank=True, editable=False)
+    input_size = models.PositiveBigIntegerField(default=0, editable=False)
+    input_external = models.BooleanField(default=False, editable=False)
+    output_hash = models.CharField(max_length=64, blank=True, editable=False)
+    output_size = models.PositiveBigIntegerField(default=0, editable=False)
+    output_external = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return f'Test for {self.task}'
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(self.PARTS):
+            self.store_data()
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields,
+                    *(f'{part}_{suffix}' for part in self.PARTS for suffix in ('hash', 'size', 'external')),
+                }
+        super().save(*args, **kwargs)
+
+    def is_external(self, part):
+        return getattr(self, f'{part}_external')
+
+    def store_data(self, threshold=None):
+        # Пустое тело вынесенной части значит «файл не менялся»; любое новое
+        # тело пересчитывает хеш и снова решает, где ему лежать.
+        if threshold is None:
+            threshold = blobstore.test_storage_settings()['THRESHOLD']
+        for part in self.PARTS:
+            if self.is_external(part) and getattr(self, part) == '':
+                continue
+            data = getattr(self, part).encode()
+            setattr(self, f'{part}_hash', blobstore.content_hash(data))
+            setattr(self, f'{part}_size', len(data))
+            external = threshold is not None and len(data) >= threshold and len(data) > 0
+            if external:
+                blobstore.put(data)
+                setattr(self, part, '')
+            setattr(self, f'{part}_external', external)
+
+    def source(self, part):
+        if self.is_external(part):
+            return blobstore.StoredData(str(blobstore.path_for(getattr(self, f'{part}_hash'))))
+        return getattr(self, part)
+
+class CodeBlob(models.Model):
+    # Тело решения хранится один раз на точное содержимое (sha256 исходного текста).
+    digest = models.CharField(max_length=64, primary_key=True)
+    code = CompressedTextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.digest
+
+    @classmethod
+    def store(cls, code):
+        blob, _ = cls.objects.get_or_create(digest=content_digest(code), defaults={'code': code})
+        return blob
+
+
 class Submission(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -57,9 +234,212 @@ class Submission(models.Model):
     )
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='submissions')
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='submissions')
-    code_student = models.TextField()
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name='submissions', null=True, blank=True, editable=False)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='submissions', null=True, blank=True, editable=False)
+    code_student = CompressedTextField()
+    code_hash = models.CharField(max_length=64, blank=True, editable=False)
+    code_blob = models.ForeignKey(
+        CodeBlob, on_delete=models.PROTECT, related_name='submissions', null=True, blank=True, editable=False
+    )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Время приёма решения; при пакетной записи (stepik.intake) оно раньше момента INSERT.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    intake_key = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['task', 'status']),
+            models.Index(fields=['course', 'created_at', 'id']),
+            models.Index(fields=['task', 'code_hash']),
+        ]
 
     def __str__(self):
         return f'{self.user} | {self.task} | {self.status}'
+
+    @property
+    def code(self):
+        if self.code_blob_id is not None and not self.code_student:
+            return self.code_blob.code
+        return self.code_student
+
+    @code.setter
+    def code(self, value):
+        self.code_student = value
+        self.code_blob = None
+        self.code_hash = ''
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Статус на момент загрузки: сигналы по нему отличают смену статуса от прочих сохранений.
+        instance.loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.task_id and self.module_id is None and not kwargs.get('update_fields'):
+            self.set_task_location()
+        # Непустой code_student — новое тело решения (после store_code он пуст),
+        # поэтому хеш и блоб пересчитываются и при изменении, а не только при создании.
+        update_fields = kwargs.get('update_fields')
+        if self.code_student and (update_fields is None or 'code_student' in update_fields):
+            self.store_code()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'code_hash', 'code_blob'}
+        super().save(*args, **kwargs)
+
+    def store_code(self):
+        self.code_hash = code_hash(self.code_student)
+        if getattr(settings, 'SUBMISSION_CODE_DEDUP', True):
+            self.code_blob = CodeBlob.store(self.code_student)
+            self.code_student = ''
+
+    def set_task_location(self):
+        self.module_id, self.course_id = (
+            Task.objects.filter(pk=self.task_id).values_list('module_id', 'module__course_id').get()
+        )
+
+
+class GradingJob(models.Model):
+    STATE_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    submission = models.OneToOneField(Submission, on_delete=models.CASCADE, related_name='grading_job')
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='queued')
+    reused_from = models.ForeignKey(
+        Submission, on_delete=models.SET_NULL, related_name='+', null=True, blank=True, editable=False
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Аренда задания: грейдер продлевает её, пока решение проверяется.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f'Job #{self.submission_id} | {self.state}'
+
+
+class SubmissionTestResult(models.Model):
+    VERDICT_CHOICES = (
+        ('ok', 'OK'),
+        ('wrong', 'Wrong Answer'),
+        ('timeout', 'Time Limit Exceeded'),
+        ('runtime_error', 'Runtime Error'),
+    )
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='test_results')
+    input_output = models.ForeignKey(InputOutput, on_delete=models.CASCADE, related_name='results')
+    verdict = models.CharField(max_length=20, choices=VERDICT_CHOICES)
+    time_ms = models.PositiveIntegerField(default=0)
+    stdout = models.TextField(blank=True)
+    stderr = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'{self.submission_id} | {self.input_output_id} | {self.verdict}'
+
+
+class SubmissionEvent(models.Model):
+    # Журнал смен статуса для SSE: пишется в транзакции смены статуса любым
+    # процессом (грейдер, API) и читается одним опросчиком на веб-процесс.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='submission_events')
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='events')
+    task_id = models.IntegerField()
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.submission_id} | {self.status}'
+
+
+class TaskProgress(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_progress')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='progress')
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name='task_progress')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='task_progress')
+    attempts = models.PositiveIntegerField(default=0)
+    first_accepted_at = models.DateTimeField(null=True, blank=True)
+    attempts_to_solve = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'task'], name='stepik_taskprogress_user_task'),
+        ]
+        indexes = [
+            models.Index(fields=['course', 'user']),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} | {self.task_id} | {self.attempts}'
+
+
+class CourseProgress(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='course_progress')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='progress')
+    solved_tasks = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    last_solved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'user'], name='stepik_courseprogress_course_user'),
+        ]
+        indexes = [
+            models.Index(fields=['course', '-solved_tasks', 'last_solved_at'], name='stepik_courseprogress_rank'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} | {self.course_id} | {self.solved_tasks}'
+
+
+class TaskDailyStats(models.Model):
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='daily_stats')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    submissions = models.PositiveIntegerField(default=0)
+    accepted = models.PositiveIntegerField(default=0)
+    wrong = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'day'], name='stepik_taskdailystats_task_day'),
+        ]
+        indexes = [
+            models.Index(fields=['course', 'day']),
+        ]
+
+    def __str__(self):
+        return f'{self.task_id} | {self.day} | {self.submissions}'
+
+
+class TaskSolveHistogram(models.Model):
+    # Сколько студентов решили задачу ровно с attempts-й попытки.
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='solve_histogram')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='solve_histogram')
+    attempts = models.PositiveIntegerField()
+    solvers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'attempts'], name='stepik_tasksolvehistogram_task_attempts'),
+        ]
+        indexes = [
+            models.Index(fields=['course', 'task']),
+        ]
+
+    def __str__(self):
+        return f'{self.task_id} | {self.attempts} | {self.solvers}'
@@ -1,6 +1,57 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
 
 class CoursePagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class SelectablePagination(BasePagination):
+    # ?pagination=cursor (или наличие ?cursor=) включает keyset-пагинацию
+    # по (created_at, id) без COUNT(*) и OFFSET; по умолчанию — номера страниц.
+    mode_query_param = 'pagination'
+    page_number_class = CoursePagination
+    cursor_class = CreatedAtCursorPagination
+
+    def __init__(self):
+        self.paginator = None
+
+    def get_paginator(self, request):
+        use_cursor = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_class.cursor_query_param in request.query_params
+        )
+        return self.cursor_class() if use_cursor else self.page_number_class()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_class().get_paginated_response_schema(schema)
+
+    def get_results(self, data):
+        return data['results']
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    @property
+    def display_page_controls(self):
+        return self.paginator is not None and self.paginator.display_page_controls
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *self.page_number_class().get_schema_operation_parameters(view),
+            *self.cursor_class().get_schema_operation_parameters(view)[:1],
+        ]
@@ -1,5 +1,57 @@
 from rest_framework import permissions
 
+from .models import Course, InputOutput, Module, Task
+
+PARENT_FIELDS = {
+    Module: 'course',
+    Task: 'module',
+    InputOutput: 'task',
+}
+
+OWNER_LOOKUPS = {
+    Course: 'author_id',
+    Module: 'course__author_id',
+    Task: 'module__course__author_id',
+}
+
+
+def resolve_owner_id(obj, memo):
+    # Идём по уже загруженным родителям без запросов; если цепочка не
+    # подгружена, делаем один запрос за author_id и запоминаем его в memo.
+    if isinstance(obj, Course):
+        return obj.author_id
+    field_name = PARENT_FIELDS.get(type(obj))
+    if field_name is None:
+        return None
+
+    field = obj._meta.get_field(field_name)
+    if field.is_cached(obj):
+        return resolve_owner_id(getattr(obj, field_name), memo)
+
+    parent_model = field.related_model
+    key = (parent_model, getattr(obj, field.attname))
+    if key not in memo:
+        memo[key] = (
+            parent_model.objects.filter(pk=key[1])
+            .values_list(OWNER_LOOKUPS[parent_model], flat=True)
+            .first()
+        )
+    return memo[key]
+
+
+def get_owner_memo(request):
+    memo = getattr(request, '_owner_memo', None)
+    if memo is None:
+        memo = request._owner_memo = {}
+    return memo
+
+
+def is_owner_or_admin(request, obj):
+    if request.user.role == 'admin':
+        return True
+    return resolve_owner_id(obj, get_owner_memo(request)) == request.user.id
+
+
 class IsAdminOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
@@ -7,15 +59,18 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return request.user.is_authenticated and request.user.role == 'admin'
 
 
+class IsAdmin(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role == 'admin'
+
+
 class IsInstructorOrAdmin(permissions.BasePermission):
+    message = '❌ У вас нет прав для изменения этого объекта'
+
     def has_object_permission(self, request, view, obj):
-        if request.user.role == 'admin':
+        if request.method in permissions.SAFE_METHODS:
             return True
-        if hasattr(obj, 'instructor'):
-            return obj.instructor == request.user
-        if hasattr(obj, 'course'):
-            return obj.course.instructor == request.user
-        return False
+        return is_owner_or_admin(request, obj)
 
     def has_permission(self, request, view):
         if request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
@@ -0,0 +1,148 @@
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Window
+from django.db.models.functions import Rank
+
+from . import analytics
+from .models import CourseProgress, Submission, TaskProgress
+
+
+def record_submission(submission):
+    # Новая попытка: счётчики увеличиваются на месте, без пересчёта по решениям.
+    with transaction.atomic():
+        task_progress, _ = TaskProgress.objects.get_or_create(
+            user_id=submission.user_id,
+            task_id=submission.task_id,
+            defaults={'module_id': submission.module_id, 'course_id': submission.course_id},
+        )
+        TaskProgress.objects.filter(pk=task_progress.pk).update(attempts=F('attempts') + 1)
+        course_progress, _ = CourseProgress.objects.get_or_create(
+            user_id=submission.user_id, course_id=submission.course_id,
+        )
+        CourseProgress.objects.filter(pk=course_progress.pk).update(attempts=F('attempts') + 1)
+    if submission.status == 'accepted':
+        refresh_task_progress(submission.user_id, submission.task_id)
+
+
+def refresh_task_progress(user_id, task_id):
+    # Пересчёт одной пары (пользователь, задача) по её решениям — их единицы,
+    # а не все решения курса. Вызывается при смене статуса и удалении решения.
+    with transaction.atomic():
+        totals = Submission.objects.filter(user_id=user_id, task_id=task_id).aggregate(
+            attempts=Count('pk'),
+            first_accepted_at=Min('created_at', filter=Q(status='accepted')),
+        )
+        task_progress = TaskProgress.objects.filter(user_id=user_id, task_id=task_id).first()
+        if task_progress is None:
+            return
+        solved_with = task_progress.attempts_to_solve
+        if totals['attempts']:
+            task_progress.attempts = totals['attempts']
+            task_progress.first_accepted_at = totals['first_accepted_at']
+            task_progress.attempts_to_solve = None
+            if totals['first_accepted_at'] is not None:
+                task_progress.attempts_to_solve = Submission.objects.filter(
+                    user_id=user_id, task_id=task_id, created_at__lte=totals['first_accepted_at'],
+                ).count()
+            task_progress.save(update_fields=['attempts', 'first_accepted_at', 'attempts_to_solve'])
+        else:
+            task_progress.delete()
+            task_progress.attempts_to_solve = None
+        analytics.record_solve_change(task_id, task_progress.course_id, solved_with, task_progress.attempts_to_solve)
+        refresh_course_progress(user_id, task_progress.course_id)
+
+
+def refresh_course_progress(user_id, course_id):
+    totals = TaskProgress.objects.filter(user_id=user_id, course_id=course_id).aggregate(
+        tasks=Count('pk'),
+        solved_tasks=Count('pk', filter=Q(first_accepted_at__isnull=False)),
+        attempts=Sum('attempts'),
+        last_solved_at=Max('first_accepted_at'),
+    )
+    if not totals.pop('tasks'):
+        CourseProgress.objects.filter(user_id=user_id, course_id=course_id).delete()
+        return
+    CourseProgress.objects.update_or_create(user_id=user_id, course_id=course_id, defaults=totals)
+
+
+def rebuild_course_totals(course_id):
+    CourseProgress.objects.filter(course_id=course_id).delete()
+    totals = (
+        TaskProgress.objects.filter(course_id=course_id)
+        .values('user_id')
+        .annotate(
+            solved_tasks=Count('pk', filter=Q(first_accepted_at__isnull=False)),
+            attempts_total=Sum('attempts'),
+            last_solved_at=Max('first_accepted_at'),
+        )
+        .order_by()
+    )
+    return len(CourseProgress.objects.bulk_create([
+        CourseProgress(
+            course_id=course_id,
+            user_id=row['user_id'],
+            solved_tasks=row['solved_tasks'],
+            attempts=row['attempts_total'],
+            last_solved_at=row['last_solved_at'],
+        )
+        for row in totals
+    ], batch_size=1000))
+
+
+def rebuild_course(course_id):
+    # Полная пересборка прогресса курса из решений (команда rebuild_progress).
+    with transaction.atomic():
+        TaskProgress.objects.filter(course_id=course_id).delete()
+        submissions = (
+            Submission.objects.filter(course_id=course_id)
+            .order_by('user_id', 'task_id', 'created_at', 'id')
+            .values_list('user_id', 'task_id', 'module_id', 'status', 'created_at')
+            .iterator(chunk_size=2000)
+        )
+        rows = []
+        for (user_id, task_id), attempts in groupby(submissions, key=itemgetter(0, 1)):
+            row = TaskProgress(course_id=course_id, user_id=user_id, task_id=task_id)
+            for _, _, module_id, status, created_at in attempts:
+                row.module_id = module_id
+                row.attempts += 1
+                if status == 'accepted' and row.first_accepted_at is None:
+                    row.first_accepted_at = created_at
+                    row.attempts_to_solve = row.attempts
+            rows.append(row)
+        TaskProgress.objects.bulk_create(rows, batch_size=1000)
+        return rebuild_course_totals(course_id)
+
+
+def relocate_task_progress(queryset, **location):
+    # Задачу или модуль перенесли: строки прогресса переезжают вместе с ними,
+    # итоги затронутых курсов собираются заново из TaskProgress.
+    courses = set(queryset.values_list('course_id', flat=True))
+    if not courses:
+        return
+    queryset.update(**location)
+    for course_id in courses | {location['course_id']}:
+        rebuild_course_totals(course_id)
+
+
+def leaderboard(course_id):
+    return (
+        CourseProgress.objects.filter(course_id=course_id)
+        .select_related('user')
+        .annotate(rank=Window(
+            Rank(),
+            order_by=[F('solved_tasks').desc(), F('last_solved_at').asc(nulls_last=True)],
+        ))
+        .order_by('rank', 'user_id')
+    )
+
+
+def course_rank(course_progress):
+    # Ранг одной записи — COUNT по индексу (course, -solved_tasks, last_solved_at).
+    ahead = Q(solved_tasks__gt=course_progress.solved_tasks)
+    if course_progress.last_solved_at is None:
+        ahead |= Q(solved_tasks=course_progress.solved_tasks, last_solved_at__isnull=False)
+    else:
+        ahead |= Q(solved_tasks=course_progress.solved_tasks, last_solved_at__lt=course_progress.last_solved_at)
+    return CourseProgress.objects.filter(course_id=course_progress.course_id).filter(ahead).count() + 1
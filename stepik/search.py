@@ -0,0 +1,332 @@
+import json
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .models import Course, Module, Task
+from .utils import iter_chunks
+
+FTS_TABLE = 'stepik_search'
+KINDS = {'course': 1, 'module': 2, 'task': 3}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+TITLE_WEIGHT = 10.0
+TOKEN = re.compile(r'\w+')
+
+DEFAULT_SEARCH = {
+    'BACKEND': 'auto',
+    'FALLBACK_TTL': 300.0,
+}
+
+
+def search_settings():
+    return {**DEFAULT_SEARCH, **getattr(settings, 'SEARCH', {})}
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+def doc_key(kind, object_id):
+    # Совпадает с rowid в FTS5: удаление и замена документа идут по первичному ключу.
+    return object_id * 4 + KINDS[kind]
+
+
+def course_document(course_id, title):
+    return {'kind': 'course', 'id': course_id, 'course': course_id, 'module': None, 'title': title, 'body': ''}
+
+
+def module_document(module_id, course_id, title):
+    return {'kind': 'module', 'id': module_id, 'course': course_id, 'module': module_id, 'title': title, 'body': ''}
+
+
+def task_document(task_id, module_id, course_id, title, task_text):
+    return {'kind': 'task', 'id': task_id, 'course': course_id, 'module': module_id, 'title': title, 'body': task_text}
+
+
+def iter_documents(chunk_size=2000):
+    for row in Course.objects.values_list('id', 'title').iterator(chunk_size=chunk_size):
+        yield course_document(*row)
+    for row in Module.objects.values_list('id', 'course_id', 'title').iterator(chunk_size=chunk_size):
+        yield module_document(*row)
+    tasks = Task.objects.values_list('id', 'module_id', 'module__course_id', 'title', 'task_text')
+    for row in tasks.iterator(chunk_size=chunk_size):
+        yield task_document(*row)
+
+
+class Fts5Backend:
+    name = 'fts5'
+
+    def replace(self, documents):
+        documents = list(documents)
+        self.remove([doc_key(doc['kind'], doc['id']) for doc in documents])
+        self.insert(documents)
+
+    def insert(self, documents):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, body, kind, object_id, course_id, module_id) '
+                f'VALUES (%s, %s, %s, %s, %s, %s, %s)',
+                [
+                    (doc_key(doc['kind'], doc['id']), doc['title'], doc['body'], KINDS[doc['kind']],
+                     doc['id'], doc['course'], doc['module'])
+                    for doc in documents
+                ],
+            )
+
+    def remove(self, keys):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(key,) for key in keys])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    @staticmethod
+    def match_expression(tokens):
+        # Каждое слово — префиксный запрос в кавычках, поэтому синтаксис FTS5 из ввода не исполняется.
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def search(self, tokens, kinds, limit):
+        kind_filter = ''
+        params = [self.match_expression(tokens)]
+        if kinds:
+            kind_filter = f'AND {FTS_TABLE}.kind IN ({", ".join(["%s"] * len(kinds))})'
+            params += [KINDS[kind] for kind in kinds]
+        params.append(limit)
+        course_table, module_table = Course._meta.db_table, Module._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                SELECT {FTS_TABLE}.kind, {FTS_TABLE}.object_id, {FTS_TABLE}.course_id, {FTS_TABLE}.title,
+                       bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1.0) AS score,
+                       snippet({FTS_TABLE}, 1, '[', ']', '…', 12)
+                FROM {FTS_TABLE}
+                JOIN {course_table} ON {course_table}.id = {FTS_TABLE}.course_id
+                LEFT JOIN {module_table} ON {module_table}.id = {FTS_TABLE}.module_id
+                WHERE {FTS_TABLE} MATCH %s {kind_filter}
+                  AND {course_table}.is_active
+                  AND ({FTS_TABLE}.module_id IS NULL OR {module_table}.is_active)
+                ORDER BY score
+                LIMIT %s
+                ''',
+                params,
+            )
+            return [
+                {
+                    'kind': KIND_NAMES[kind], 'id': object_id, 'course': course_id, 'title': title,
+                    'score': round(-score, 4), 'snippet': snippet,
+                }
+                for kind, object_id, course_id, title, score, snippet in cursor.fetchall()
+            ]
+
+    def course_filter(self, tokens):
+        return RawSQL(
+            f'SELECT object_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND kind = %s',
+            (self.match_expression(tokens), KINDS['course']),
+        )
+
+
+class InvertedIndex:
+    # Запасной индекс в памяти процесса, если в SQLite нет FTS5. Сигналы этого
+    # процесса обновляют его на месте; изменения из других процессов подтягиваются
+    # полной перезагрузкой раз в FALLBACK_TTL секунд.
+    name = 'python'
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._vocabulary = None
+        self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            self.load(iter_documents())
+
+    def load(self, documents):
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._documents = {}
+            self._vocabulary = None
+            self._add(documents)
+            self._loaded_at = time.monotonic()
+
+    def _add(self, documents):
+        for doc in documents:
+            key = doc_key(doc['kind'], doc['id'])
+            self._discard(key)
+            weights = defaultdict(float)
+            for token in tokenize(doc['title']):
+                weights[token] += TITLE_WEIGHT
+            for token in tokenize(doc['body']):
+                weights[token] += 1.0
+            length = math.sqrt(sum(weights.values())) or 1.0
+            for token, weight in weights.items():
+                self._postings[token][key] = weight / length
+            self._documents[key] = (doc, list(weights))
+        self._vocabulary = None
+
+    def _discard(self, key):
+        entry = self._documents.pop(key, None)
+        if entry is None:
+            return
+        for token in entry[1]:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[token]
+        self._vocabulary = None
+
+    def replace(self, documents):
+        with self._lock:
+            if self._loaded_at is not None:
+                self._add(documents)
+
+    def remove(self, keys):
+        with self._lock:
+            for key in keys:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def __len__(self):
+        return len(self._documents)
+
+    def _expand(self, prefix):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        for position in range(bisect_left(self._vocabulary, prefix), len(self._vocabulary)):
+            token = self._vocabulary[position]
+            if not token.startswith(prefix):
+                break
+            yield token
+
+    def score(self, tokens):
+        with self._lock:
+            self._ensure_loaded()
+            total = len(self._documents) or 1
+            scores = None
+            for prefix in tokens:
+                matched = defaultdict(float)
+                for token in self._expand(prefix):
+                    postings = self._postings[token]
+                    idf = math.log(1 + total / len(postings))
+                    for key, weight in postings.items():
+                        matched[key] += weight * idf
+                if scores is None:
+                    scores = matched
+                else:
+                    scores = {key: score + matched[key] for key, score in scores.items() if key in matched}
+                if not scores:
+                    return {}
+            return {key: (score, self._documents[key][0]) for key, score in (scores or {}).items()}
+
+    def search(self, tokens, kinds, limit):
+        ranked = sorted(
+            (
+                (score, doc) for score, doc in self.score(tokens).values()
+                if not kinds or doc['kind'] in kinds
+            ),
+            key=lambda item: -item[0],
+        )
+        hits = []
+        for chunk in iter_chunks(ranked, limit * 2):
+            courses = set(Course.objects.filter(
+                pk__in={doc['course'] for _, doc in chunk}, is_active=True,
+            ).values_list('pk', flat=True))
+            modules = set(Module.objects.filter(
+                pk__in={doc['module'] for _, doc in chunk if doc['module']}, is_active=True,
+            ).values_list('pk', flat=True))
+            for score, doc in chunk:
+                if doc['course'] in courses and (doc['module'] is None or doc['module'] in modules):
+                    hits.append({
+                        'kind': doc['kind'], 'id': doc['id'], 'course': doc['course'], 'title': doc['title'],
+                        'score': round(score, 4), 'snippet': doc['body'][:120],
+                    })
+                    if len(hits) == limit:
+                        return hits
+        return hits
+
+    def course_filter(self, tokens):
+        ids = [doc['id'] for _, doc in self.score(tokens).values() if doc['kind'] == 'course']
+        if connection.vendor != 'sqlite':
+            return ids
+        # Список id уходит одним JSON-параметром: pk__in со списком упёрся бы
+        # в лимит переменных SQLite на большом каталоге.
+        return RawSQL('SELECT value FROM json_each(%s)', (json.dumps(ids),))
+
+
+_fts_tables = {}
+_fallback = InvertedIndex(search_settings()['FALLBACK_TTL'])
+_fts5 = Fts5Backend()
+
+
+def fts_available():
+    if connection.vendor != 'sqlite':
+        return False
+    database = connection.settings_dict['NAME']
+    if database not in _fts_tables:
+        _fts_tables[database] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[database]
+
+
+def get_backend():
+    backend = search_settings()['BACKEND']
+    if backend == 'python' or (backend == 'auto' and not fts_available()):
+        return _fallback
+    return _fts5
+
+
+def search(query, kinds=None, limit=20):
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    return get_backend().search(tokens, kinds, limit)
+
+
+def filter_courses(queryset, query):
+    tokens = tokenize(query)
+    if not tokens:
+        # Запрос без слов (например, «!!!») ничего не находит, как и icontains.
+        return queryset.none()
+    return queryset.filter(pk__in=get_backend().course_filter(tokens))
+
+
+def index_documents(documents):
+    transaction.on_commit(lambda: get_backend().replace(documents))
+
+
+def remove_document(kind, object_id):
+    key = doc_key(kind, object_id)
+    transaction.on_commit(lambda: get_backend().remove([key]))
+
+
+def index_tasks(tasks, course_id):
+    index_documents([
+        task_document(task.id, task.module_id, course_id, task.title, task.task_text) for task in tasks
+    ])
+
+
+def rebuild(batch_size=2000):
+    backend = get_backend()
+    if backend is _fallback:
+        _fallback.load(iter_documents(batch_size))
+        return len(_fallback)
+    total = 0
+    with transaction.atomic():
+        backend.clear()
+        for chunk in iter_chunks(iter_documents(batch_size), batch_size):
+            backend.insert(chunk)
+            total += len(chunk)
+    return total
@@ -1,15 +1,26 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Course, Enrollment, Module, Task, InputOutput, Submission
+from .fieldsets import FieldSelection
+from .models import (
+    Course, CourseProgress, Enrollment, Module, Task, InputOutput, Submission, SubmissionTestResult,
+)
 
 User = get_user_model()
 
+class DynamicFieldsMixin:
+    # Поддержка ?fields= и ?expand= (см. fieldsets.FieldSelection) для корневого сериализатора.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is not None:
+            FieldSelection.from_request(request).apply(self)
+
 class UserBasicSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'role')
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     author = UserBasicSerializer(read_only=True)
     modules_count = serializers.SerializerMethodField()
     enrollment_count = serializers.SerializerMethodField()
@@ -20,12 +31,16 @@ class CourseSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'author')
     
     def get_modules_count(self, obj):
+        if hasattr(obj, 'modules_count'):
+            return obj.modules_count
         return obj.modules.count()
     
     def get_enrollment_count(self, obj):
+        if hasattr(obj, 'enrollment_count'):
+            return obj.enrollment_count
         return obj.enrollments.count()
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = UserBasicSerializer(read_only=True)
     course = CourseSerializer(read_only=True)
     
@@ -34,13 +49,21 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         fields = ('id', 'user', 'course')
         read_only_fields = ('id', 'user')
 
+class CourseEnrollmentSerializer(serializers.ModelSerializer):
+    user = UserBasicSerializer(read_only=True)
+
+    class Meta:
+        model = Enrollment
+        fields = ('id', 'user')
+        read_only_fields = fields
+
 class InputOutputSerializer(serializers.ModelSerializer):
     class Meta:
         model = InputOutput
-        fields = ('id', 'task', 'input', 'output')
-        read_only_fields = ('id',)
+        fields = ('id', 'task', 'input_size', 'input_hash', 'output_size', 'output_hash')
+        read_only_fields = fields
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     input_outputs = InputOutputSerializer(many=True, read_only=True)
     submission_count = serializers.SerializerMethodField()
     
@@ -50,9 +73,11 @@ class TaskSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
     
     def get_submission_count(self, obj):
+        if hasattr(obj, 'submission_count'):
+            return obj.submission_count
         return obj.submissions.count()
 
-class ModuleSerializer(serializers.ModelSerializer):
+class ModuleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     tasks = TaskSerializer(many=True, read_only=True)
     
     class Meta:
@@ -60,30 +85,47 @@ class ModuleSerializer(serializers.ModelSerializer):
         fields = ('id', 'course', 'title', 'is_active', 'tasks')
         read_only_fields = ('id',)
 
-class SubmissionSerializer(serializers.ModelSerializer):
+class SubmissionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = UserBasicSerializer(read_only=True)
     task_title = serializers.CharField(source='task.title', read_only=True)
+    code_student = serializers.CharField(source='code', style={'base_template': 'textarea.html'})
     
     class Meta:
         model = Submission
-        fields = ('id', 'user', 'task', 'task_title', 'code_student', 'status', 'created_at')
-        read_only_fields = ('id', 'user', 'status', 'created_at')
+        fields = ('id', 'user', 'task', 'task_title', 'code_student', 'status', 'created_at', 'intake_key')
+        read_only_fields = ('id', 'user', 'status', 'created_at', 'intake_key')
+
+class SubmissionTestResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SubmissionTestResult
+        fields = ('id', 'input_output', 'verdict', 'time_ms')
+        read_only_fields = fields
 
-class SubmissionDetailSerializer(serializers.ModelSerializer):
+class SubmissionDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = UserBasicSerializer(read_only=True)
     task = TaskSerializer(read_only=True)
+    test_results = SubmissionTestResultSerializer(many=True, read_only=True)
+    code_student = serializers.CharField(source='code', style={'base_template': 'textarea.html'})
     
     class Meta:
         model = Submission
-        fields = ('id', 'user', 'task', 'code_student', 'status', 'created_at')
+        fields = ('id', 'user', 'task', 'code_student', 'status', 'created_at', 'test_results')
         read_only_fields = ('id', 'user', 'status', 'created_at')
 
-class CourseDetailSerializer(serializers.ModelSerializer):
+class CourseDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     author = UserBasicSerializer(read_only=True)
     modules = ModuleSerializer(many=True, read_only=True)
-    enrollments = EnrollmentSerializer(many=True, read_only=True)
+    enrollments = CourseEnrollmentSerializer(many=True, read_only=True)
     
     class Meta:
         model = Course
         fields = ('id', 'title', 'author', 'created_at', 'is_active', 'modules', 'enrollments')
-        read_only_fields = ('id', 'created_at', 'author')
\ No newline at end of file
+        read_only_fields = ('id', 'created_at', 'author')
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    rank = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = CourseProgress
+        fields = ('rank', 'user', 'username', 'solved_tasks', 'attempts', 'last_solved_at')
+        read_only_fields = fields
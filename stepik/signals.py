@@ -0,0 +1,129 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import analytics, cache, progress, search
+from .models import Course, Enrollment, InputOutput, Module, Submission, Task, TaskProgress
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_cache(sender, instance, **kwargs):
+    cache.invalidate_course(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Module)
+@receiver([post_save, post_delete], sender=Enrollment)
+def invalidate_course_cache_by_relation(sender, instance, **kwargs):
+    cache.invalidate_course(instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Task)
+def invalidate_course_cache_by_task(sender, instance, **kwargs):
+    course_id = Module.objects.filter(pk=instance.module_id).values_list('course_id', flat=True).first()
+    if course_id is not None:
+        cache.invalidate_course(course_id, catalogue=False)
+
+
+@receiver([post_save, post_delete], sender=InputOutput)
+def invalidate_course_cache_by_test(sender, instance, **kwargs):
+    course_id = (
+        Task.objects.filter(pk=instance.task_id)
+        .values_list('module__course_id', flat=True)
+        .first()
+    )
+    if course_id is not None:
+        cache.invalidate_course(course_id, catalogue=False)
+
+
+@receiver([post_save, post_delete], sender=Submission)
+def invalidate_course_cache_by_submission(sender, instance, created=True, **kwargs):
+    # В карточке курса у задач есть submission_count; смена статуса его не меняет.
+    if not created:
+        return
+    course_id = instance.course_id or (
+        Task.objects.filter(pk=instance.task_id).values_list('module__course_id', flat=True).first()
+    )
+    if course_id is not None:
+        cache.invalidate_course(course_id, catalogue=False)
+
+
+@receiver([post_save, post_delete], sender=InputOutput)
+def mark_tests_changed(sender, instance, **kwargs):
+    # Вердикты, полученные до изменения тестов, больше не переиспользуются.
+    Task.objects.filter(pk=instance.task_id).update(tests_changed_at=timezone.now())
+
+
+@receiver(post_save, sender=Task)
+def move_task_submissions(sender, instance, created, **kwargs):
+    if created or 'module_id' not in instance.changed_fields():
+        return
+    course_id = Module.objects.filter(pk=instance.module_id).values_list('course_id', flat=True).get()
+    Submission.objects.filter(task=instance).exclude(module_id=instance.module_id).update(
+        module_id=instance.module_id,
+        course_id=course_id,
+    )
+    progress.relocate_task_progress(
+        TaskProgress.objects.filter(task=instance).exclude(module_id=instance.module_id),
+        module_id=instance.module_id,
+        course_id=course_id,
+    )
+    analytics.relocate({'task': instance}, course_id)
+
+
+@receiver(post_save, sender=Module)
+def move_module_submissions(sender, instance, created, **kwargs):
+    if created:
+        return
+    Submission.objects.filter(module=instance).exclude(course_id=instance.course_id).update(
+        course_id=instance.course_id,
+    )
+    progress.relocate_task_progress(
+        TaskProgress.objects.filter(module=instance).exclude(course_id=instance.course_id),
+        course_id=instance.course_id,
+    )
+    analytics.relocate({'task__module': instance}, instance.course_id)
+
+
+@receiver(post_save, sender=Submission)
+def track_submission(sender, instance, created, **kwargs):
+    previous_status = getattr(instance, 'loaded_status', instance.status)
+    if created:
+        analytics.record_submission(instance)
+        progress.record_submission(instance)
+    elif previous_status != instance.status:
+        analytics.record_status_change(instance, previous_status)
+        progress.refresh_task_progress(instance.user_id, instance.task_id)
+    instance.loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Submission)
+def forget_submission(sender, instance, **kwargs):
+    analytics.record_deletion(instance)
+    progress.refresh_task_progress(instance.user_id, instance.task_id)
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, **kwargs):
+    search.index_documents([search.course_document(instance.id, instance.title)])
+
+
+@receiver(post_save, sender=Module)
+def index_module(sender, instance, created, **kwargs):
+    search.index_documents([search.module_document(instance.id, instance.course_id, instance.title)])
+    if not created:
+        search.index_tasks(instance.tasks.all(), instance.course_id)
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, **kwargs):
+    if not instance.changed_fields():
+        return
+    course_id = Module.objects.filter(pk=instance.module_id).values_list('course_id', flat=True).get()
+    search.index_tasks([instance], course_id)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Module)
+@receiver(post_delete, sender=Task)
+def unindex_object(sender, instance, **kwargs):
+    search.remove_document(sender._meta.model_name, instance.pk)
@@ -1,3 +1,1095 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib
+import io
+import json
+import os
+import uuid
+import zipfile
+import shutil
+import tempfile
+import unittest
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from server.database import sqlite_databases
+from server.routers import ReadAliasRouter, read_only_request
+
+from . import analytics, async_views, blobstore, events, grader, intake, progress, search
+from .codehash import code_hash
+from .fields import LZMA, RAW, ZLIB
+from .models import (
+    CodeBlob, Course, CourseProgress, Enrollment, GradingJob, InputOutput, Module, Submission, SubmissionEvent, Task,
+    TaskDailyStats, TaskProgress, TaskSolveHistogram,
+)
+
+User = get_user_model()
+
+
+class CourseListQueryCountTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(username='student', password='pass')
+        authors = [
+            User.objects.create_user(username=f'mentor{i}', password='pass', role='mentor')
+            for i in range(5)
+        ]
+        for i in range(30):
+            course = Course.objects.create(title=f'Course {i}', author=authors[i % len(authors)])
+            Module.objects.bulk_create([Module(course=course, title=f'Module {j}') for j in range(3)])
+            Enrollment.objects.create(user=cls.student, course=course)
+
+    def setUp(self):
+        caches['courses'].clear()
+
+    def test_course_list_query_count_is_constant(self):
+        # COUNT для пагинации + один запрос на страницу
+        for page_size in (1, 10, 30):
+            with self.assertNumQueries(2):
+                response = self.client.get('/api/courses/', {'page_size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+
+    def test_course_list_counts_are_annotated(self):
+        response = self.client.get('/api/courses/', {'page_size': 30})
+        for course in response.data['results']:
+            self.assertEqual(course['modules_count'], 3)
+            self.assertEqual(course['enrollment_count'], 1)
+            self.assertIn('username', course['author'])
+
+    def test_user_courses_query_count_is_constant(self):
+        self.client.force_authenticate(self.student)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/my-courses/')
+        self.assertEqual(len(response.data), 30)
+        self.assertTrue(all(course['enrollment_count'] == 1 for course in response.data))
+
+
+class CourseDetailQueryCountTests(APITestCase):
+    def setUp(self):
+        caches['courses'].clear()
+
+    def create_course(self, modules, tasks_per_module, students):
+        author = User.objects.create_user(username=f'author{modules}', password='pass', role='mentor')
+        course = Course.objects.create(title='Course', author=author)
+        for i in range(modules):
+            module = Module.objects.create(course=course, title=f'Module {i}')
+            for j in range(tasks_per_module):
+                task = Task.objects.create(module=module, title=f'Task {j}', order=j, task_text='text')
+                InputOutput.objects.create(task=task, input='1', output='1')
+                Submission.objects.create(user=author, task=task, code_student='print(1)')
+        for i in range(students):
+            user = User.objects.create_user(username=f'student{modules}_{i}', password='pass')
+            Enrollment.objects.create(user=user, course=course)
+        return course
+
+    def test_course_detail_query_count_is_constant(self):
+        small = self.create_course(modules=1, tasks_per_module=1, students=1)
+        large = self.create_course(modules=4, tasks_per_module=5, students=10)
+        for course in (small, large):
+            with self.assertNumQueries(5):
+                response = self.client.get(f'/api/courses/{course.id}/')
+            self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(f'/api/courses/{large.id}/')
+        self.assertEqual(len(response.data['modules']), 4)
+        self.assertEqual(response.data['modules'][0]['tasks'][0]['submission_count'], 1)
+        self.assertEqual(len(response.data['enrollments']), 10)
+        self.assertNotIn('course', response.data['enrollments'][0])
+
+
+class CourseCacheTests(APITestCase):
+    def setUp(self):
+        caches['courses'].clear()
+        self.author = User.objects.create_user(username='author', password='pass', role='mentor')
+        self.course = Course.objects.create(title='Course', author=self.author)
+
+    def test_repeated_requests_are_served_from_cache(self):
+        self.client.get('/api/courses/')
+        self.client.get(f'/api/courses/{self.course.id}/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/courses/')
+            self.client.get(f'/api/courses/{self.course.id}/')
+
+    def test_related_changes_invalidate_cache(self):
+        self.client.get('/api/courses/')
+        self.client.get(f'/api/courses/{self.course.id}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            module = Module.objects.create(course=self.course, title='Module')
+            Task.objects.create(module=module, title='Task', order=1, task_text='text')
+
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response.data['results'][0]['modules_count'], 1)
+        response = self.client.get(f'/api/courses/{self.course.id}/')
+        self.assertEqual(len(response.data['modules'][0]['tasks']), 1)
+
+    def test_cache_is_invalidated_only_after_commit(self):
+        module = Module.objects.create(course=self.course, title='Module')
+        task = Task.objects.create(module=module, title='Task', order=1, task_text='text')
+        student = User.objects.create_user(username='student', password='pass')
+        self.client.get(f'/api/courses/{self.course.id}/')
+        with self.captureOnCommitCallbacks() as callbacks:
+            Submission.objects.create(user=student, task=task, code_student='print(1)')
+            with self.assertNumQueries(0):
+                self.client.get(f'/api/courses/{self.course.id}/')
+        for callback in callbacks:
+            callback()
+        response = self.client.get(f'/api/courses/{self.course.id}/')
+        self.assertEqual(response.data['modules'][0]['tasks'][0]['submission_count'], 1)
+
+
+class GraderSandboxTests(TestCase):
+    def grade(self, code, **limits):
+        limits = {**grader.grader_settings(), 'SANDBOX': 'none', 'TIME_LIMIT': 1, **limits}
+        return grader.grade_code(code, [(1, 'hello\n', 'hello\n')], limits)[0]
+
+    def test_correct_solution_is_accepted(self):
+        self.assertEqual(self.grade('print(input())')['verdict'], 'ok')
+
+    def test_output_is_read_up_to_limit(self):
+        result = self.grade('import sys\nwhile True: sys.stdout.write("x" * 10000)', OUTPUT_LIMIT_KB=4)
+        self.assertEqual(result['verdict'], 'runtime_error')
+        self.assertEqual(len(result['stdout']), 4 * 1024)
+
+    def test_endless_loop_times_out(self):
+        self.assertEqual(self.grade('while True: pass')['verdict'], 'timeout')
+
+    def test_interpreter_failure_is_not_a_verdict(self):
+        with self.assertRaises(grader.SandboxError):
+            self.grade('print(input())', PYTHON='/nonexistent/python')
+
+    @unittest.skipUnless(os.geteuid() == 0, 'нужен root')
+    def test_probe_rejects_interpreter_hidden_from_sandbox_user(self):
+        base_mode = os.stat(settings.BASE_DIR).st_mode
+        with tempfile.TemporaryDirectory() as hidden:
+            os.chmod(hidden, 0o700)
+            python = os.path.join(hidden, 'python')
+            os.symlink(os.path.realpath(shutil.which('python3') or '/usr/bin/python3'), python)
+            limits = {**grader.grader_settings(), 'SANDBOX': 'user', 'PYTHON': python}
+            with self.assertRaisesMessage(ImproperlyConfigured, python):
+                grader.prepare_sandbox(limits)
+        self.assertEqual(os.stat(settings.BASE_DIR).st_mode, base_mode)
+
+    @unittest.skipUnless(
+        os.geteuid() == 0 and os.path.exists('/usr/bin/python3'), 'нужен root и системный python3'
+    )
+    def test_probe_rejects_project_files_readable_from_sandbox(self):
+        with tempfile.NamedTemporaryFile(dir='/tmp') as exposed:
+            os.chmod(exposed.name, 0o644)
+            limits = {**grader.grader_settings(), 'SANDBOX': 'user', 'PYTHON': '/usr/bin/python3'}
+            with mock.patch.object(grader, 'protected_paths', return_value=[exposed.name]):
+                with self.assertRaisesMessage(ImproperlyConfigured, exposed.name):
+                    grader.prepare_sandbox(limits)
+            os.chmod(exposed.name, 0o600)
+            with mock.patch.object(grader, 'protected_paths', return_value=[exposed.name]):
+                self.assertEqual(grader.prepare_sandbox(limits)['SANDBOX'], 'user')
+
+    @unittest.skipUnless(shutil.which('bwrap'), 'bwrap не установлен')
+    def test_bwrap_sandbox_has_empty_root(self):
+        result = self.grade(f'import os; print(os.path.exists({str(settings.BASE_DIR)!r}))', SANDBOX='bwrap')
+        self.assertEqual(result['stdout'].strip(), 'False')
+
+
+@override_settings(GRADER={'SANDBOX': 'none', 'POLL_INTERVAL': 0.01})
+class GradingQueueTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        module = Module.objects.create(course=Course.objects.create(title='Course', author=author), title='M')
+        self.task = Task.objects.create(module=module, title='Task', order=1, task_text='text')
+        self.user = User.objects.create_user(username='student', password='pass')
+
+    def create_job(self, **fields):
+        submission = Submission.objects.create(user=self.user, task=self.task, code_student='print(1)')
+        return GradingJob.objects.create(submission=submission, **fields)
+
+    def test_only_expired_running_jobs_are_requeued(self):
+        fresh = self.create_job(state='running', heartbeat_at=timezone.now())
+        stale = self.create_job(state='running', heartbeat_at=timezone.now() - timedelta(minutes=10))
+        self.assertEqual(grader.requeue_stale_jobs(300), 1)
+        fresh.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual(fresh.state, 'running')
+        self.assertEqual(stale.state, 'queued')
+
+    def test_renewed_lease_keeps_long_running_job(self):
+        started = timezone.now() - timedelta(minutes=10)
+        job = self.create_job(state='running', started_at=started, heartbeat_at=started)
+        grader.renew_leases([job.pk])
+        self.assertEqual(grader.requeue_stale_jobs(300), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.state, 'running')
+        self.assertEqual(job.started_at, started)
+
+    def test_grader_loop_requeues_jobs_of_crashed_grader(self):
+        InputOutput.objects.create(task=self.task, input='', output='1')
+        abandoned = timezone.now() - timedelta(minutes=10)
+        job = self.create_job(state='running', started_at=abandoned, heartbeat_at=abandoned)
+        call_command('run_grader', '--once', '--workers', '1', stdout=StringIO(), stderr=StringIO())
+        job.refresh_from_db()
+        job.submission.refresh_from_db()
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(job.submission.status, 'accepted')
+
+    @override_settings(GRADER={'SANDBOX': 'none', 'POLL_INTERVAL': 0.01, 'PYTHON': '/nonexistent/python'})
+    def test_sandbox_failure_is_retried_and_never_stored_as_verdict(self):
+        InputOutput.objects.create(task=self.task, input='', output='1')
+        job = self.create_job()
+        stderr = StringIO()
+        call_command('run_grader', '--once', '--workers', '1', stdout=StringIO(), stderr=stderr)
+        job.refresh_from_db()
+        job.submission.refresh_from_db()
+        self.assertEqual(job.state, 'failed')
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(job.submission.status, 'pending')
+        self.assertFalse(job.submission.test_results.exists())
+        self.assertIn('задание возвращено в очередь', stderr.getvalue())
+
+    def test_unloadable_job_is_failed_without_stopping_grader(self):
+        job = self.create_job()
+        with mock.patch.object(grader, 'load_payload', side_effect=RuntimeError('нет решения')):
+            call_command('run_grader', '--once', '--workers', '1', stdout=StringIO(), stderr=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.state, 'failed')
+        self.assertEqual(job.error, 'нет решения')
+
+
+class TaskSignalTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        course = Course.objects.create(title='Course', author=author)
+        self.module = Module.objects.create(course=course, title='Module')
+        self.other_module = Module.objects.create(course=course, title='Other')
+        task = Task.objects.create(module=self.module, title='Task', order=1, task_text='text')
+        self.submission = Submission.objects.create(user=author, task=task, code_student='print(1)')
+        self.task = Task.objects.get(pk=task.pk)
+
+    def test_save_without_changes_skips_relocation_and_indexing(self):
+        # UPDATE задачи + поиск курса для инвалидации кеша
+        with self.assertNumQueries(2):
+            self.task.save()
+
+    def test_module_change_moves_submissions(self):
+        self.task.module = self.other_module
+        self.task.save()
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.module_id, self.other_module.id)
+        with self.assertNumQueries(2):
+            self.task.save()
+
+
+class ModuleOwnershipTests(APITestCase):
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='pass', role='mentor')
+        self.other = User.objects.create_user(username='other', password='pass', role='mentor')
+        self.course = Course.objects.create(title='Course', author=self.mentor)
+        self.foreign_course = Course.objects.create(title='Foreign', author=self.other)
+        self.module = Module.objects.create(course=self.course, title='Module')
+        self.client.force_authenticate(self.mentor)
+
+    def test_mentor_cannot_move_module_to_foreign_course(self):
+        response = self.client.patch(f'/api/modules/{self.module.id}/', {'course': self.foreign_course.id})
+        self.assertEqual(response.status_code, 403)
+        self.module.refresh_from_db()
+        self.assertEqual(self.module.course_id, self.course.id)
+
+    def test_mentor_cannot_create_module_in_foreign_course(self):
+        response = self.client.post('/api/modules/', {'course': self.foreign_course.id, 'title': 'M'})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Module.objects.filter(course=self.foreign_course).exists())
+
+    def test_mentor_manages_modules_of_own_course(self):
+        response = self.client.post('/api/modules/', {'course': self.course.id, 'title': 'New'})
+        self.assertEqual(response.status_code, 201)
+        response = self.client.patch(f'/api/modules/{self.module.id}/', {'title': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, user_id, event):
+        self.published.append((user_id, event))
+
+
+class SubmissionEventTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        module = Module.objects.create(course=Course.objects.create(title='Course', author=author), title='M')
+        task = Task.objects.create(module=module, title='Task', order=1, task_text='text')
+        InputOutput.objects.create(task=task, input='1', output='1')
+        self.user = User.objects.create_user(username='student', password='pass')
+        self.submission = Submission.objects.create(user=self.user, task=task, code_student='print(1)')
+
+    def test_grader_status_reaches_other_process_through_journal(self):
+        broker = RecordingBroker()
+        relay = events.EventRelay(broker)
+        relay.last_id = events.latest_event_id()
+
+        # Грейдер — другой процесс: его брокер пуст, событие уходит в журнал.
+        job = GradingJob.objects.create(submission=self.submission, state='running')
+        grader.store_results(job, [{
+            'input_output_id': self.submission.task.input_outputs.get().id,
+            'verdict': 'ok', 'time_ms': 1, 'stdout': '1', 'stderr': '',
+        }])
+        relay.poll()
+        self.assertEqual(len(broker.published), 1)
+        user_id, event = broker.published[0]
+        self.assertEqual((user_id, event['id'], event['status']), (self.user.id, self.submission.id, 'accepted'))
+
+        relay.poll()
+        self.assertEqual(len(broker.published), 1)
+
+    async def test_stream_replays_events_after_last_event_id(self):
+        first = await SubmissionEvent.objects.acreate(
+            user=self.user, submission=self.submission, task_id=self.submission.task_id, status='pending',
+        )
+        await SubmissionEvent.objects.acreate(
+            user=self.user, submission=self.submission, task_id=self.submission.task_id, status='wrong',
+        )
+        with mock.patch.object(events.relay, 'ensure_started'):
+            stream = events.stream_status_events(self.user.id, last_event_id=first.id)
+            self.assertTrue((await anext(stream)).startswith('retry:'))
+            chunk = await anext(stream)
+            await stream.aclose()
+        self.assertIn(f'id: {first.id + 1}', chunk)
+        self.assertIn('"status": "wrong"', chunk)
+
+    async def test_new_stream_skips_events_recorded_before_it_connected(self):
+        old = await SubmissionEvent.objects.acreate(
+            user=self.user, submission=self.submission, task_id=self.submission.task_id, status='wrong',
+        )
+        with mock.patch.object(events.relay, 'ensure_started'):
+            stream = events.stream_status_events(self.user.id)
+            self.assertTrue((await anext(stream)).startswith('retry:'))
+            # Опросчик, простоявший без подписчиков, досылает старое событие.
+            for event_id, status in ((old.id, 'wrong'), (old.id + 1, 'accepted')):
+                events.broker.publish(self.user.id, {
+                    'event_id': event_id, 'id': self.submission.id, 'task': self.submission.task_id, 'status': status,
+                })
+            chunk = await anext(stream)
+            await stream.aclose()
+        self.assertIn(f'id: {old.id + 1}', chunk)
+        self.assertIn('"status": "accepted"', chunk)
+
+    def test_status_update_publishes_only_changes_and_prunes_journal(self):
+        SubmissionEvent.objects.create(
+            user=self.user, submission=self.submission, task_id=self.submission.task_id, status='pending',
+            created_at=timezone.now() - timedelta(days=1),
+        )
+        mentor = User.objects.create_user(username='mentor', password='pass', role='admin')
+        client = APIClient()
+        client.force_authenticate(mentor)
+        url = f'/api/submissions/{self.submission.id}/update_status/'
+        with mock.patch.object(events, '_pruned_at', 0.0), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.post(url, {'status': 'accepted'}).status_code, 200)
+        self.assertEqual(list(SubmissionEvent.objects.values_list('status', flat=True)), ['accepted'])
+
+        self.assertEqual(client.post(url, {'status': 'accepted'}).status_code, 200)
+        self.assertEqual(SubmissionEvent.objects.count(), 1)
+
+    def test_stream_is_rejected_outside_asgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/submissions/events/')
+        self.assertEqual(response.status_code, 501)
+
+
+class CounterTestCase(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        self.course = Course.objects.create(title='Course', author=author)
+        module = Module.objects.create(course=self.course, title='Module')
+        self.tasks = [Task.objects.create(module=module, title=f'Task {i}', order=i, task_text='text') for i in range(2)]
+        self.student = User.objects.create_user(username='student', password='pass')
+
+    def submit(self, task, status):
+        return Submission.objects.create(user=self.student, task=task, code_student=status, status=status)
+
+
+class ProgressCountersTests(CounterTestCase):
+    def test_counters_follow_submissions(self):
+        self.submit(self.tasks[0], 'wrong')
+        submission = self.submit(self.tasks[0], 'pending')
+        submission.status = 'accepted'
+        submission.save()
+        self.submit(self.tasks[1], 'wrong')
+
+        task_progress = TaskProgress.objects.get(user=self.student, task=self.tasks[0])
+        self.assertEqual((task_progress.attempts, task_progress.attempts_to_solve), (2, 2))
+        course_progress = CourseProgress.objects.get(user=self.student, course=self.course)
+        self.assertEqual((course_progress.solved_tasks, course_progress.attempts), (1, 3))
+
+    def test_migration_rebuilds_counters_for_existing_submissions(self):
+        self.submit(self.tasks[0], 'accepted')
+        self.submit(self.tasks[1], 'wrong')
+        self.submit(self.tasks[1], 'accepted')
+        TaskProgress.objects.all().delete()
+        CourseProgress.objects.all().delete()
+
+        migration = importlib.import_module('stepik.migrations.0016_rebuild_progress')
+        migration.rebuild_progress(apps, None)
+
+        course_progress = CourseProgress.objects.get(user=self.student, course=self.course)
+        self.assertEqual((course_progress.solved_tasks, course_progress.attempts), (2, 3))
+        self.assertEqual(progress.course_rank(course_progress), 1)
+
+
+class AnalyticsCountersTests(CounterTestCase):
+    def snapshot(self):
+        return (
+            sorted(TaskDailyStats.objects.values_list('task_id', 'day', 'submissions', 'accepted', 'wrong')),
+            sorted(TaskSolveHistogram.objects.values_list('task_id', 'attempts', 'solvers')),
+        )
+
+    def test_decrements_stop_at_zero(self):
+        submission = self.submit(self.tasks[0], 'accepted')
+        # Строки аналитики, собранные не из всех решений (например, до миграции).
+        TaskSolveHistogram.objects.update(solvers=0)
+        TaskDailyStats.objects.update(submissions=0, accepted=0)
+        submission.delete()
+        self.assertEqual(TaskSolveHistogram.objects.get().solvers, 0)
+        self.assertEqual(TaskDailyStats.objects.get().submissions, 0)
+
+    def test_migration_rebuilds_rollups_for_existing_submissions(self):
+        self.submit(self.tasks[0], 'wrong')
+        self.submit(self.tasks[0], 'accepted')
+        self.submit(self.tasks[1], 'accepted')
+        analytics.rebuild_course(self.course.id)
+        expected = self.snapshot()
+        TaskDailyStats.objects.all().delete()
+        TaskSolveHistogram.objects.all().delete()
+
+        migration = importlib.import_module('stepik.migrations.0017_rebuild_analytics')
+        migration.rebuild_analytics(apps, None)
+        self.assertEqual(self.snapshot(), expected)
+        self.assertEqual(expected[1], [(self.tasks[0].id, 2, 1), (self.tasks[1].id, 1, 1)])
+
+
+class SubmissionCodeDedupTests(APITestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        module = Module.objects.create(course=Course.objects.create(title='Course', author=author), title='M')
+        self.task = Task.objects.create(module=module, title='Task', order=1, task_text='text')
+        self.student = User.objects.create_user(username='student', password='pass')
+        self.client.force_authenticate(self.student)
+
+    def test_same_code_is_stored_once(self):
+        first = Submission.objects.create(user=self.student, task=self.task, code_student='print(1)\n')
+        second = Submission.objects.create(user=self.student, task=self.task, code_student='print(1)  \r\n')
+        self.assertEqual(first.code_hash, second.code_hash)
+        self.assertEqual(Submission.objects.get(pk=first.pk).code_student, '')
+        self.assertEqual(Submission.objects.get(pk=second.pk).code, 'print(1)  \r\n')
+        self.assertEqual(CodeBlob.objects.count(), 2)
+
+    def test_migration_backfills_hash_of_historical_submissions(self):
+        first = Submission.objects.create(user=self.student, task=self.task, code_student='print(1)')
+        second = Submission.objects.create(user=self.student, task=self.task, code_student='print(1)\n')
+        # Решения, записанные до появления code_hash.
+        Submission.objects.update(code_hash='', code_blob=None, code_student='print(1)')
+        CodeBlob.objects.all().delete()
+
+        migration = importlib.import_module('stepik.migrations.0020_backfill_code_hash')
+        migration.backfill_code_hash(apps, None)
+
+        rows = Submission.objects.filter(pk__in=[first.pk, second.pk]).values_list('code_hash', 'code_blob', 'code_student')
+        self.assertEqual(set(rows), {(code_hash('print(1)'), CodeBlob.objects.get().digest, '')})
+        self.assertEqual(Submission.objects.get(pk=first.pk).code, 'print(1)')
+
+    def test_code_change_recomputes_hash_and_blob(self):
+        submission = Submission.objects.create(user=self.student, task=self.task, code_student='print(1)')
+        response = self.client.patch(f'/api/submissions/{submission.id}/', {'code_student': 'print(2)'})
+        self.assertEqual(response.status_code, 200)
+
+        submission = Submission.objects.select_related('code_blob').get(pk=submission.pk)
+        self.assertEqual(submission.code_hash, code_hash('print(2)'))
+        self.assertEqual(submission.code_student, '')
+        self.assertEqual(submission.code, 'print(2)')
+
+    def test_code_change_with_update_fields(self):
+        submission = Submission.objects.create(user=self.student, task=self.task, code_student='print(1)')
+        submission.code = 'print(3)'
+        submission.save(update_fields=['code_student'])
+        submission = Submission.objects.get(pk=submission.pk)
+        self.assertEqual((submission.code_hash, submission.code), (code_hash('print(3)'), 'print(3)'))
+
+
+class ExternalTestDataTests(APITestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        storage = override_settings(TEST_STORAGE={'ROOT': root.name, 'THRESHOLD': 16})
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        self.author = User.objects.create_user(username='author', password='pass', role='mentor')
+        module = Module.objects.create(course=Course.objects.create(title='Course', author=self.author), title='M')
+        self.task = Task.objects.create(module=module, title='Task', order=1, task_text='text')
+
+    def test_large_part_is_kept_in_store(self):
+        test = InputOutput.objects.create(task=self.task, input='1 2 3 4 5 6 7 8 9 10', output='55')
+        test.refresh_from_db()
+        self.assertEqual((test.input, test.input_external, test.output_external), ('', True, False))
+        with blobstore.open_source(test.source('input')) as data:
+            self.assertEqual(bytes(data), b'1 2 3 4 5 6 7 8 9 10')
+
+        self.client.force_authenticate(self.author)
+        response = self.client.get(f'/api/tasks/{self.task.id}/tests/{test.id}/input/')
+        self.assertEqual(b''.join(response.streaming_content), b'1 2 3 4 5 6 7 8 9 10')
+
+    def test_inline_part_edited_to_empty_stays_inline(self):
+        test = InputOutput.objects.create(task=self.task, input='short', output='short')
+        test.input = ''
+        test.save()
+        test.refresh_from_db()
+        self.assertFalse(test.is_external('input'))
+        self.assertEqual((test.input_size, test.source('input')), (0, ''))
+        self.assertEqual(test.input_hash, blobstore.content_hash(b''))
+
+    def test_external_part_replaced_by_small_body_moves_inline(self):
+        test = InputOutput.objects.create(task=self.task, input='x' * 100, output='1')
+        test = InputOutput.objects.get(pk=test.pk)
+        test.input = 'small'
+        test.save(update_fields=['input'])
+        test.refresh_from_db()
+        self.assertFalse(test.input_external)
+        self.assertEqual((test.input, test.input_size), ('small', 5))
+
+        # Сохранение без изменения тела не трогает вынесенную часть.
+        test.output = 'y' * 100
+        test.save()
+        test.save()
+        test.refresh_from_db()
+        self.assertTrue(test.output_external)
+        self.assertEqual(test.output_size, 100)
+
+
+class SqliteSettingsTests(unittest.TestCase):
+    # Отдельные соединения к временному файлу, мимо тестовой БД.
+
+    def test_pragmas_are_applied_to_each_connection(self):
+        with tempfile.TemporaryDirectory() as root:
+            handler = ConnectionHandler(sqlite_databases(os.path.join(root, 'db.sqlite3'), {'CONN_MAX_AGE': 0}))
+            try:
+                with handler['default'].cursor() as cursor:
+                    self.assertEqual(cursor.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+                    cursor.execute('CREATE TABLE t (x INTEGER)')
+                with handler['read'].cursor() as cursor:
+                    self.assertEqual(cursor.execute('PRAGMA query_only').fetchone()[0], 1)
+                    with self.assertRaises(Exception):
+                        cursor.execute('INSERT INTO t VALUES (1)')
+            finally:
+                handler.close_all()
+
+    def test_safe_requests_read_from_read_alias(self):
+        router = ReadAliasRouter()
+        self.assertEqual(router.db_for_read(Course), 'default')
+        token = read_only_request.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Course), 'read')
+            self.assertEqual(router.db_for_write(Course), 'default')
+        finally:
+            read_only_request.reset(token)
+
+
+class SubmissionIntakeTests(APITransactionTestCase):
+    # Писатель пакетов работает в своём потоке и соединении — нужны настоящие коммиты.
+    databases = {'default', 'read'}
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.journal_dir = root.name
+        batching = override_settings(SUBMISSION_BATCHING={
+            'ENABLED': True, 'JOURNAL_DIR': root.name, 'FSYNC': False,
+            'FLUSH_INTERVAL_MS': 10, 'RETRIES': 2, 'RETRY_BACKOFF_MS': 1,
+        })
+        batching.enable()
+        self.addCleanup(batching.disable)
+
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        module = Module.objects.create(course=Course.objects.create(title='Course', author=author), title='M')
+        self.task = Task.objects.create(module=module, title='Task', order=1, task_text='text')
+        self.student = User.objects.create_user(username='student', password='pass')
+        self.batcher = intake.SubmissionBatcher()
+        self.addCleanup(self.batcher.stop)
+
+    def entry(self, code='print(1)'):
+        return {
+            'key': str(uuid.uuid4()), 'user': self.student.id, 'task': self.task.id,
+            'code': code, 'created_at': timezone.now().isoformat(),
+        }
+
+    def test_batched_submission_is_written_and_found_by_intake_key(self):
+        self.client.force_authenticate(self.student)
+        with mock.patch.object(intake, 'batcher', self.batcher):
+            response = self.client.post('/api/submissions/', {'task': self.task.id, 'code_student': 'print(1)'})
+            self.assertEqual(response.status_code, 202)
+            self.batcher.drain()
+        response = self.client.get('/api/submissions/', {'intake_key': response.data['intake_key']})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(self.batcher.journal.pending, 0)
+
+    def test_async_intake_answers_with_receipt(self):
+        token = AccessToken.for_user(self.student)
+        with mock.patch.object(async_views, 'batcher', self.batcher):
+            response = self.client.post(
+                '/api/submissions/intake/', {'task': self.task.id, 'code_student': 'print(1)'},
+                format='json', HTTP_AUTHORIZATION=f'Bearer {token}',
+            )
+            self.assertEqual(response.status_code, 202)
+            self.batcher.drain()
+        self.assertTrue(Submission.objects.filter(intake_key=response.json()['intake_key']).exists())
+
+    def test_replayed_entries_are_not_duplicated(self):
+        entries = [self.entry(), self.entry()]
+        intake.write_batch(entries)
+        intake.write_batch(entries)
+        self.assertEqual(Submission.objects.count(), 2)
+
+    def test_failed_batch_is_retried(self):
+        write_batch = intake.write_batch
+        calls = []
+
+        def flaky(batch):
+            calls.append(len(batch))
+            if len(calls) == 1:
+                raise RuntimeError('database is locked')
+            return write_batch(batch)
+
+        with mock.patch.object(intake, 'write_batch', flaky), self.assertLogs('stepik.intake', 'ERROR'):
+            self.batcher.submit(self.student.id, self.task.id, 'print(1)')
+            self.batcher.drain()
+        self.assertEqual(Submission.objects.count(), 1)
+        self.assertEqual(self.batcher.journal.pending, 0)
+        self.assertEqual(os.path.getsize(self.batcher.journal.path), 0)
+
+    def test_entry_that_never_writes_is_rejected(self):
+        write_batch = intake.write_batch
+
+        def poisoned(batch):
+            if any(entry['code'] == 'bad' for entry in batch):
+                raise ValueError('bad entry')
+            return write_batch(batch)
+
+        with mock.patch.object(intake, 'write_batch', poisoned), self.assertLogs('stepik.intake', 'ERROR'):
+            self.batcher.submit(self.student.id, self.task.id, 'good')
+            bad = self.batcher.submit(self.student.id, self.task.id, 'bad')
+            self.batcher.drain()
+        self.assertEqual([submission.code for submission in Submission.objects.all()], ['good'])
+        self.assertEqual(self.batcher.journal.pending, 0)
+        with open(self.batcher.journal.rejected_path) as f:
+            rejected = [json.loads(line) for line in f]
+        self.assertEqual([(entry['key'], entry['error']) for entry in rejected], [(bad['key'], 'bad entry')])
+
+    def test_startup_recovers_journal_of_finished_process(self):
+        path = os.path.join(self.journal_dir, 'intake-999999.jsonl')
+        with open(path, 'w') as f:
+            f.write(json.dumps(self.entry()) + '\n')
+            f.write('{"key": "недописанная строка')
+        self.assertEqual(intake.recover_on_startup(), 1)
+        self.assertEqual(Submission.objects.count(), 1)
+        self.assertFalse(os.path.exists(path))
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        caches['courses'].clear()
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course = Course.objects.create(title='Алгоритмы на графах', author=author)
+            module = Module.objects.create(course=self.course, title='Обход в ширину')
+            self.task = Task.objects.create(
+                module=module, title='Кратчайший путь', order=1, task_text='Найдите путь в лабиринте',
+            )
+            Course.objects.create(title='Основы Python', author=author)
+
+    def search(self, query, **params):
+        response = self.client.get('/api/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_task_text_and_titles_are_searchable(self):
+        data = self.search('лабиринте')
+        self.assertEqual(data['backend'], 'fts5')
+        self.assertEqual([(hit['kind'], hit['id']) for hit in data['results']], [('task', self.task.id)])
+        self.assertEqual([hit['id'] for hit in self.search('графах', kind='course')['results']], [self.course.id])
+
+    def test_index_follows_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.task_text = 'Найдите выход из пещеры'
+            self.task.save()
+        self.assertEqual(self.search('лабиринте')['results'], [])
+        self.assertEqual(len(self.search('пещеры')['results']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.delete()
+        self.assertEqual(self.search('пещеры')['results'], [])
+
+    @override_settings(SEARCH={'BACKEND': 'python'})
+    def test_fallback_index_matches_fts(self):
+        search._fallback.load(search.iter_documents())
+        data = self.search('путь')
+        self.assertEqual(data['backend'], 'python')
+        self.assertEqual([(hit['kind'], hit['id']) for hit in data['results']], [('task', self.task.id)])
+
+    def test_course_list_search_uses_index(self):
+        response = self.client.get('/api/courses/', {'search': 'python'})
+        self.assertEqual([course['title'] for course in response.data['results']], ['Основы Python'])
+
+    def test_search_without_words_finds_nothing(self):
+        response = self.client.get('/api/courses/', {'search': '!!!'})
+        self.assertEqual(response.data['results'], [])
+
+    @override_settings(SEARCH={'BACKEND': 'python'})
+    def test_fallback_course_filter_is_not_bound_by_variable_limit(self):
+        search._fallback.load(search.iter_documents())
+        matches = [(1.0, {'kind': 'course', 'id': self.course.id})] + [
+            (1.0, {'kind': 'course', 'id': 10 ** 6 + i}) for i in range(5000)
+        ]
+        with mock.patch.object(search._fallback, 'score', return_value=dict(enumerate(matches))):
+            courses = search.filter_courses(Course.objects.all(), 'графах')
+            _, params = courses.query.sql_with_params()
+            self.assertEqual(len(params), 1)
+            self.assertEqual(list(courses.values_list('id', flat=True)), [self.course.id])
+
+
+class CompressedTextTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        self.module = Module.objects.create(course=Course.objects.create(title='Course', author=author), title='M')
+
+    def stored(self, task):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT task_text FROM stepik_task WHERE id = %s', [task.id])
+            return bytes(cursor.fetchone()[0])
+
+    def create(self, text):
+        return Task.objects.create(module=self.module, title='Task', order=1, task_text=text)
+
+    def test_large_text_is_compressed_transparently(self):
+        text = 'Дан массив чисел. ' * 500
+        task = self.create(text)
+        stored = self.stored(task)
+        self.assertEqual(stored[:1], ZLIB)
+        self.assertLess(len(stored), len(text.encode()) // 10)
+        self.assertEqual(Task.objects.get(pk=task.pk).task_text, text)
+
+    def test_short_text_is_stored_raw(self):
+        task = self.create('Сложите два числа')
+        self.assertEqual(self.stored(task), RAW + 'Сложите два числа'.encode())
+        self.assertEqual(Task.objects.get(pk=task.pk).task_text, 'Сложите два числа')
+
+    def test_rows_stay_readable_after_algorithm_change(self):
+        old = self.create('a' * 5000)
+        with override_settings(COMPRESSED_TEXT={'ALGORITHM': 'lzma', 'LEVEL': 6}):
+            new = self.create('b' * 5000)
+        self.assertEqual(self.stored(new)[:1], LZMA)
+        self.assertEqual(
+            dict(Task.objects.filter(pk__in=[old.pk, new.pk]).values_list('pk', 'task_text')),
+            {old.pk: 'a' * 5000, new.pk: 'b' * 5000},
+        )
+
+
+class SubmissionExportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mentor = User.objects.create_user(username='mentor', password='pass', role='mentor')
+        other = User.objects.create_user(username='other', password='pass', role='mentor')
+        cls.student = User.objects.create_user(username='student', password='pass')
+        cls.task = cls.create_task(cls.mentor, 'Сумма')
+        foreign_task = cls.create_task(other, 'Чужая')
+        cls.old = Submission.objects.create(
+            user=cls.student, task=cls.task, code_student='print(1)', status='wrong',
+            created_at=timezone.make_aware(timezone.datetime(2026, 1, 10, 12)),
+        )
+        cls.new = Submission.objects.create(
+            user=cls.student, task=cls.task, code_student='print(2)', status='accepted',
+            created_at=timezone.make_aware(timezone.datetime(2026, 2, 10, 12)),
+        )
+        Submission.objects.create(user=cls.student, task=foreign_task, code_student='print(3)')
+
+    @classmethod
+    def create_task(cls, author, title):
+        module = Module.objects.create(course=Course.objects.create(title=title, author=author), title='M')
+        return Task.objects.create(module=module, title=title, order=1, task_text='text')
+
+    def export(self, **params):
+        self.client.force_authenticate(self.mentor)
+        response = self.client.get('/api/submissions/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_contains_only_mentor_courses(self):
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual([int(row['id']) for row in rows], [self.old.id, self.new.id])
+        self.assertEqual(rows[1]['code_student'], 'print(2)')
+
+    def test_ndjson_respects_filters(self):
+        _, content = self.export(output='ndjson', status='accepted', task=self.task.id)
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.new.id])
+        _, content = self.export(output='ndjson', since='2026-01-01', until='2026-01-31')
+        self.assertEqual([json.loads(line)['id'] for line in content.decode().splitlines()], [self.old.id])
+        # Дата без времени в until включает весь день.
+        _, content = self.export(output='ndjson', until='2026-01-10')
+        self.assertEqual([json.loads(line)['id'] for line in content.decode().splitlines()], [self.old.id])
+        _, content = self.export(output='ndjson', until='2026-01-10T11:00:00')
+        self.assertEqual(content, b'')
+
+    def test_gzip_output(self):
+        response, content = self.export(output='ndjson', gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('submissions.ndjson.gz', response['Content-Disposition'])
+        self.assertEqual(len(gzip.decompress(content).decode().splitlines()), 2)
+
+    def test_students_and_bad_params_are_rejected(self):
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get('/api/submissions/export/').status_code, 403)
+        self.client.force_authenticate(self.mentor)
+        for params in ({'output': 'xml'}, {'since': '2026-13-45'}, {'until': '2026-02-30'}, {'since': 'вчера'}):
+            self.assertEqual(self.client.get('/api/submissions/export/', params).status_code, 400, params)
+
+    def test_course_analytics_rejects_impossible_date(self):
+        self.client.force_authenticate(self.mentor)
+        response = self.client.get(f'/api/courses/{self.task.module.course_id}/analytics/', {'since': '2026-02-30'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SubmissionPaginationTests(APITestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        module = Module.objects.create(course=Course.objects.create(title='Course', author=author), title='M')
+        self.task = Task.objects.create(module=module, title='Task', order=1, task_text='text')
+        self.student = User.objects.create_user(username='student', password='pass')
+        self.client.force_authenticate(self.student)
+        # Половина решений с одинаковым created_at: порядок задаёт id.
+        moment = timezone.now() - timedelta(hours=1)
+        self.submissions = [
+            self.submit(created_at=moment + timedelta(minutes=i // 2)) for i in range(6)
+        ]
+
+    def submit(self, **fields):
+        return Submission.objects.create(user=self.student, task=self.task, code_student='print(1)', **fields)
+
+    def ids(self, response):
+        return [row['id'] for row in response.data['results']]
+
+    def test_page_numbers_follow_created_at_then_id(self):
+        newest_first = [submission.id for submission in reversed(self.submissions)]
+        pages = [
+            self.ids(self.client.get('/api/submissions/', {'page': page, 'page_size': 2})) for page in (1, 2, 3)
+        ]
+        self.assertEqual(sum(pages, []), newest_first)
+        response = self.client.get('/api/submissions/', {'page_size': 2})
+        self.assertEqual(response.data['count'], 6)
+
+    def test_cursor_pages_are_stable_across_inserts(self):
+        newest_first = [submission.id for submission in reversed(self.submissions)]
+        response = self.client.get('/api/submissions/', {'pagination': 'cursor', 'page_size': 2})
+        self.assertNotIn('count', response.data)
+        seen = self.ids(response)
+        self.submit()
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += self.ids(response)
+        self.assertEqual(seen, newest_first)
+
+
+class TaskImportTests(APITestCase):
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='pass', role='mentor')
+        self.module = Module.objects.create(course=Course.objects.create(title='Course', author=self.mentor), title='M')
+        self.client.force_authenticate(self.mentor)
+
+    def row(self, title, tests=()):
+        return {'title': title, 'order': 1, 'task_text': f'Условие {title}', 'tests': [
+            {'input': test, 'output': test} for test in tests
+        ]}
+
+    def ndjson(self, *rows):
+        return ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows).encode()
+
+    def upload(self, body, content_type='application/x-ndjson', module=None):
+        response = self.client.post(
+            f'/api/modules/{(module or self.module).id}/import/', data=body, content_type=content_type,
+        )
+        if response.status_code != 200:
+            return response, []
+        return response, [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_ndjson_rows_are_imported(self):
+        _, events = self.upload(self.ndjson(self.row('A', ['1', '2']), self.row('B')) + b'\n')
+        self.assertEqual(events[-1], {'event': 'done', 'rows': 2, 'tasks': 2, 'tests': 2})
+        self.assertEqual(sorted(self.module.tasks.values_list('title', flat=True)), ['A', 'B'])
+        self.assertEqual(InputOutput.objects.filter(task__title='A').count(), 2)
+
+    def test_zip_archive_is_imported(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('tasks.ndjson', self.ndjson(self.row('A', ['1']), self.row('B')))
+            zf.writestr('extra/c.json', json.dumps(self.row('C')))
+            zf.writestr('README.txt', 'игнорируется')
+        _, events = self.upload(archive.getvalue(), content_type='application/zip')
+        self.assertEqual(events[-1]['event'], 'done')
+        self.assertEqual(sorted(self.module.tasks.values_list('title', flat=True)), ['A', 'B', 'C'])
+
+    def test_bad_row_rolls_back_whole_import(self):
+        body = self.ndjson(self.row('A', ['1']), {'title': 'B', 'order': -1}) + b'{broken\n'
+        _, events = self.upload(body)
+        self.assertEqual([event['event'] for event in events], ['error', 'error', 'progress', 'failed'])
+        self.assertEqual([event['row'] for event in events[:2]], ['body:2', 'body:3'])
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(InputOutput.objects.exists())
+
+    def test_mentor_cannot_import_into_foreign_module(self):
+        other = User.objects.create_user(username='other', password='pass', role='mentor')
+        foreign = Module.objects.create(course=Course.objects.create(title='Foreign', author=other), title='M')
+        response, _ = self.upload(self.ndjson(self.row('A')), module=foreign)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Task.objects.exists())
+
+
+class SubmissionIntakeViewTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        module = Module.objects.create(course=Course.objects.create(title='Course', author=author), title='M')
+        self.task = Task.objects.create(module=module, title='Task', order=1, task_text='text')
+        self.student = User.objects.create_user(username='student', password='pass')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.student)}'}
+
+    def post(self, payload, **headers):
+        return self.client.post(
+            '/api/submissions/intake/', json.dumps(payload), content_type='application/json', **headers,
+        )
+
+    def test_submission_is_created_and_queued(self):
+        response = self.post({'task': self.task.id, 'code_student': 'print(1)'}, **self.auth)
+        self.assertEqual(response.status_code, 201)
+        submission = Submission.objects.get(pk=response.json()['id'])
+        self.assertEqual((submission.user_id, submission.code, response.json()['status']), (self.student.id, 'print(1)', 'pending'))
+        self.assertTrue(GradingJob.objects.filter(submission=submission).exists())
+
+    def test_bad_payload_is_rejected(self):
+        for payload in ({'task': self.task.id}, {'task': 'x', 'code_student': 'print(1)'},
+                        {'task': self.task.id, 'code_student': '  '}, {'task': 0, 'code_student': 'print(1)'}):
+            self.assertEqual(self.post(payload, **self.auth).status_code, 400, payload)
+        response = self.client.post('/api/submissions/intake/', 'not json', content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Submission.objects.exists())
+
+    def test_authentication_is_required(self):
+        self.assertEqual(self.post({'task': self.task.id, 'code_student': 'print(1)'}).status_code, 401)
+        response = self.post({'task': self.task.id, 'code_student': 'print(1)'}, HTTP_AUTHORIZATION='Bearer broken')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get('/api/submissions/intake/', **self.auth).status_code, 405)
+        self.assertFalse(Submission.objects.exists())
+
+
+class MySubmissionsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author', password='pass', role='mentor')
+        module = Module.objects.create(course=Course.objects.create(title='Course', author=author), title='M')
+        cls.tasks = [Task.objects.create(module=module, title=f'Task {i}', order=i, task_text='text') for i in range(2)]
+        cls.student = User.objects.create_user(username='student', password='pass')
+        other = User.objects.create_user(username='other', password='pass')
+        day = timezone.make_aware(timezone.datetime(2026, 3, 1, 12))
+        cls.submissions = [
+            Submission.objects.create(
+                user=cls.student, task=task, code_student='print(1)', status=status, created_at=day + timedelta(days=i),
+            )
+            for i, (task, status) in enumerate([
+                (cls.tasks[0], 'wrong'), (cls.tasks[0], 'accepted'), (cls.tasks[1], 'wrong'), (cls.tasks[1], 'pending'),
+            ])
+        ]
+        Submission.objects.create(user=other, task=cls.tasks[0], code_student='print(2)', status='accepted')
+
+    def setUp(self):
+        self.client.force_authenticate(self.student)
+
+    def ids(self, **params):
+        response = self.client.get('/api/submissions/my_submissions/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_filters_and_pagination(self):
+        own = [submission.id for submission in reversed(self.submissions)]
+        self.assertEqual(self.ids(), own)
+        self.assertEqual(self.ids(task=self.tasks[0].id), own[2:])
+        self.assertEqual(self.ids(status='wrong'), [own[1], own[3]])
+        self.assertEqual(self.ids(since='2026-03-02', until='2026-03-03'), own[1:3])
+        self.assertEqual(self.ids(page=2, page_size=3), own[3:])
+
+    def test_bad_filters_are_rejected(self):
+        for params in ({'until': '2026-02-30'}, {'status': 'done'}, {'task': 'x'}):
+            response = self.client.get('/api/submissions/my_submissions/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_summary_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/submissions/my_submissions/summary/')
+        self.assertEqual(response.data['total'], {'tasks': 2, 'solved': 1, 'attempts': 4})
+        self.assertEqual(
+            [(row['task'], row['best_status'], row['attempts']) for row in response.data['tasks']],
+            [(self.tasks[0].id, 'accepted', 2), (self.tasks[1].id, 'wrong', 2)],
+        )
+
+
+class FieldSelectionTests(APITestCase):
+    def setUp(self):
+        caches['courses'].clear()
+        self.author = User.objects.create_user(username='author', password='pass', role='mentor')
+        self.course = Course.objects.create(title='Course', author=self.author)
+        module = Module.objects.create(course=self.course, title='M')
+        task = Task.objects.create(module=module, title='Task', order=1, task_text='text')
+        InputOutput.objects.create(task=task, input='1', output='1')
+        Enrollment.objects.create(user=self.author, course=self.course)
+        Submission.objects.create(user=self.author, task=task, code_student='print(1)')
+        self.client.force_authenticate(self.author)
+
+    def count_queries(self, url, params):
+        caches['courses'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_fields_trim_course_detail_and_its_queries(self):
+        url = f'/api/courses/{self.course.id}/'
+        full, full_queries = self.count_queries(url, {})
+        trimmed, trimmed_queries = self.count_queries(url, {'fields': 'id,title,modules.title'})
+        self.assertIn('enrollments', full)
+        self.assertEqual(set(trimmed), {'id', 'title', 'modules'})
+        self.assertEqual([dict(module) for module in trimmed['modules']], [{'title': 'M'}])
+        self.assertLess(trimmed_queries, full_queries)
+
+    def test_expand_turns_primary_key_into_object(self):
+        response = self.client.get('/api/submissions/', {'fields': 'id,user'})
+        self.assertEqual(response.data['results'][0]['user'], self.author.id)
+        response = self.client.get('/api/submissions/', {'fields': 'id,user', 'expand': 'user'})
+        self.assertEqual(response.data['results'][0]['user']['username'], 'author')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'user'})
+
+
+class ExplainQuerysetsTests(TestCase):
+    def test_hot_paths_use_indexes(self):
+        out = StringIO()
+        call_command('explain_querysets', stdout=out)
+        self.assertIn('✓ submissions: student keyset page', out.getvalue())
+        self.assertNotIn('✗', out.getvalue())
@@ -2,6 +2,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import *
+from .async_views import submission_events, submission_intake
 
 router = DefaultRouter()
 router.register(r'courses', CourseViewSet, basename='course')
@@ -12,8 +13,12 @@ router.register(r'submissions', SubmissionViewSet, basename='submission')
 app_name = 'stepik'
 
 urlpatterns = [
+    path('submissions/intake/', submission_intake, name='submission-intake'),
+    path('submissions/events/', submission_events, name='submission-events'),
     path('', include(router.urls)),
     path('enrollments/', EnrollmentListView.as_view(), name='enrollments-list'),
     path('my-courses/', UserCourseListView.as_view(), name='user-courses-list'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('cache-stats/', CacheStatsView.as_view(), name='cache-stats'),
 ]
 
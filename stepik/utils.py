@@ -0,0 +1,7 @@
+from itertools import islice
+
+
+def iter_chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -1,19 +1,33 @@
 # FILE: stepik/views.py
+import json
+
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import PermissionDenied
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Min, Prefetch, Q, Sum, Value, When
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .models import Course, Enrollment, Module, Task, InputOutput, Submission
+from .models import (
+    Course, CourseProgress, Enrollment, Module, Task, TaskProgress, InputOutput, Submission, SubmissionTestResult,
+)
 from .serializer import *
-from .permissions import IsAdminOrReadOnly, IsInstructorOrAdmin
-from .paginations import CoursePagination
+from .permissions import IsAdmin, IsAdminOrReadOnly, IsInstructorOrAdmin, is_owner_or_admin
+from .paginations import CoursePagination, SelectablePagination
+from .fieldsets import FieldSelection
+from .grader import enqueue_submission
+from .events import publish_status
+from . import cache
+from . import analytics, blobstore, exporters, importers, intake, progress, search
+from .filters import SUBMISSION_STATUSES, filter_submissions, parse_moment
 
 class CourseViewSet(viewsets.ModelViewSet):
     queryset = Course.objects.filter(is_active=True)
     permission_classes = [IsAdminOrReadOnly]
-    pagination_class = CoursePagination
+    pagination_class = SelectablePagination
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -21,17 +35,24 @@ class CourseViewSet(viewsets.ModelViewSet):
         return CourseSerializer
     
     def get_queryset(self):
-        queryset = Course.objects.filter(is_active=True)
+        selection = FieldSelection.from_request(self.request)
+        queryset = selection.defer_unselected(
+            Course.objects.filter(is_active=True).order_by('-created_at', '-id'), keep=('created_at',)
+        )
+        if selection.expanded('author'):
+            queryset = queryset.select_related('author')
         
         author_id = self.request.query_params.get('author', None)
         if author_id:
             queryset = queryset.filter(author_id=author_id)
         
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(title__icontains=search)
+        query = self.request.query_params.get('search', None)
+        if query:
+            queryset = search.filter_courses(queryset, query)
         
-        return queryset
+        if self.action == 'retrieve':
+            return queryset.with_detail_tree(selection)
+        return queryset.with_counts(selection)
 
     @swagger_auto_schema(
         operation_summary="Получить список активных курсов",
@@ -42,14 +63,19 @@ class CourseViewSet(viewsets.ModelViewSet):
         responses={200: CourseSerializer(many=True)}
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        key = cache.build_key('course-list', cache.CATALOGUE, request)
+        build = super().list
+        return cache.cached_response(key, lambda: build(request, *args, **kwargs))
 
     @swagger_auto_schema(
         operation_summary="Получить детали курса",
         responses={200: CourseDetailSerializer}
     )
     def retrieve(self, request, *args, **kwargs):
-        return super().retrieve(request, *args, **kwargs)
+        course_id = kwargs[self.lookup_field]
+        key = cache.build_key(f'course-detail:{course_id}', cache.course_scope(course_id), request)
+        build = super().retrieve
+        return cache.cached_response(key, lambda: build(request, *args, **kwargs))
 
     @swagger_auto_schema(
         operation_summary="Создать новый курс",
@@ -147,13 +173,93 @@ class CourseViewSet(viewsets.ModelViewSet):
             )
 
 
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    @swagger_auto_schema(
+        operation_summary="Рейтинг студентов курса",
+        responses={200: LeaderboardEntrySerializer(many=True)}
+    )
+    def leaderboard(self, request, pk=None):
+        course = self.get_object()
+        paginator = CoursePagination()
+        page = paginator.paginate_queryset(progress.leaderboard(course.id), request, view=self)
+        return paginator.get_paginated_response(LeaderboardEntrySerializer(page, many=True).data)
+
+    @action(detail=True, methods=['get'], url_path='progress', permission_classes=[permissions.IsAuthenticated])
+    @swagger_auto_schema(
+        operation_summary="Прогресс по курсу (свой; автор курса и admin могут указать ?user=)",
+        manual_parameters=[openapi.Parameter('user', openapi.IN_QUERY, type=openapi.TYPE_INTEGER)],
+    )
+    def course_progress(self, request, pk=None):
+        course = self.get_object()
+        user_id = request.query_params.get('user') or request.user.id
+        if str(user_id) != str(request.user.id):
+            if not str(user_id).isdigit():
+                return Response({'detail': '❌ Неверный параметр user'}, status=status.HTTP_400_BAD_REQUEST)
+            if not is_owner_or_admin(request, course):
+                raise PermissionDenied('❌ Чужой прогресс доступен только автору курса и admin')
+
+        summary = CourseProgress.objects.filter(course=course, user_id=user_id).first()
+        solved = {
+            row['module_id']: row
+            for row in TaskProgress.objects.filter(course=course, user_id=user_id)
+            .values('module_id')
+            .annotate(solved_tasks=Count('pk', filter=Q(first_accepted_at__isnull=False)), attempts=Sum('attempts'))
+            .order_by()
+        }
+        modules = Module.objects.filter(course=course, is_active=True).annotate(tasks_total=Count('tasks')).order_by('id')
+
+        return Response({
+            'course': course.id,
+            'user': int(user_id),
+            'solved_tasks': summary.solved_tasks if summary else 0,
+            'attempts': summary.attempts if summary else 0,
+            'last_solved_at': summary.last_solved_at if summary else None,
+            'rank': progress.course_rank(summary) if summary else None,
+            'modules': [
+                {
+                    'id': module.id,
+                    'title': module.title,
+                    'tasks_total': module.tasks_total,
+                    'solved_tasks': solved.get(module.id, {}).get('solved_tasks', 0),
+                    'attempts': solved.get(module.id, {}).get('attempts', 0),
+                }
+                for module in modules
+            ],
+        })
+
+
+    @action(detail=True, methods=['get'], url_path='analytics', permission_classes=[permissions.IsAuthenticated])
+    @swagger_auto_schema(
+        operation_summary="Аналитика курса по задачам и дням (автор курса или admin)",
+        manual_parameters=[
+            openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('until', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        ],
+    )
+    def course_analytics(self, request, pk=None):
+        course = self.get_object()
+        if not is_owner_or_admin(request, course):
+            raise PermissionDenied('❌ Аналитика доступна только автору курса и admin')
+
+        since = request.query_params.get('since')
+        until = request.query_params.get('until')
+        return Response(analytics.course_analytics(
+            course,
+            since=timezone.localdate(parse_moment(since)) if since else None,
+            until=timezone.localdate(parse_moment(until, end_of_day=True)) if until else None,
+        ))
+
 class ModuleViewSet(viewsets.ModelViewSet):
     queryset = Module.objects.filter(is_active=True)
     serializer_class = ModuleSerializer
     permission_classes = [IsInstructorOrAdmin]
 
     def get_queryset(self):
-        queryset = Module.objects.filter(is_active=True)
+        selection = FieldSelection.from_request(self.request)
+        queryset = selection.defer_unselected(
+            Module.objects.filter(is_active=True).select_related('course')
+        ).with_tasks(selection)
         
         course_id = self.request.query_params.get('course', None)
         if course_id:
@@ -169,16 +275,39 @@ class ModuleViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        course_id = self.request.data.get('course')
+        if not is_owner_or_admin(self.request, serializer.validated_data['course']):
+            raise PermissionDenied('❌ У вас нет прав для добавления модулей в этот курс')
+        serializer.save()
+
+    def perform_update(self, serializer):
+        course = serializer.validated_data.get('course')
+        if course is not None and not is_owner_or_admin(self.request, course):
+            raise PermissionDenied('❌ У вас нет прав для переноса модуля в этот курс')
+        serializer.save()
+
+    @action(detail=True, methods=['post'], url_path='import')
+    @swagger_auto_schema(
+        operation_summary="Массовый импорт заданий и тестов (NDJSON или ZIP)",
+        manual_parameters=[
+            openapi.Parameter('chunk_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+        request_body=openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_BINARY),
+        responses={200: 'application/x-ndjson: события progress / error / done / failed'}
+    )
+    def import_tasks(self, request, pk=None):
+        module = self.get_object()
+
         try:
-            course = Course.objects.get(id=course_id)
-            
-            if course.author != self.request.user and self.request.user.role != 'admin':
-                raise ValidationError('❌ У вас нет прав для добавления модулей в этот курс')
-            
-            serializer.save()
-        except Course.DoesNotExist:
-            raise ValidationError('❌ Курс не найден')
+            chunk_size = min(max(int(request.query_params.get('chunk_size', importers.DEFAULT_CHUNK_SIZE)), 1), 1000)
+        except ValueError:
+            chunk_size = importers.DEFAULT_CHUNK_SIZE
+
+        records = importers.iter_records(request.stream, request.content_type.split(';')[0].strip())
+        events = (
+            json.dumps(event, ensure_ascii=False) + '\n'
+            for event in importers.import_tasks(module, records, chunk_size)
+        )
+        return StreamingHttpResponse(events, content_type='application/x-ndjson')
 
 
 class TaskViewSet(viewsets.ModelViewSet):
@@ -187,7 +316,8 @@ class TaskViewSet(viewsets.ModelViewSet):
     permission_classes = [IsInstructorOrAdmin]
 
     def get_queryset(self):
-        queryset = Task.objects.all()
+        selection = FieldSelection.from_request(self.request)
+        queryset = selection.defer_unselected(Task.objects.select_related('module')).for_selection(selection)
         
         module_id = self.request.query_params.get('module', None)
         if module_id:
@@ -202,20 +332,76 @@ class TaskViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    def perform_create(self, serializer):
+        if not is_owner_or_admin(self.request, serializer.validated_data['module']):
+            raise PermissionDenied('❌ У вас нет прав для добавления заданий в этот модуль')
+        serializer.save()
+
+    def perform_update(self, serializer):
+        module = serializer.validated_data.get('module')
+        if module is not None and not is_owner_or_admin(self.request, module):
+            raise PermissionDenied('❌ У вас нет прав для переноса задания в этот модуль')
+        serializer.save()
+
+    @action(detail=True, methods=['get'], url_path=r'tests/(?P<test_id>\d+)/(?P<part>input|output)',
+            permission_classes=[permissions.IsAuthenticated])
+    @swagger_auto_schema(
+        operation_summary="Скачать вход или выход теста (только автор курса и admin)",
+        responses={200: 'text/plain'}
+    )
+    def download_test(self, request, pk=None, test_id=None, part=None):
+        test = InputOutput.objects.select_related('task__module').filter(pk=test_id, task_id=pk).first()
+        if test is None:
+            return Response({'detail': '❌ Тест не найден'}, status=status.HTTP_404_NOT_FOUND)
+        if not is_owner_or_admin(request, test):
+            raise PermissionDenied('❌ Тесты доступны только автору курса и admin')
+
+        filename = f'test-{test.id}.{part}.txt'
+        content_type = 'text/plain; charset=utf-8'
+        if test.is_external(part):
+            try:
+                response = FileResponse(
+                    blobstore.open_stream(getattr(test, f'{part}_hash')),
+                    as_attachment=True, filename=filename, content_type=content_type,
+                )
+            except FileNotFoundError:
+                return Response({'detail': '❌ Файл теста не найден в хранилище'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            response = HttpResponse(getattr(test, part), content_type=content_type)
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['ETag'] = f'"{getattr(test, f"{part}_hash")}"'
+        return response
+
 class SubmissionViewSet(viewsets.ModelViewSet):
     serializer_class = SubmissionSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = CoursePagination
+    pagination_class = SelectablePagination
 
     def get_queryset(self):
         user = self.request.user
         
         if user.role == 'student':
-            return Submission.objects.filter(user=user)
-        
-        if user.role == 'mentor':
-            return Submission.objects.filter(task__module__course__author=user)
-        return Submission.objects.all()
+            queryset = Submission.objects.filter(user=user)
+        elif user.role == 'mentor':
+            queryset = Submission.objects.filter(course__author=user)
+        else:
+            queryset = Submission.objects.all()
+        return self.select_for_response(queryset).order_by('-created_at', '-id')
+
+    def select_for_response(self, queryset):
+        selection = FieldSelection.from_request(self.request)
+        queryset = selection.defer_unselected(queryset, keep=('created_at',))
+        if selection.expanded('user'):
+            queryset = queryset.select_related('user')
+        if selection.includes('task_title') or (self.action == 'retrieve' and selection.expanded('task')):
+            queryset = queryset.select_related('task')
+        if selection.includes('code_student'):
+            queryset = queryset.select_related('code_blob')
+        if self.action == 'retrieve':
+            test_results = selection.prefetch('test_results', SubmissionTestResult.objects.all(), 'submission')
+            if test_results is not None:
+                queryset = queryset.prefetch_related(test_results)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -232,14 +418,20 @@ class SubmissionViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(
         operation_summary="Отправить решение",
         request_body=SubmissionSerializer,
-        responses={201: SubmissionSerializer}
+        responses={201: SubmissionSerializer, 202: 'Принято в пакетную запись (SUBMISSION_BATCHING)'}
     )
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save(user=request.user)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if intake.batching_settings()['ENABLED']:
+            entry = intake.batcher.submit(
+                request.user.id, serializer.validated_data['task'].id, serializer.validated_data['code'],
+            )
+            return Response(intake.receipt(entry), status=status.HTTP_202_ACCEPTED)
+        submission = serializer.save(user=request.user)
+        enqueue_submission(submission)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     @swagger_auto_schema(
@@ -271,8 +463,11 @@ class SubmissionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        submission.status = new_status
-        submission.save()
+        if submission.status != new_status:
+            with transaction.atomic():
+                submission.status = new_status
+                submission.save()
+                publish_status(submission)
         
         return Response(
             {
@@ -282,15 +477,149 @@ class SubmissionViewSet(viewsets.ModelViewSet):
             }
         )
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    @swagger_auto_schema(
+        operation_summary="Выгрузить решения в CSV/NDJSON (только для mentor/admin)",
+        manual_parameters=[
+            openapi.Parameter('output', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=sorted(exporters.FORMATS)),
+            openapi.Parameter('gzip', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter('course', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('task', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('until', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        ],
+        responses={200: 'text/csv или application/x-ndjson'}
+    )
+    def export(self, request):
+        if request.user.role not in ['mentor', 'admin']:
+            return Response(
+                {'detail': '❌ У вас нет прав для выгрузки решений'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in exporters.FORMATS:
+            return Response(
+                {'detail': '❌ Неверный формат выгрузки'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = exporters.iter_rows(filter_submissions(self.get_queryset(), request.query_params))
+        render, content_type = exporters.FORMATS[export_format]
+        filename = f'submissions.{export_format}'
+        content = render(rows)
+        if request.query_params.get('gzip') in ('1', 'true'):
+            content = exporters.iter_gzip(content)
+            content_type = 'application/gzip'
+            filename += '.gz'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    @swagger_auto_schema(
+        operation_summary="Одинаковые решения разных студентов (только для mentor/admin)",
+        manual_parameters=[
+            openapi.Parameter('course', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('task', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('min_users', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, default=2),
+        ],
+    )
+    def duplicates(self, request):
+        if request.user.role not in ['mentor', 'admin']:
+            return Response(
+                {'detail': '❌ У вас нет прав для поиска совпадающих решений'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            min_users = max(int(request.query_params.get('min_users', 2)), 2)
+        except ValueError:
+            return Response({'detail': '❌ Неверный параметр min_users'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Группы по индексу (task, code_hash): хеш нормализованного кода совпадает
+        # у решений, отличающихся только пробелами в конце строк и переводами строк.
+        submissions = filter_submissions(self.get_queryset(), request.query_params).exclude(code_hash='')
+        groups = (
+            submissions.values('task', 'code_hash', task_title=F('task__title'))
+            .annotate(users=Count('user', distinct=True), submissions=Count('pk'), first_at=Min('created_at'))
+            .filter(users__gte=min_users)
+            .order_by('-users', 'task', 'code_hash')
+        )
+        paginator = CoursePagination()
+        page = paginator.paginate_queryset(groups, request, view=self)
+
+        members = {}
+        for row in (
+            submissions.filter(
+                task_id__in={group['task'] for group in page},
+                code_hash__in={group['code_hash'] for group in page},
+            )
+            .order_by('created_at', 'id')
+            .values('id', 'task_id', 'code_hash', 'user_id', 'status', 'created_at', username=F('user__username'))
+        ):
+            key = (row.pop('task_id'), row.pop('code_hash'))
+            members.setdefault(key, []).append(row)
+        for group in page:
+            group['members'] = members.get((group['task'], group['code_hash']), [])
+        return paginator.get_paginated_response(page)
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     @swagger_auto_schema(
         operation_summary="Получить мои решения",
+        manual_parameters=[
+            openapi.Parameter('task', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=[*SUBMISSION_STATUSES]),
+            openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('until', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Поля через запятую, например id,task,status"),
+        ],
         responses={200: SubmissionSerializer(many=True)}
     )
     def my_submissions(self, request):
-        submissions = Submission.objects.filter(user=request.user)
-        serializer = self.get_serializer(submissions, many=True)
-        return Response(serializer.data)
+        submissions = self.select_for_response(
+            filter_submissions(Submission.objects.filter(user=request.user), request.query_params)
+        ).order_by('-created_at', '-id')
+
+        page = self.paginate_queryset(submissions)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='my_submissions/summary',
+            permission_classes=[permissions.IsAuthenticated])
+    @swagger_auto_schema(
+        operation_summary="Сводка по моим решениям: лучший статус и число попыток по заданиям",
+    )
+    def my_submissions_summary(self, request):
+        rows = list(
+            filter_submissions(Submission.objects.filter(user=request.user), request.query_params)
+            .values('task', task_title=F('task__title'))
+            .annotate(
+                attempts=Count('id'),
+                accepted=Count('id', filter=Q(status='accepted')),
+                wrong=Count('id', filter=Q(status='wrong')),
+                pending=Count('id', filter=Q(status='pending')),
+                last_submitted_at=Max('created_at'),
+            )
+            .annotate(
+                best_status=Case(
+                    When(accepted__gt=0, then=Value('accepted')),
+                    When(wrong__gt=0, then=Value('wrong')),
+                    default=Value('pending'),
+                )
+            )
+            .order_by('task')
+        )
+        return Response({
+            'tasks': rows,
+            'total': {
+                'tasks': len(rows),
+                'solved': sum(1 for row in rows if row['best_status'] == 'accepted'),
+                'attempts': sum(row['attempts'] for row in rows),
+            },
+        })
 
 class EnrollmentListView(generics.ListAPIView):
     serializer_class = EnrollmentSerializer
@@ -301,7 +630,17 @@ class EnrollmentListView(generics.ListAPIView):
         responses={200: EnrollmentSerializer(many=True)}
     )
     def get_queryset(self):
-        return Enrollment.objects.filter(user=self.request.user)
+        selection = FieldSelection.from_request(self.request)
+        queryset = Enrollment.objects.filter(user=self.request.user)
+        if selection.expanded('user'):
+            queryset = queryset.select_related('user')
+        if selection.expanded('course'):
+            nested = selection.nested('course')
+            courses = nested.defer_unselected(Course.objects.all())
+            if nested.expanded('author'):
+                courses = courses.select_related('author')
+            queryset = queryset.prefetch_related(Prefetch('course', queryset=courses.with_counts(nested)))
+        return queryset
 
 class UserCourseListView(generics.ListAPIView):
     serializer_class = CourseSerializer
@@ -312,7 +651,51 @@ class UserCourseListView(generics.ListAPIView):
         responses={200: CourseSerializer(many=True)}
     )
     def get_queryset(self):
-        return Course.objects.filter(
-            enrollments__user=self.request.user,
+        selection = FieldSelection.from_request(self.request)
+        queryset = selection.defer_unselected(Course.objects.filter(
+            pk__in=Enrollment.objects.filter(user=self.request.user).values('course'),
             is_active=True
-        ).distinct()
\ No newline at end of file
+        ))
+        if selection.expanded('author'):
+            queryset = queryset.select_related('author')
+        return queryset.with_counts(selection)
+
+
+class SearchView(generics.GenericAPIView):
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Полнотекстовый поиск по курсам, модулям и заданиям",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('kind', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="course, module, task через запятую"),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+    )
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'detail': '❌ Укажите запрос в параметре q'}, status=status.HTTP_400_BAD_REQUEST)
+
+        kinds = [kind for kind in request.query_params.get('kind', '').split(',') if kind]
+        if any(kind not in search.KINDS for kind in kinds):
+            return Response({'detail': '❌ Неверный параметр kind'}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = request.query_params.get('limit', '20')
+        if not limit.isdigit() or not 1 <= int(limit) <= 100:
+            return Response({'detail': '❌ limit должен быть от 1 до 100'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'query': query,
+            'backend': search.get_backend().name,
+            'results': search.search(query, kinds, int(limit)),
+        })
+
+
+class CacheStatsView(generics.GenericAPIView):
+    permission_classes = [IsAdmin]
+
+    @swagger_auto_schema(operation_summary="Статистика кэша курсов (только для admin)")
+    def get(self, request):
+        return Response(cache.get_stats())